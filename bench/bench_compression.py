@@ -0,0 +1,33 @@
+"""
+Bytes on wire and latency for each page encoding
+Usage: python -m bench.bench_compression [--duration 3] [--concurrency 8]
+"""
+
+import argparse
+
+from bench.loadgen import run_load
+from bench.server import gunicorn
+from src.compression import ENCODINGS
+
+PAGES = ['/', '/aws', '/digitalocean', '/demo']
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--duration', type=float, default=3.0)
+    parser.add_argument('--concurrency', type=int, default=8)
+    args = parser.parse_args()
+
+    print(f"{'encoding':<10}{'bytes/req':>12}{'req/s':>10}{'p50 ms':>10}{'p99 ms':>10}")
+    with gunicorn() as base_url:
+        for encoding in ('identity',) + ENCODINGS:
+            headers = {'Accept-Encoding': encoding}
+            requests = [('GET', path, None, headers) for path in PAGES]
+            stats = run_load(base_url, requests, args.duration, args.concurrency)
+            per_request = stats['bytes'] / max(stats['requests'], 1)
+            print(f"{encoding:<10}{per_request:>12.0f}{stats['rps']:>10.1f}"
+                  f"{stats['p50_ms']:>10.2f}{stats['p99_ms']:>10.2f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,46 @@
+"""
+p50/p99 latency per gunicorn worker class at increasing concurrency
+Usage: python -m bench.bench_concurrency [--workers sync,gthread,gevent,uvicorn]
+                                         [--levels 100,250,500,1000] [--duration 5]
+"""
+
+import argparse
+import importlib.util
+import json
+
+from bench.loadgen import run_load
+from bench.server import gunicorn
+
+REQUESTS = [
+    ('GET', '/', None, None),
+    ('GET', '/health', None, None),
+    ('POST', '/api/calculate', json.dumps({'a': 5, 'b': 7}),
+     {'Content-Type': 'application/json'}),
+]
+# Worker classes that need an optional package
+OPTIONAL = {'gevent': 'gevent', 'uvicorn': 'uvicorn'}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--workers', default='sync,gthread,gevent,uvicorn')
+    parser.add_argument('--levels', default='100,250,500,1000')
+    parser.add_argument('--duration', type=float, default=5.0)
+    args = parser.parse_args()
+    levels = [int(level) for level in args.levels.split(',')]
+
+    print(f"{'worker':<10}{'conns':>7}{'req/s':>10}{'p50 ms':>10}{'p99 ms':>10}{'errors':>8}")
+    for worker in args.workers.split(','):
+        module = OPTIONAL.get(worker)
+        if module and importlib.util.find_spec(module) is None:
+            print(f'{worker:<10} skipped ({module} not installed)')
+            continue
+        with gunicorn(env={'WORKER_CLASS': worker}) as url:
+            for level in levels:
+                stats = run_load(url, REQUESTS, args.duration, level)
+                print(f"{worker:<10}{level:>7}{stats['rps']:>10.1f}{stats['p50_ms']:>10.2f}"
+                      f"{stats['p99_ms']:>10.2f}{stats['errors']:>8}")
+
+
+if __name__ == '__main__':
+    main()
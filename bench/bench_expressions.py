@@ -0,0 +1,40 @@
+"""
+Cost of evaluating calculator expressions with and without the compiled cache
+Usage: python -m bench.bench_expressions [--iterations 20000]
+"""
+
+import argparse
+import time
+
+from src.expressions import compile_expression, evaluate
+
+FORMULAS = ('a + b', 'a * (b + 2) ** 2', 'round(sqrt(a ** 2 + b ** 2), 3)',
+            'max(a, b) // 3 - min(a, b) % 4 + abs(a - b) / 2')
+VARIABLES = {'a': 5, 'b': 7}
+
+
+def measure(formula: str, iterations: int, cached: bool) -> float:
+    payload = {'expression': formula, 'variables': VARIABLES}
+    clear = compile_expression.cache_clear
+    start = time.perf_counter_ns()
+    for _ in range(iterations):
+        if not cached:
+            clear()
+        evaluate(payload)
+    return (time.perf_counter_ns() - start) / iterations / 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--iterations', type=int, default=20000)
+    args = parser.parse_args()
+
+    print(f'{"expression":<52}{"parse+eval":>12}{"cached":>12}')
+    for formula in FORMULAS:
+        cold = measure(formula, args.iterations, cached=False)
+        warm = measure(formula, args.iterations, cached=True)
+        print(f'{formula:<52}{cold:>9.2f} us{warm:>9.2f} us')
+
+
+if __name__ == '__main__':
+    main()
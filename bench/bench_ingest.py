@@ -0,0 +1,67 @@
+"""
+Worker cost of hostile JSON bodies
+Drives the JSON API with a mix of legitimate requests and hostile bodies
+(oversized, giant numbers, deep nesting) under gunicorn, once with the body
+limits on and once with BODY_LIMITS_ENABLED=0, and reports worker CPU per
+request for each kind of payload and for the mix. Without the limits, deep
+nesting can overflow the parser's stack and kill the worker (``restarts``);
+with them, oversized bodies are refused unread, so clients still sending see
+the connection reset (``errors``).
+Usage: python -m bench.bench_ingest [--duration 5] [--concurrency 8]
+"""
+
+import argparse
+import json
+
+from bench.loadgen import run_load
+from bench.procstats import cpu_seconds, process_tree
+from bench.server import gunicorn_process
+
+JSON_HEADERS = {'Content-Type': 'application/json'}
+LEGIT = ('POST', '/api/calculate', json.dumps({'a': 5, 'b': 7}).encode(), JSON_HEADERS)
+BATCH = '/api/calculate/batch'
+PAYLOADS = {
+    'legit': [LEGIT],
+    # 4 MB: far over both routes' byte limits
+    'oversized': [('POST', BATCH, b'[' + b'{"a":1,"b":2},' * 300000 + b'{}]', JSON_HEADERS)],
+    # One 900k-digit integer, which orjson can't read and hands to the stdlib
+    'long number': [('POST', BATCH, b'[{"a":' + b'9' * 900000 + b',"b":1}]', JSON_HEADERS)],
+    'deep nesting': [('POST', BATCH, b'[' * 400000 + b']' * 400000, JSON_HEADERS)],
+}
+
+
+def measure(base_url, master, requests, duration, concurrency) -> dict:
+    """Load stats plus worker CPU; the CPU of workers that died is lost"""
+    before = {pid: cpu_seconds([pid]) for pid in process_tree(master)}
+    stats = run_load(base_url, requests, duration, concurrency)
+    after = process_tree(master)
+    used = sum(cpu_seconds([pid]) - before.get(pid, 0.0) for pid in after)
+    stats['cpu_ms_per_request'] = used * 1000 / max(stats['requests'], 1)
+    stats['restarts'] = len(set(before) - set(after))
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--duration', type=float, default=5.0)
+    parser.add_argument('--concurrency', type=int, default=8)
+    args = parser.parse_args()
+
+    # Legitimate traffic with one hostile body in every four requests
+    mix = [LEGIT] * 9 + [requests[0] for name, requests in PAYLOADS.items() if name != 'legit']
+    cases = dict(PAYLOADS, mix=mix)
+    print(f'{"":<14}{"limits":>8}{"req/s":>10}{"p99 ms":>10}{"cpu ms/req":>12}{"errors":>8}'
+          f'{"restarts":>10}')
+    for enabled in ('1', '0'):
+        with gunicorn_process({'BODY_LIMITS_ENABLED': enabled}) as (base_url, proc):
+            run_load(base_url, [LEGIT], duration=1.0, concurrency=args.concurrency)
+            for name, requests in cases.items():
+                stats = measure(base_url, proc.pid, requests, args.duration, args.concurrency)
+                print(f'{name:<14}{"on" if enabled == "1" else "off":>8}{stats["rps"]:>10.1f}'
+                      f'{stats["p99_ms"]:>10.2f}{stats["cpu_ms_per_request"]:>12.3f}'
+                      f'{stats["errors"]:>8}{stats["restarts"]:>10}')
+
+
+if __name__ == '__main__':
+    main()
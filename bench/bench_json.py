@@ -0,0 +1,63 @@
+"""
+JSON encoding and decoding cost on the calculator and health payloads
+Compares Flask's default provider with FastJSONProvider, with orjson (when
+installed) and with its stdlib fallback.
+Usage: python -m bench.bench_json [--iterations 100000]
+"""
+
+import argparse
+import time
+
+from flask import Flask
+
+from src import jsonprovider
+from src.jsonprovider import FastJSONProvider
+
+CALCULATE = {'result': 12, 'operation': '5 + 7'}
+HEALTH = {'status': 'healthy', 'timestamp': 1760000000.123456}
+REQUEST = b'{"a": 5, "b": 7}'
+
+
+def measure(fn, iterations: int) -> float:
+    start = time.perf_counter_ns()
+    for _ in range(iterations):
+        fn()
+    return (time.perf_counter_ns() - start) / iterations / 1000
+
+
+def cases(provider) -> dict:
+    return {
+        'calculate response': lambda: provider.response(CALCULATE),
+        'health response': lambda: provider.response(HEALTH),
+        'calculate request': lambda: provider.loads(REQUEST),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--iterations', type=int, default=100000)
+    args = parser.parse_args()
+
+    app = Flask(__name__)
+    providers = [('flask default', app.json, None)]
+    fast = FastJSONProvider(app)
+    if jsonprovider.orjson is not None:
+        providers.append(('fast (orjson)', fast, jsonprovider.orjson))
+    providers.append(('fast (stdlib)', fast, None))
+
+    orjson = jsonprovider.orjson
+    print(f'{"":<20}' + ''.join(f'{name:>16}' for name, _, _ in providers))
+    results = {}
+    for name, provider, module in providers:
+        jsonprovider.orjson = module
+        with app.app_context():
+            for case, fn in cases(provider).items():
+                results.setdefault(case, []).append(measure(fn, args.iterations))
+    jsonprovider.orjson = orjson
+    for case, timings in results.items():
+        print(f'{case:<20}' + ''.join(f'{us:>13.2f} us' for us in timings))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,68 @@
+"""
+Worker memory with and without preloading
+Starts gunicorn with PRELOAD=0 and PRELOAD=1, serves every page, asset and
+a search to each worker, then reads each process's RSS, PSS and USS from
+/proc. PSS summed over the tree is the service's real footprint; USS per
+worker is the cost of adding one more. Also checks that /metrics reports a
+process_memory_bytes series per worker.
+Usage: python -m bench.bench_memory [--workers 4] [--duration 3]
+"""
+
+import argparse
+import re
+import time
+import urllib.request
+
+from bench.loadgen import run_load
+from bench.procstats import process_tree
+from bench.server import gunicorn_process
+from src.app import assets, guide_bundle
+from src.memory import read_memory
+
+MB = 1024 * 1024
+
+
+def requests_for_every_page() -> list:
+    paths = ['/', '/demo', '/api/search?q=docker', '/health']
+    for guide in guide_bundle.guides:
+        paths += [guide['path'], guide['path'] + '/all']
+        paths += ['%s/step/%d' % (guide['path'], n) for n in range(len(guide['sections']))]
+    paths += [assets.url(name) for name in ('base.css', 'search.js', 'sections.js')]
+    headers = {'Accept-Encoding': 'br, gzip'}
+    return [('GET', path, None, headers) for path in paths]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--duration', type=float, default=3.0)
+    args = parser.parse_args()
+
+    requests = requests_for_every_page()
+    print(f'{"preload":<9}{"ready s":>9}{"worker rss":>12}{"worker pss":>12}{"worker uss":>12}'
+          f'{"total pss":>11}{"series":>8}')
+    for preload in ('0', '1'):
+        env = {'PRELOAD': preload, 'WORKERS': str(args.workers), 'MEMORY_SAMPLE_INTERVAL': '1'}
+        started = time.monotonic()
+        with gunicorn_process(env) as (base_url, proc):
+            ready = time.monotonic() - started
+            run_load(base_url, requests, args.duration, concurrency=args.workers * 2)
+            time.sleep(1.5)  # a fresh memory sample from every worker
+            tree = process_tree(proc.pid)
+            memory = {pid: read_memory(pid) for pid in tree}
+            workers = [memory[pid] for pid in tree if pid != proc.pid and memory[pid]]
+            with urllib.request.urlopen(base_url + '/metrics') as response:
+                scraped = response.read().decode()
+            series = len(re.findall(r'^process_memory_bytes\{.*kind="pss".*\}', scraped, re.M))
+
+        def mean(kind):
+            return sum(item[kind] for item in workers) / len(workers) / MB
+
+        total = sum(item['pss'] for item in memory.values() if item) / MB
+        print(f'{"on" if preload == "1" else "off":<9}{ready:>9.2f}{mean("rss"):>12.1f}'
+              f'{mean("pss"):>12.1f}{mean("uss"):>12.1f}{total:>11.1f}{series:>8}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,33 @@
+"""
+Compare guide page throughput with and without the page cache
+Usage: python -m bench.bench_pages [--duration 5] [--concurrency 8]
+"""
+
+import argparse
+
+from bench.loadgen import run_load
+from bench.server import gunicorn
+
+PAGES = ['/', '/aws', '/digitalocean', '/demo']
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--duration', type=float, default=5.0)
+    parser.add_argument('--concurrency', type=int, default=8)
+    args = parser.parse_args()
+
+    requests = [('GET', path, None, None) for path in PAGES]
+    results = {}
+    for label, flag in (('before (render per request)', '0'), ('after (page cache)', '1')):
+        with gunicorn(env={'PAGE_CACHE': flag}) as base_url:
+            run_load(base_url, requests, duration=1.0, concurrency=args.concurrency)
+            results[label] = run_load(base_url, requests, args.duration, args.concurrency)
+
+    print(f"{'mode':<30}{'req/s':>10}{'p50 ms':>10}{'p99 ms':>10}")
+    for label, stats in results.items():
+        print(f"{label:<30}{stats['rps']:>10.1f}{stats['p50_ms']:>10.2f}{stats['p99_ms']:>10.2f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,83 @@
+"""
+Cost of profiling a serving worker
+Loads one gthread worker with and without /debug/profile sampling it and
+reports the change in throughput and latency, plus the overhead the sampler
+measured itself. Exits non-zero when throughput drops more than --max-drop.
+Usage: python -m bench.bench_profiler [--duration 5] [--route demo] [--max-drop 5]
+"""
+
+import argparse
+import json
+import sys
+import time
+import urllib.error
+import urllib.request
+
+from bench.loadgen import run_load
+from bench.run import ROUTES
+from bench.server import gunicorn
+
+TOKEN = 'bench-profiler'
+ENV = {'WORKER_CLASS': 'gthread', 'WORKERS': '1', 'DEBUG_TOKEN': TOKEN}
+
+
+def get(url: str):
+    request = urllib.request.Request(url, headers={'Authorization': 'Bearer ' + TOKEN})
+    return urllib.request.urlopen(request, timeout=30)
+
+
+def start_profile(base_url: str, seconds: float) -> str:
+    """Start a background profile; returns the URL its result is served at"""
+    with get(f'{base_url}/debug/profile?seconds={seconds}') as response:
+        return base_url + json.load(response)['url']
+
+
+def profile_result(url: str) -> dict:
+    deadline = time.monotonic() + 30
+    while True:
+        try:
+            response = get(url)
+            break
+        except urllib.error.HTTPError as error:
+            if error.code != 404 or time.monotonic() > deadline:
+                raise
+            time.sleep(0.1)
+    with response:
+        return {'samples': int(response.headers['X-Profile-Samples']),
+                'overhead': float(response.headers['X-Profile-Overhead']),
+                'stacks': len(response.read().splitlines())}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--duration', type=float, default=5.0)
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--route', default='demo', choices=sorted(ROUTES))
+    parser.add_argument('--max-drop', type=float, default=5.0,
+                        help='allowed throughput drop in percent (default 5)')
+    args = parser.parse_args()
+    requests = [ROUTES[args.route]]
+
+    env = dict(ENV, THREADS=str(args.concurrency))
+    with gunicorn(env) as base_url:
+        run_load(base_url, requests, duration=1.0, concurrency=args.concurrency)
+        baseline = run_load(base_url, requests, args.duration, args.concurrency)
+        url = start_profile(base_url, args.duration + 1)
+        profiled = run_load(base_url, requests, args.duration, args.concurrency)
+        sampled = profile_result(url)
+
+    drop = (baseline['rps'] - profiled['rps']) / baseline['rps'] * 100
+    print(f'{"":<12}{"req/s":>10}{"p50 ms":>10}{"p99 ms":>10}')
+    for name, stats in (('baseline', baseline), ('profiling', profiled)):
+        print(f'{name:<12}{stats["rps"]:>10.0f}{stats["p50_ms"]:>10.2f}{stats["p99_ms"]:>10.2f}')
+    print(f'throughput change: {-drop:+.1f}%')
+    print(f'sampler: {sampled["samples"]} samples, {sampled["stacks"]} stacks, '
+          f'{sampled["overhead"] * 100:.2f}% self-measured overhead')
+    if drop > args.max_drop:
+        print(f'profiling costs more than {args.max_drop}% throughput', file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
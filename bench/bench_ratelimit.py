@@ -0,0 +1,35 @@
+"""
+Cost of the rate limiter's fast path (a client under its limit)
+Usage: python -m bench.bench_ratelimit [--iterations 200000]
+"""
+
+import argparse
+import os
+import tempfile
+import time
+
+from src.ratelimit import BucketTable
+
+
+def measure(table: BucketTable, iterations: int) -> float:
+    take = table.take
+    start = time.perf_counter_ns()
+    for i in range(iterations):
+        take('ip:10.0.%d.%d' % (i >> 8 & 255, i & 255), 1e9, 1000000000)
+    return (time.perf_counter_ns() - start) / iterations / 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--iterations', type=int, default=200000)
+    args = parser.parse_args()
+
+    print(f'in-process table:      {measure(BucketTable(), args.iterations):.2f} us per request')
+    with tempfile.TemporaryDirectory() as tmp:
+        shared = BucketTable(os.path.join(tmp, 'buckets'))
+        print(f'shared (file, locked): {measure(shared, args.iterations):.2f} us per request')
+        shared.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,58 @@
+"""
+Guide search: index build time, index size and per-query latency
+Usage: python -m bench.bench_search [--iterations 2000] [--target-ms 1]
+"""
+
+import argparse
+import sys
+import time
+
+from src.app import guide_bundle, pages
+from src.search import SearchIndex
+
+QUERIES = ('docker', 'ssh key', 'dock*', '"docker compose"', '"security group"',
+           'prometheus grafana', 'calculate', 'kubernetes')
+
+
+def build_index() -> SearchIndex:
+    index = SearchIndex()
+    for guide in guide_bundle.guides:
+        full = pages.get(guide['slug'] + '/all')
+        index.add_page(guide['path'], bytes(full.body).decode('utf-8'))
+    index.add_page('/demo', pages.get('demo').body.decode('utf-8'))
+    return index.build()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--iterations', type=int, default=2000)
+    parser.add_argument('--target-ms', type=float, default=1.0)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    index = build_index()
+    build_ms = (time.perf_counter() - start) * 1000
+    stats = index.stats()
+    print(f"index: {stats['sections']} sections, {stats['terms']} terms, "
+          f"{stats['postings']} postings, {stats['bytes'] / 1024:.1f} KiB serialized, "
+          f'built in {build_ms:.1f} ms')
+
+    print(f"{'query':<22}{'hits':>6}{'p50 ms':>10}{'p99 ms':>10}")
+    worst = 0.0
+    for query in QUERIES:
+        timings = []
+        for _ in range(args.iterations):
+            start = time.perf_counter_ns()
+            results = index.search(query)
+            timings.append(time.perf_counter_ns() - start)
+        timings.sort()
+        p50 = timings[len(timings) // 2] / 1e6
+        p99 = timings[int(len(timings) * 0.99)] / 1e6
+        worst = max(worst, p50)
+        print(f'{query:<22}{len(results):>6}{p50:>10.3f}{p99:>10.3f}')
+    if worst > args.target_ms:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,45 @@
+"""
+First-load cost of lazily loaded guide pages
+Compares each guide's shell page (/<guide>: first steps plus the outline)
+with the whole guide (/<guide>/all): bytes per encoding, then req/s and
+latency of both under gunicorn.
+Usage: python -m bench.bench_sections [--duration 3] [--concurrency 8]
+"""
+
+import argparse
+
+from bench.loadgen import run_load
+from bench.server import gunicorn
+from src.app import guide_bundle, pages
+from src.compression import ENCODINGS
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--duration', type=float, default=3.0)
+    parser.add_argument('--concurrency', type=int, default=8)
+    args = parser.parse_args()
+
+    encodings = ('identity',) + tuple(e for e in ENCODINGS if e in pages.get('demo').variants)
+    print(f'{"guide":<14}' + ''.join(f'{e + " shell/full":>22}' for e in encodings))
+    for guide in guide_bundle.guides:
+        shell, full = pages.get(guide['slug']), pages.get(guide['slug'] + '/all')
+        print(f'{guide["slug"]:<14}' + ''.join(
+            f'{len(shell.variants[e].body):>11}/{len(full.variants[e].body):<6}'
+            f'{len(shell.variants[e].body) / len(full.variants[e].body):>4.0%}'
+            for e in encodings))
+
+    print(f'\n{"route":<14}{"req/s":>10}{"p50 ms":>10}{"p99 ms":>10}{"bytes/req":>12}')
+    headers = {'Accept-Encoding': 'gzip'}
+    with gunicorn() as base_url:
+        for name, suffix in (('shell', ''), ('full', '/all')):
+            requests = [('GET', guide['path'] + suffix, None, headers)
+                        for guide in guide_bundle.guides]
+            stats = run_load(base_url, requests, args.duration, args.concurrency)
+            print(f'{name:<14}{stats["rps"]:>10.1f}{stats["p50_ms"]:>10.2f}'
+                  f'{stats["p99_ms"]:>10.2f}{stats["bytes"] / max(stats["requests"], 1):>12.0f}')
+
+
+if __name__ == '__main__':
+    main()
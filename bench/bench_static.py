@@ -0,0 +1,52 @@
+"""
+Guide pages from the Flask page cache versus the static-site export
+Freezes the site to a temporary directory, then serves the guide routes
+under gunicorn from the page cache and from the export (STATIC_SITE_DIR,
+sent with sendfile). Reports req/s, latency and worker CPU per request.
+Usage: python -m bench.bench_static [--duration 5] [--concurrency 8]
+"""
+
+import argparse
+import shutil
+import tempfile
+
+from bench.bench_ingest import measure
+from bench.loadgen import run_load
+from bench.server import gunicorn_process
+from src.app import app
+from src.blueprints.guides import frozen_routes
+from src.export import freeze
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--duration', type=float, default=5.0)
+    parser.add_argument('--concurrency', type=int, default=8)
+    args = parser.parse_args()
+
+    directory = tempfile.mkdtemp(prefix='deployhub-site-')
+    try:
+        routes = frozen_routes(app)
+        freeze(directory, routes)
+        cases = {}
+        for accept in ('identity', 'gzip'):
+            cases[accept] = [('GET', url, None, {'Accept-Encoding': accept})
+                             for url, _, _ in routes if not url.startswith('/static/')]
+        print(f'{"served by":<12}{"encoding":<10}{"req/s":>10}{"p50 ms":>10}{"p99 ms":>10}'
+              f'{"cpu ms/req":>12}')
+        for label, env in (('flask', {}), ('export', {'STATIC_SITE_DIR': directory})):
+            with gunicorn_process(env) as (base_url, proc):
+                run_load(base_url, cases['gzip'], duration=1.0, concurrency=args.concurrency)
+                for accept, requests in cases.items():
+                    stats = measure(base_url, proc.pid, requests, args.duration,
+                                    args.concurrency)
+                    print(f'{label:<12}{accept:<10}{stats["rps"]:>10.1f}'
+                          f'{stats["p50_ms"]:>10.2f}{stats["p99_ms"]:>10.2f}'
+                          f'{stats["cpu_ms_per_request"]:>12.3f}')
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
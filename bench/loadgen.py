@@ -0,0 +1,68 @@
+"""Minimal closed-loop HTTP load generator (stdlib only)"""
+
+import http.client
+import threading
+import time
+from urllib.parse import urlsplit
+
+
+def percentile(samples, pct: float) -> float:
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, int(round(pct / 100.0 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def run_load(base_url: str, requests, duration: float = 5.0, concurrency: int = 8):
+    """Drive ``requests`` (list of (method, path, body, headers)) round-robin
+
+    Returns a dict with rps, latency percentiles (ms), bytes received and errors.
+    """
+    parts = urlsplit(base_url)
+    latencies = []
+    counters = {'errors': 0, 'bytes': 0}
+    lock = threading.Lock()
+    deadline = time.monotonic() + duration
+
+    def worker(offset):
+        local, errors, received = [], 0, 0
+        i = offset
+        while time.monotonic() < deadline:
+            method, path, body, headers = requests[i % len(requests)]
+            i += 1
+            conn = http.client.HTTPConnection(parts.hostname, parts.port, timeout=30)
+            start = time.perf_counter()
+            try:
+                conn.request(method, path, body=body, headers=headers or {})
+                response = conn.getresponse()
+                received += len(response.read())
+                if response.status >= 500:
+                    errors += 1
+            except OSError:
+                errors += 1
+            finally:
+                conn.close()
+            local.append(time.perf_counter() - start)
+        with lock:
+            latencies.extend(local)
+            counters['errors'] += errors
+            counters['bytes'] += received
+
+    threads = [threading.Thread(target=worker, args=(n,)) for n in range(concurrency)]
+    started = time.monotonic()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.monotonic() - started
+
+    return {
+        'requests': len(latencies),
+        'rps': len(latencies) / elapsed if elapsed else 0.0,
+        'p50_ms': percentile(latencies, 50) * 1000,
+        'p95_ms': percentile(latencies, 95) * 1000,
+        'p99_ms': percentile(latencies, 99) * 1000,
+        'bytes': counters['bytes'],
+        'errors': counters['errors'],
+    }
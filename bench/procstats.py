@@ -0,0 +1,45 @@
+"""CPU and memory of a gunicorn process tree, read from /proc (Linux only)"""
+
+import os
+
+CLOCK_TICKS = os.sysconf('SC_CLK_TCK')
+PAGE_SIZE = os.sysconf('SC_PAGE_SIZE')
+
+
+def process_tree(pid: int) -> list:
+    """``pid`` plus all of its descendants"""
+    pids, pending = [], [pid]
+    while pending:
+        current = pending.pop()
+        pids.append(current)
+        try:
+            with open(f'/proc/{current}/task/{current}/children') as fh:
+                pending.extend(int(child) for child in fh.read().split())
+        except OSError:
+            pass
+    return pids
+
+
+def cpu_seconds(pids) -> float:
+    """User + system CPU time consumed so far by ``pids``"""
+    total = 0
+    for pid in pids:
+        try:
+            with open(f'/proc/{pid}/stat') as fh:
+                fields = fh.read().rsplit(')', 1)[1].split()
+        except OSError:
+            continue
+        total += int(fields[11]) + int(fields[12])  # utime, stime
+    return total / CLOCK_TICKS
+
+
+def rss_bytes(pids) -> int:
+    """Resident set size summed over ``pids``"""
+    total = 0
+    for pid in pids:
+        try:
+            with open(f'/proc/{pid}/statm') as fh:
+                total += int(fh.read().split()[1]) * PAGE_SIZE
+        except OSError:
+            continue
+    return total
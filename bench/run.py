@@ -0,0 +1,112 @@
+"""
+Load-test every route under the Dockerfile's gunicorn config
+Usage:
+  python -m bench.run [--duration 5] [--concurrency 8] [--routes health,aws]
+                      [--save results.json] [--baseline baseline.json] [--threshold 10]
+
+Reports req/s, p50/p95/p99 latency and per-request CPU and memory for each
+route, optionally saves the results as a JSON baseline, and exits non-zero
+when a route regresses past ``--threshold`` percent against ``--baseline``.
+"""
+
+import argparse
+import json
+import platform
+import sys
+import time
+
+from bench.loadgen import run_load
+from bench.procstats import cpu_seconds, process_tree, rss_bytes
+from bench.server import gunicorn_process
+
+CALCULATE = json.dumps({'a': 5, 'b': 7})
+ROUTES = {
+    'home': ('GET', '/', None, None),
+    'aws': ('GET', '/aws', None, None),
+    'digitalocean': ('GET', '/digitalocean', None, None),
+    'docker': ('GET', '/docker', None, None),
+    'cicd': ('GET', '/cicd', None, None),
+    'monitoring': ('GET', '/monitoring', None, None),
+    'demo': ('GET', '/demo', None, None),
+    'health': ('GET', '/health', None, None),
+    'metrics': ('GET', '/metrics', None, None),
+    'search': ('GET', '/api/search?q=docker+compose', None, None),
+    'api_calculate': ('POST', '/api/calculate', CALCULATE, {'Content-Type': 'application/json'}),
+}
+# Regressions are checked on these keys: (name, True if higher is better)
+CHECKS = (('rps', True), ('p99_ms', False), ('cpu_ms_per_request', False))
+
+
+def bench_route(base_url, pids, request, duration, concurrency) -> dict:
+    run_load(base_url, [request], duration=min(1.0, duration), concurrency=concurrency)
+    cpu_before = cpu_seconds(pids)
+    stats = run_load(base_url, [request], duration, concurrency)
+    cpu_used = cpu_seconds(pids) - cpu_before
+    stats['cpu_ms_per_request'] = cpu_used * 1000 / max(stats['requests'], 1)
+    stats['rss_mb'] = rss_bytes(pids) / 2 ** 20
+    return stats
+
+
+def compare(results: dict, baseline: dict, threshold: float) -> list:
+    """Return a message for every metric worse than baseline by > threshold %"""
+    regressions = []
+    for route, stats in results['routes'].items():
+        base = baseline.get('routes', {}).get(route)
+        if not base:
+            continue
+        for key, higher_is_better in CHECKS:
+            old, new = base.get(key), stats.get(key)
+            if not old or new is None:
+                continue
+            change = (new - old) / old * 100
+            if (-change if higher_is_better else change) > threshold:
+                regressions.append(f'{route}: {key} {old:.2f} -> {new:.2f} ({change:+.1f}%)')
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--duration', type=float, default=5.0)
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--routes', default=','.join(ROUTES))
+    parser.add_argument('--save', help='write results to this JSON file')
+    parser.add_argument('--baseline', help='compare against this JSON file')
+    parser.add_argument('--threshold', type=float, default=10.0,
+                        help='allowed regression in percent (default 10)')
+    args = parser.parse_args()
+
+    results = {
+        'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'python': platform.python_version(),
+        'machine': platform.machine(),
+        'duration': args.duration,
+        'concurrency': args.concurrency,
+        'routes': {},
+    }
+    print(f"{'route':<15}{'req/s':>9}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}"
+          f"{'cpu ms/req':>12}{'rss MB':>9}{'errors':>8}")
+    with gunicorn_process() as (base_url, proc):
+        for route in args.routes.split(','):
+            # Resolved per route, in case a worker was replaced in between
+            pids = process_tree(proc.pid)
+            stats = bench_route(base_url, pids, ROUTES[route], args.duration, args.concurrency)
+            results['routes'][route] = stats
+            print(f"{route:<15}{stats['rps']:>9.1f}{stats['p50_ms']:>9.2f}{stats['p95_ms']:>9.2f}"
+                  f"{stats['p99_ms']:>9.2f}{stats['cpu_ms_per_request']:>12.3f}"
+                  f"{stats['rss_mb']:>9.1f}{stats['errors']:>8}")
+
+    if args.save:
+        with open(args.save, 'w') as fh:
+            json.dump(results, fh, indent=2, sort_keys=True)
+    if args.baseline:
+        with open(args.baseline) as fh:
+            regressions = compare(results, json.load(fh), args.threshold)
+        for message in regressions:
+            print('REGRESSION', message)
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,69 @@
+"""Start the app under the Dockerfile's gunicorn configuration for benchmarks"""
+
+import os
+import socket
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+from contextlib import contextmanager
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Mirrors the CMD in the Dockerfile
+GUNICORN_ARGS = ['-c', 'gunicorn.conf.py']
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def wait_ready(url: str, timeout: float = 15.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            urllib.request.urlopen(url, timeout=1).read()
+            return
+        except OSError:
+            time.sleep(0.1)
+    raise RuntimeError(f'server at {url} did not become ready')
+
+
+@contextmanager
+def gunicorn_process(env=None, args=None):
+    """Run gunicorn in a subprocess and yield ``(base_url, process)``"""
+    port = free_port()
+    cmd = [sys.executable, '-m', 'gunicorn', '--bind', f'127.0.0.1:{port}',
+           '--log-level', 'warning'] + (args or GUNICORN_ARGS)
+    # A metrics directory removed afterwards, rather than one left behind per port
+    metrics_dir = tempfile.mkdtemp(prefix='deployhub-bench-metrics-')
+    # Load generators would otherwise be throttled like one abusive client;
+    # a huge limit keeps the limiter's fast path in the measurement.
+    # Worker recycling is off too: a replaced worker would drop out of the
+    # process tree whose CPU time and RSS a benchmark reads
+    proc_env = dict(os.environ, RATELIMIT_RATE='1e9', RATELIMIT_BURST='1000000000',
+                    MAX_REQUESTS='0')
+    proc_env.update(env or {})
+    if proc_env.get('METRICS_MULTIPROC', '1') != '0':
+        proc_env.setdefault('PROMETHEUS_MULTIPROC_DIR', metrics_dir)
+    proc = subprocess.Popen(cmd, cwd=ROOT, env=proc_env,
+                            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    base_url = f'http://127.0.0.1:{port}'
+    try:
+        wait_ready(base_url + '/health')
+        yield base_url, proc
+    finally:
+        proc.terminate()
+        proc.wait(timeout=30)
+        shutil.rmtree(metrics_dir, ignore_errors=True)
+
+
+@contextmanager
+def gunicorn(env=None, args=None):
+    """Run gunicorn in a subprocess and yield its base URL"""
+    with gunicorn_process(env, args) as (base_url, _):
+        yield base_url
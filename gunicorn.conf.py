@@ -0,0 +1,134 @@
+"""
+Gunicorn configuration for DeployHub
+WORKER_CLASS selects how requests are served:
+  sync     - one request per worker (default)
+  gthread  - THREADS requests per worker on a thread pool
+  gevent   - WORKER_CONNECTIONS greenlets per worker (pip install gevent)
+  uvicorn  - ASGI event loop via src.asgi:app (pip install uvicorn)
+
+With more than one worker, Prometheus metrics are aggregated across workers
+through PROMETHEUS_MULTIPROC_DIR (set METRICS_MULTIPROC=0 to disable).
+METRICS_PORT serves /metrics on its own port (from the master when metrics
+are multiprocess, otherwise from the single worker; several workers with
+METRICS_MULTIPROC=0 can't share the port) so scrapes never occupy a worker
+serving user traffic. Rate-limit buckets are shared through the
+RATELIMIT_STORAGE file (by default in a private per-master temporary
+directory). Sending
+SIGUSR2 to a worker profiles it (see src/profiler.py).
+
+The app is preloaded: the master builds it once and forks workers that
+share its memory (see src/preload.py; PRELOAD=0 loads it in each worker).
+Workers are recycled after MAX_REQUESTS requests, plus up to
+MAX_REQUESTS_JITTER so they don't all restart at once.
+"""
+
+import os
+import re
+import shutil
+import tempfile
+
+WORKER_CLASSES = {
+    'sync': 'sync',
+    'gthread': 'gthread',
+    'gevent': 'gevent',
+    'uvicorn': 'uvicorn.workers.UvicornWorker',
+}
+
+_worker = os.environ.get('WORKER_CLASS', 'sync')
+if _worker not in WORKER_CLASSES:
+    raise RuntimeError('WORKER_CLASS must be one of: %s' % ', '.join(WORKER_CLASSES))
+
+bind = os.environ.get('BIND', '0.0.0.0:5000')
+workers = int(os.environ.get('WORKERS', '2'))
+timeout = int(os.environ.get('TIMEOUT', '60'))
+worker_class = WORKER_CLASSES[_worker]
+threads = int(os.environ.get('THREADS', '8')) if _worker == 'gthread' else 1
+worker_connections = int(os.environ.get('WORKER_CONNECTIONS', '1000'))
+wsgi_app = 'src.asgi:app' if _worker == 'uvicorn' else 'src.app:app'
+# gevent must patch the standard library before the app is imported, so it
+# loads the app in each worker by default
+preload_app = os.environ.get('PRELOAD', '0' if _worker == 'gevent' else '1') != '0'
+max_requests = int(os.environ.get('MAX_REQUESTS', '10000'))
+max_requests_jitter = int(os.environ.get('MAX_REQUESTS_JITTER', str(max_requests // 10)))
+
+# Multiprocess metrics: must be in the environment before workers import the app
+if workers > 1 and os.environ.get('METRICS_MULTIPROC', '1') != '0':
+    # One directory per user and bind address, so instances on a host don't
+    # clear each other's files
+    os.environ.setdefault('PROMETHEUS_MULTIPROC_DIR', os.path.join(
+        tempfile.gettempdir(),
+        'deployhub-metrics-%d-%s' % (os.getuid(), re.sub(r'[^\w.-]', '_', bind))))
+    # Cleared here, before a preloaded app opens its files in it; a reload of
+    # this file (SIGHUP) keeps the running workers' files
+    if os.environ.get('DEPLOYHUB_METRICS_OWNER') != str(os.getpid()):
+        from src.multiproc import reset_directory
+        reset_directory(os.environ['PROMETHEUS_MULTIPROC_DIR'])
+        os.environ['DEPLOYHUB_METRICS_OWNER'] = str(os.getpid())
+
+# Without shared metrics each worker would try to serve METRICS_PORT
+if workers > 1 and os.environ.get('METRICS_PORT') \
+        and not os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+    raise RuntimeError('METRICS_PORT with WORKERS > 1 needs multiprocess metrics: '
+                       'unset METRICS_MULTIPROC=0 or METRICS_PORT')
+
+# Rate-limit buckets must be shared too, or each worker would allow the full rate.
+# The file goes in a fresh 0700 directory: a predictable name in the shared temp
+# directory could be planted (or symlinked) by another local user first
+_ratelimit_dir = None
+if workers > 1 and not os.environ.get('RATELIMIT_STORAGE'):
+    _ratelimit_dir = tempfile.mkdtemp(prefix='deployhub-ratelimit-')
+    os.environ['RATELIMIT_STORAGE'] = os.path.join(_ratelimit_dir, 'buckets')
+
+
+def _serve_metrics(path):
+    from src.exposition import Exposition
+    ttl = float(os.environ.get('METRICS_CACHE_TTL', '1.0'))
+    Exposition(ttl=ttl, path=path).serve(int(os.environ['METRICS_PORT']))
+
+
+def when_ready(server):
+    path = os.environ.get('PROMETHEUS_MULTIPROC_DIR')
+    if preload_app:
+        from src.app import app
+        from src.preload import prepare
+        prepare(app)
+        if path:
+            # Loading the app set live gauges in the master; only workers report them
+            from prometheus_client.multiprocess import mark_process_dead
+            mark_process_dead(os.getpid(), path)
+    if os.environ.get('METRICS_PORT') and path:
+        _serve_metrics(path)
+
+
+def pre_fork(server, worker):
+    if preload_app:
+        from src.preload import before_fork
+        before_fork()
+
+
+def post_fork(server, worker):
+    if preload_app:
+        from src.app import app
+        from src.preload import after_fork
+        after_fork(app)
+
+
+def post_worker_init(worker):
+    if os.environ.get('METRICS_PORT') and not os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+        _serve_metrics(None)
+    # SIGUSR2 to a worker writes a profile to PROFILE_DIR (see src/profiler.py)
+    profiler = getattr(worker.wsgi, 'extensions', {}).get('profiler')
+    if profiler is not None:
+        profiler.install_signal_handler()
+
+
+def on_exit(server):
+    if _ratelimit_dir:
+        shutil.rmtree(_ratelimit_dir, ignore_errors=True)
+
+
+def child_exit(server, worker):
+    path = os.environ.get('PROMETHEUS_MULTIPROC_DIR')
+    if path:
+        from src.multiproc import worker_exited
+        worker_exited(worker.pid, path)
@@ -0,0 +1,12 @@
+#!/bin/bash
+# Container health probe that needs neither curl nor a Python interpreter:
+# bash's /dev/tcp sends the request and the status line decides the result.
+# Usage: healthcheck.sh [path] [port]   (defaults: /livez, port from BIND)
+path=${1:-/livez}
+bind=${BIND:-0.0.0.0:5000}
+port=${2:-${bind##*:}}
+
+exec 3<>"/dev/tcp/127.0.0.1/$port" || exit 1
+printf 'GET %s HTTP/1.0\r\nHost: localhost\r\n\r\n' "$path" >&3
+read -r -t "${PROBE_TIMEOUT:-5}" _ status _ <&3 || exit 1
+[ "$status" = 200 ]
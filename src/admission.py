@@ -0,0 +1,135 @@
+"""
+Adaptive concurrency limiting and load shedding
+Requests beyond the current concurrency limit are rejected at once with a
+503 instead of queueing until the worker timeout. The limit adapts to
+observed latency (AIMD). Health checks and scrapes are always admitted.
+"""
+
+import json
+import math
+import threading
+import time
+from time import perf_counter
+
+from .metrics import CONCURRENCY_LIMIT, REQUESTS_SHED
+
+SHED_BODY = json.dumps({'error': 'Server overloaded'}).encode('utf-8')
+SHED_HEADERS = [('Content-Type', 'application/json'), ('Content-Length', str(len(SHED_BODY))),
+                ('Retry-After', '1')]
+PRIORITY_PATHS = ('/health', '/livez', '/readyz', '/metrics')
+
+
+class AIMDLimit:
+    """Additive-increase / multiplicative-decrease concurrency limit
+
+    A request finishing within ``target`` seconds while at least half the
+    limit is in use raises the limit by ``1 / limit`` (about +1 per round of
+    requests); a slower one cuts it by ``backoff``, at most once per
+    ``target`` interval so one burst of slow requests counts as one signal.
+    """
+
+    def __init__(self, initial: float = 20, min_limit: int = 1, max_limit: int = 100,
+                 target: float = 0.25, backoff: float = 0.9):
+        self.limit = float(min(max(initial, min_limit), max_limit))
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.target = target
+        self.backoff = backoff
+        self._last_drop = 0.0
+
+    def on_sample(self, latency: float, in_flight: int, now: float):
+        if latency > self.target:
+            if now - self._last_drop >= self.target:
+                self._last_drop = now
+                self.limit = max(self.min_limit, self.limit * self.backoff)
+        elif in_flight * 2 >= self.limit:
+            self.limit = min(self.max_limit, self.limit + 1 / self.limit)
+
+
+def queue_time(header: str, now: float) -> float:
+    """Seconds since a proxy's ``X-Request-Start`` (``t=`` in s, ms or us)"""
+    try:
+        started = float(header.strip().lstrip('t='))
+    except ValueError:
+        return 0.0
+    if started > 1e14:
+        started /= 1e6
+    elif started > 1e11:
+        started /= 1e3
+    return max(0.0, now - started)
+
+
+class AdmissionControl:
+    """WSGI middleware admitting up to ``limit`` concurrent requests
+
+    With sync workers a process only ever has one request in flight, so
+    the backlog is invisible to it; behind a proxy that sets
+    ``X-Request-Start`` (nginx: ``t=${msec}``) requests that already waited
+    longer than ``ADMISSION_MAX_QUEUE_MS`` are shed as well.
+    """
+
+    def __init__(self, app=None):
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        config = app.config
+        config.setdefault('ADMISSION_INITIAL_LIMIT', 20)
+        config.setdefault('ADMISSION_MAX_LIMIT', 100)
+        config.setdefault('ADMISSION_TARGET_MS', 250.0)
+        config.setdefault('ADMISSION_MAX_QUEUE_MS', 1000.0)
+        config.setdefault('ADMISSION_PRIORITY_PATHS', PRIORITY_PATHS)
+        self.limit = AIMDLimit(initial=config['ADMISSION_INITIAL_LIMIT'],
+                               max_limit=config['ADMISSION_MAX_LIMIT'],
+                               target=config['ADMISSION_TARGET_MS'] / 1000)
+        self.max_queue = config['ADMISSION_MAX_QUEUE_MS'] / 1000
+        self.priority = frozenset(config['ADMISSION_PRIORITY_PATHS'])
+        self.in_flight = 0
+        self.shed = 0
+        self._lock = threading.Lock()
+        self._shed_limit = REQUESTS_SHED.labels(reason='limit').inc
+        self._shed_queue = REQUESTS_SHED.labels(reason='queue').inc
+        self._reported = math.floor(self.limit.limit)
+        self.publish()
+        self.wsgi_app = app.wsgi_app
+        app.wsgi_app = self
+        app.extensions['admission'] = self
+
+    def publish(self):
+        """Set the limit gauge; a worker forked from a preloaded master calls it again"""
+        CONCURRENCY_LIMIT.set(self._reported)
+
+    def _shed(self, start_response, count):
+        self.shed += 1
+        count()
+        start_response('503 Service Unavailable', list(SHED_HEADERS))
+        return [SHED_BODY]
+
+    def __call__(self, environ, start_response):
+        if environ.get('PATH_INFO') in self.priority:
+            return self.wsgi_app(environ, start_response)
+        request_start = environ.get('HTTP_X_REQUEST_START')
+        if request_start and queue_time(request_start, time.time()) > self.max_queue:
+            return self._shed(start_response, self._shed_queue)
+        with self._lock:
+            if self.in_flight >= int(self.limit.limit):
+                admitted = False
+            else:
+                admitted = True
+                self.in_flight += 1
+                in_flight = self.in_flight
+        if not admitted:
+            return self._shed(start_response, self._shed_limit)
+
+        start = perf_counter()
+        try:
+            return self.wsgi_app(environ, start_response)
+        finally:
+            end = perf_counter()
+            with self._lock:
+                self.in_flight -= 1
+                self.limit.on_sample(end - start, in_flight, end)
+                current = math.floor(self.limit.limit)
+            if current != self._reported:
+                self._reported = current
+                CONCURRENCY_LIMIT.set(current)
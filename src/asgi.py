@@ -0,0 +1,167 @@
+"""
+ASGI entry point for DeployHub
+Serves the same Flask app (routes, before/after_request hooks and metrics)
+from an event loop, e.g. ``gunicorn -k uvicorn.workers.UvicornWorker src.asgi:app``
+Request bodies are not buffered: ``wsgi.input`` receives them from the
+event loop as the app reads, so the body limits (src/ingest.py) stop
+reading an oversized body just as they do under the WSGI servers.
+"""
+
+import asyncio
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+from .app import app as wsgi_app
+
+
+class ReceiveStream:
+    """``wsgi.input`` that receives the ASGI request body on demand
+
+    Read from the thread running the app; each ``http.request`` message is
+    awaited on the event loop only when the buffered bytes run out.
+    """
+
+    def __init__(self, receive, loop):
+        self._receive = receive
+        self._loop = loop
+        self._buffer = b''
+        self._more = True
+
+    def _pull(self) -> bool:
+        if not self._more:
+            return False
+        message = asyncio.run_coroutine_threadsafe(self._receive(), self._loop).result()
+        if message['type'] == 'http.disconnect':
+            self._more = False
+            return False
+        self._buffer += message.get('body', b'')
+        self._more = message.get('more_body', False)
+        return True
+
+    def _take(self, size: int) -> bytes:
+        data, self._buffer = self._buffer[:size], self._buffer[size:]
+        return data
+
+    def read(self, size: int = -1) -> bytes:
+        if size is None or size < 0:
+            while self._pull():
+                pass
+            return self._take(len(self._buffer))
+        while len(self._buffer) < size and self._pull():
+            pass
+        return self._take(size)
+
+    def readline(self, size: int = -1) -> bytes:
+        while b'\n' not in self._buffer and self._pull():
+            pass
+        end = self._buffer.find(b'\n') + 1 or len(self._buffer)
+        return self._take(end if size is None or size < 0 else min(end, size))
+
+    def __iter__(self):
+        return iter(self.readline, b'')
+
+
+def build_environ(scope: dict, stream) -> dict:
+    """Translate an ASGI HTTP scope into a WSGI environ reading ``stream``"""
+    server = scope.get('server') or ('localhost', 80)
+    client = scope.get('client') or ('', 0)
+    environ = {
+        'REQUEST_METHOD': scope['method'],
+        'SCRIPT_NAME': scope.get('root_path', '').encode('utf-8').decode('latin-1'),
+        'PATH_INFO': scope['path'].encode('utf-8').decode('latin-1'),
+        'QUERY_STRING': scope.get('query_string', b'').decode('latin-1'),
+        'SERVER_NAME': server[0],
+        'SERVER_PORT': str(server[1] or 80),
+        'SERVER_PROTOCOL': 'HTTP/%s' % scope.get('http_version', '1.1'),
+        'REMOTE_ADDR': client[0],
+        'REMOTE_PORT': str(client[1]),
+        'wsgi.version': (1, 0),
+        'wsgi.url_scheme': scope.get('scheme', 'http'),
+        'wsgi.input': stream,
+        # The stream ends with the last http.request message, so Werkzeug may
+        # read bodies without a Content-Length (chunked uploads)
+        'wsgi.input_terminated': True,
+        'wsgi.errors': sys.stderr,
+        'wsgi.multithread': True,
+        'wsgi.multiprocess': True,
+        'wsgi.run_once': False,
+    }
+    for raw_name, raw_value in scope.get('headers', []):
+        name = raw_name.decode('latin-1').upper().replace('-', '_')
+        value = raw_value.decode('latin-1')
+        if name == 'CONTENT_TYPE' or name == 'CONTENT_LENGTH':
+            key = name
+        else:
+            key = 'HTTP_' + name
+        environ[key] = environ[key] + ',' + value if key in environ else value
+    return environ
+
+
+class WsgiToAsgi:
+    """Run a WSGI app on a bounded thread pool behind an ASGI interface
+
+    Responses are sent on the event loop; request bodies are received on it
+    as the app reads them, so a body the app rejects is never read in full.
+    """
+
+    def __init__(self, wsgi_app, max_threads: int = None):
+        self.wsgi_app = wsgi_app
+        self.executor = ThreadPoolExecutor(max_workers=max_threads,
+                                           thread_name_prefix='asgi')
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            await self._lifespan(receive, send)
+            return
+        if scope['type'] != 'http':
+            raise ValueError('unsupported ASGI scope type: %s' % scope['type'])
+        loop = asyncio.get_running_loop()
+        environ = build_environ(scope, ReceiveStream(receive, loop))
+        await loop.run_in_executor(self.executor, self._run, environ, send, loop)
+
+    async def _lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                self.executor.shutdown(wait=False)
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+    def _run(self, environ, send, loop):
+        state = {}
+
+        def push(message):
+            asyncio.run_coroutine_threadsafe(send(message), loop).result()
+
+        def start_response(status, headers, exc_info=None):
+            if exc_info and state.get('started'):
+                raise exc_info[1].with_traceback(exc_info[2])
+            state['start'] = {
+                'type': 'http.response.start',
+                'status': int(status.split(' ', 1)[0]),
+                'headers': [(name.lower().encode('latin-1'), value.encode('latin-1'))
+                            for name, value in headers],
+            }
+
+        def start():
+            if not state.get('started'):
+                state['started'] = True
+                push(state['start'])
+
+        result = self.wsgi_app(environ, start_response)
+        try:
+            for chunk in result:
+                if chunk:
+                    start()
+                    push({'type': 'http.response.body', 'body': chunk, 'more_body': True})
+            start()
+            push({'type': 'http.response.body', 'body': b'', 'more_body': False})
+        finally:
+            if hasattr(result, 'close'):
+                result.close()
+
+
+app = WsgiToAsgi(wsgi_app, max_threads=int(os.environ.get('ASGI_THREADS', '32')))
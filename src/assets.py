@@ -0,0 +1,103 @@
+"""
+Static asset pipeline
+Stylesheets are emitted as content-hashed files served with immutable caching
+"""
+
+import hashlib
+import os
+import re
+import time
+
+from flask import abort
+
+from .pages import Page, serve_page
+
+IMMUTABLE_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+CONTENT_TYPES = {
+    'css': 'text/css; charset=utf-8',
+    'js': 'application/javascript; charset=utf-8',
+}
+STYLE_BLOCK = re.compile(r'[ \t]*<style>(.*?)</style>', re.S)
+
+
+def fingerprint(name: str, body: bytes) -> str:
+    """``base.css`` -> ``base.<hash>.css``"""
+    stem, ext = name.rsplit('.', 1)
+    return '%s.%s.%s' % (stem, hashlib.sha256(body).hexdigest()[:12], ext)
+
+
+class AssetRegistry:
+    """Content-hashed static files, served from memory or written to disk"""
+
+    def __init__(self, app=None, url_prefix: str = '/static', last_modified: float = None):
+        self.url_prefix = url_prefix
+        self.last_modified = last_modified if last_modified is not None else time.time()
+        self._files = {}
+        self._urls = {}
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.add_url_rule(self.url_prefix + '/<path:filename>', 'static_asset', self.serve)
+        app.jinja_env.globals['asset_url'] = self.url
+        app.extensions['assets'] = self
+
+    def add(self, name: str, content) -> str:
+        """Register an asset under its logical name and return its URL"""
+        body = content.encode('utf-8') if isinstance(content, str) else content
+        filename = fingerprint(name, body)
+        if filename not in self._files:
+            content_type = CONTENT_TYPES.get(name.rsplit('.', 1)[-1], 'application/octet-stream')
+            self._files[filename] = Page(filename, body, filename, self.last_modified,
+                                         content_type)
+        url = self._urls[name] = '%s/%s' % (self.url_prefix, filename)
+        return url
+
+    def build_all(self):
+        """Compress every asset up front (e.g. in a preloading master)"""
+        for page in self._files.values():
+            page.variants  # compressed on first access
+
+    def routes(self) -> list:
+        """``(url, page)`` for every asset"""
+        return [('%s/%s' % (self.url_prefix, filename), page)
+                for filename, page in self._files.items()]
+
+    def url(self, name: str) -> str:
+        return self._urls[name]
+
+    def externalize_styles(self, page_name: str, html: str) -> str:
+        """Move inline ``<style>`` blocks into fingerprinted stylesheets"""
+        count = 0
+
+        def replace(match):
+            nonlocal count
+            count += 1
+            name = page_name if count == 1 else '%s-%d' % (page_name, count)
+            css = '\n'.join(line.strip() for line in match.group(1).strip().splitlines())
+            url = self.add(name + '.css', css + '\n')
+            return '    <link rel="stylesheet" href="%s">' % url
+
+        return STYLE_BLOCK.sub(replace, html)
+
+    def serve(self, filename: str):
+        page = self._files.get(filename)
+        if page is None:
+            abort(404)
+        return serve_page(page, IMMUTABLE_CACHE_CONTROL)
+
+    def write(self, directory: str) -> list:
+        """Write every asset (plus a .gz sibling) for nginx or a CDN"""
+        os.makedirs(directory, exist_ok=True)
+        written = []
+        for filename, page in self._files.items():
+            path = os.path.join(directory, filename)
+            with open(path, 'wb') as fh:
+                fh.write(page.body)
+            with open(path + '.gz', 'wb') as fh:
+                fh.write(page.variants['gzip'].body)
+            written.append(path)
+        return written
+
+    def __iter__(self):
+        return iter(self._files)
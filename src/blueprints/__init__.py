@@ -0,0 +1,12 @@
+"""
+Route groups for ``create_app``
+Each module defines a blueprint ``bp``; a module is imported only when its
+feature is enabled, so a disabled group costs nothing at startup.
+"""
+
+import importlib
+
+
+def load_blueprint(name: str):
+    """Import ``src.blueprints.<name>`` and return its blueprint"""
+    return importlib.import_module('.' + name, __name__).bp
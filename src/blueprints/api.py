@@ -0,0 +1,104 @@
+"""
+Calculator JSON API: /api/calculate (a sum or an expression) and
+/api/calculate/batch. Bodies are bounded by the body limits and calculations
+are rate limited (a batch by its item count), both installed when the
+blueprint is registered.
+"""
+
+import logging
+
+from flask import Blueprint, Response, current_app, g, jsonify, request
+
+from .. import expressions
+from ..calculator import CalculationError, calculate_batch, calculate_sum, parse_operands
+from ..ingest import NDJSON, BodyLimits, json_body
+from ..ratelimit import RateLimiter, limit
+from ..tracing import span
+
+logger = logging.getLogger(__name__)
+
+bp = Blueprint('api', __name__)
+
+
+@bp.record_once
+def setup(state):
+    RateLimiter(state.app)
+    BodyLimits(state.app)
+
+
+@bp.route('/api/calculate', methods=['POST'])
+@limit
+@json_body(max_bytes='CALCULATE_MAX_BYTES')
+def api_calculate():
+    data = g.json
+    try:
+        if isinstance(data, dict) and 'expression' in data:
+            expression, result = expressions.evaluate(data)
+            logger.info("Expression: %s = %s", expression, result)
+            with span('json.encode'):
+                return jsonify({'result': result, 'operation': expression})
+        a, b = parse_operands(data)
+        result = calculate_sum(a, b)
+        logger.info("Calculation: %d + %d = %d", a, b, result)
+        with span('json.encode'):
+            return jsonify({'result': result, 'operation': f'{a} + {b}'})
+    except CalculationError as e:
+        logger.error("Invalid input: %s", e)
+        return jsonify({'error': str(e)}), e.status
+    except Exception as e:
+        logger.error("Error: %s", e)
+        return jsonify({'error': 'Internal error'}), 500
+
+
+def _stream_batch(results, ndjson: bool, dumps, chunk_size: int = 256):
+    if not ndjson:
+        yield b'['
+    for start in range(0, len(results), chunk_size):
+        chunk = results[start:start + chunk_size]
+        if ndjson:
+            yield b''.join(dumps(item) + b'\n' for item in chunk)
+        else:
+            yield (b',' if start else b'') + b','.join(dumps(item) for item in chunk)
+    if not ndjson:
+        yield b']'
+
+
+def _decode_line(line: bytes):
+    try:
+        return current_app.json.loads(line)
+    except ValueError:
+        return CalculationError('Invalid input')
+
+
+def _batch_items():
+    """The batch's items (decoded once per request), or the non-list JSON body"""
+    if 'batch_items' not in g:
+        if request.mimetype == NDJSON:
+            g.batch_items = [_decode_line(line) for line in g.body.splitlines() if line.strip()]
+        else:
+            g.batch_items = g.json
+    return g.batch_items
+
+
+def _batch_cost() -> int:
+    """A token per item, so a batch costs its client what the single calls would"""
+    items = _batch_items()
+    return len(items) if isinstance(items, list) else 1
+
+
+@bp.route('/api/calculate/batch', methods=['POST'])
+@json_body(max_bytes='BATCH_MAX_BYTES', ndjson=True)
+@limit(cost=_batch_cost)
+def api_calculate_batch():
+    """Evaluate many {a, b} pairs (JSON array or NDJSON) in one request"""
+    ndjson = request.mimetype == NDJSON
+    items = _batch_items()
+    if not isinstance(items, list):
+        return jsonify({'error': 'Invalid input'}), 400
+    if len(items) > current_app.config['BATCH_MAX_ITEMS']:
+        return jsonify({'error': 'Batch too large'}), 413
+    results = calculate_batch(items)
+    logger.info("Batch calculation: %d items", len(results))
+    # The body is streamed after the app context is gone, so bind the encoder now
+    return Response(_stream_batch(results, ndjson, current_app.json.dumps_bytes),
+                    mimetype=NDJSON if ndjson else 'application/json')
@@ -0,0 +1,184 @@
+"""
+Guide site: the home and demo pages, one set of routes per bundled guide and
+guide search. Registering the blueprint loads the guide bundle and registers
+the pages; each page is rendered and compressed when first served and the
+search index is built on the first query.
+"""
+
+import logging
+import os
+import threading
+from functools import partial
+
+import click
+from flask import Blueprint, abort, current_app, jsonify, render_template_string, request
+
+from .. import templates
+from .. import export
+from ..assets import IMMUTABLE_CACHE_CONTROL, AssetRegistry
+from ..guides import DEFAULT_BUNDLE, build_bundle, load_bundle
+from ..pages import PageCache
+from ..search import SearchIndex
+from ..tracing import span
+
+logger = logging.getLogger(__name__)
+
+bp = Blueprint('guides', __name__, cli_group=None)
+
+# Page cache: sources are looked up lazily so edits are picked up in development
+PAGE_TEMPLATES = {
+    'home': lambda: templates.HOME_TEMPLATE,
+    'demo': lambda: templates.DEMO_TEMPLATE,
+}
+
+# Per-route Cache-Control policies; other pages use PAGE_CACHE_CONTROL
+PAGE_CACHE_CONTROL = {
+    'home': 'public, max-age=60',
+    'demo': 'public, max-age=60',
+}
+
+LAST_MODIFIED = os.path.getmtime(templates.__file__)
+
+_search_lock = threading.Lock()
+
+
+@bp.record_once
+def setup(state):
+    app = state.app
+    app.config['GUIDE_BUNDLE'] = app.config.get('GUIDE_BUNDLE') or DEFAULT_BUNDLE
+    app.config.setdefault('GUIDE_LAZY_SECTIONS', True)
+    # Shared and per-page CSS are served as fingerprinted, immutable stylesheets
+    assets = AssetRegistry(app, last_modified=LAST_MODIFIED)
+    assets.add('base.css', templates.BASE_STYLE)
+    assets.add('search.js', templates.SEARCH_SCRIPT)
+    assets.add('sections.js', templates.SECTIONS_SCRIPT)
+
+    bundle = load_bundle(assets, path=app.config['GUIDE_BUNDLE'])
+    app.extensions['guide_bundle'] = bundle
+    app.jinja_env.globals['guides'] = bundle.guides
+
+    pages = PageCache(app, last_modified=LAST_MODIFIED, transform=assets.externalize_styles)
+    for name, source in PAGE_TEMPLATES.items():
+        pages.register(name, source, PAGE_CACHE_CONTROL.get(name))
+    for guide in bundle.guides:
+        slug, cache_control = guide['slug'], guide.get('cache_control')
+        assets.add(slug + '.css', bundle.css(guide))
+        full = bundle.page(guide)
+        pages.add(slug, bundle.shell(guide) if app.config['GUIDE_LAZY_SECTIONS'] else full,
+                  cache_control)
+        pages.add(slug + '/all', full, cache_control)
+        for fragment in bundle.fragments(guide):
+            pages.add(fragment.name, fragment, cache_control)
+
+        # Routes named after the slug: /aws ('aws'), the full /aws/all
+        # ('aws_all') and the fragments /aws/step/N ('aws_step')
+        state.add_url_rule(guide['path'], slug, partial(guide_page, slug))
+        state.add_url_rule(guide['path'] + '/all', slug + '_all',
+                           partial(guide_page, slug + '/all'))
+        state.add_url_rule(guide['path'] + '/step/<int:number>', slug + '_step',
+                           partial(guide_step, slug))
+
+
+def search_index(app) -> SearchIndex:
+    """The app's index of guide sections, built on first use"""
+    index = app.extensions.get('search_index')
+    if index is None:
+        with _search_lock:
+            index = app.extensions.get('search_index')
+            if index is None:
+                pages = app.extensions['page_cache']
+                index = SearchIndex()
+                for guide in app.extensions['guide_bundle'].guides:
+                    index.add_page(guide['path'],
+                                   bytes(pages.get(guide['slug'] + '/all').body).decode('utf-8'))
+                index.add_page('/demo', pages.get('demo').body.decode('utf-8'))
+                index.build()
+                app.extensions['search_index'] = index
+    return index
+
+
+def frozen_routes(app) -> list:
+    """``(url, page, headers)`` for every route that serves a cached page or asset"""
+    pages = app.extensions['page_cache']
+    routes = []
+    for name in pages:
+        # Page names are the guide URLs without the leading slash
+        url = '/' if name == 'home' else '/' + name
+        headers = {'Cache-Control': pages.cache_control(name)}
+        if '/step/' in name:
+            headers['X-Robots-Tag'] = 'noindex'
+        routes.append((url, pages.get(name), headers))
+    for url, page in app.extensions['assets'].routes():
+        routes.append((url, page, {'Cache-Control': IMMUTABLE_CACHE_CONTROL}))
+    return routes
+
+
+def render_page(name: str):
+    """Serve a guide page from the page cache"""
+    with span('render', page=name):
+        if current_app.config['PAGE_CACHE'] or name not in PAGE_TEMPLATES:
+            return current_app.extensions['page_cache'].response(name)
+        return current_app.extensions['assets'].externalize_styles(
+            name, render_template_string(PAGE_TEMPLATES[name]()))
+
+
+@bp.route('/')
+def home():
+    logger.info("Home page accessed")
+    return render_page('home')
+
+
+@bp.route('/demo')
+def demo():
+    logger.info("Demo page accessed")
+    return render_page('demo')
+
+
+def guide_page(name: str):
+    logger.info("Guide page accessed: %s", name)
+    return render_page(name)
+
+
+def guide_step(slug: str, number: int):
+    """One section of a guide as an HTML fragment (0 is the overview)"""
+    name = '%s/step/%d' % (slug, number)
+    if name not in current_app.extensions['page_cache']:
+        abort(404)
+    response = render_page(name)
+    # Crawlers should index the guide pages, not their fragments
+    response.headers['X-Robots-Tag'] = 'noindex'
+    return response
+
+
+@bp.route('/api/search')
+def api_search():
+    """Ranked guide sections for ``q`` (terms, ``prefix*`` and ``"phrases"``)"""
+    query = request.args.get('q', '').strip()[:200]
+    if not query:
+        return jsonify({'error': 'Missing query'}), 400
+    limit = max(1, min(request.args.get('limit', 10, type=int), 50))
+    results = search_index(current_app).search(query, limit)
+    return jsonify({'query': query, 'results': results})
+
+
+@bp.cli.command('build-assets')
+@click.argument('directory')
+def build_assets(directory):
+    """Write fingerprinted static assets to DIRECTORY for nginx or a CDN"""
+    for path in current_app.extensions['assets'].write(directory):
+        click.echo(path)
+
+
+@bp.cli.command('freeze')
+@click.argument('directory')
+def freeze(directory):
+    """Export every guide page and asset to DIRECTORY as a static site"""
+    document = export.freeze(directory, frozen_routes(current_app))
+    click.echo('%d routes written to %s' % (len(document['routes']), directory))
+
+
+@bp.cli.command('build-guides')
+def build_guides():
+    """Compile src/content into the guide bundle (GUIDE_BUNDLE)"""
+    click.echo(build_bundle(current_app.extensions['assets'],
+                            path=current_app.config['GUIDE_BUNDLE']))
@@ -0,0 +1,47 @@
+"""
+Operational endpoints: /health, /metrics, the /livez and /readyz probes and
+the sampling profiler at /debug/profile, plus per-worker memory gauges
+"""
+
+import time
+
+from flask import Blueprint, Response, abort, current_app, jsonify, request
+
+from .. import multiproc
+from ..exposition import Exposition
+from ..health import HealthChecks, load_check, multiproc_check
+from ..memory import MemoryStats
+from ..profiler import Profiler
+
+bp = Blueprint('ops', __name__)
+
+
+@bp.record_once
+def setup(state):
+    app = state.app
+    app.extensions['exposition'] = Exposition(ttl=app.config['METRICS_CACHE_TTL'],
+                                              path=multiproc.multiproc_dir())
+    Profiler(app)
+    health_checks = HealthChecks(app)
+    # Registered after the guides blueprint, when that is enabled
+    bundle = app.extensions.get('guide_bundle')
+    if bundle is not None:
+        health_checks.add('guides', bundle.check)
+    health_checks.add('metrics', multiproc_check(multiproc.multiproc_dir()))
+    health_checks.add('load', load_check(app.extensions.get('admission')))
+    health_checks.start()
+    MemoryStats(app).start()
+
+
+@bp.route('/health')
+def health():
+    return jsonify({'status': 'healthy', 'timestamp': time.time()})
+
+
+@bp.route('/metrics')
+def metrics():
+    if not current_app.config['METRICS_ON_MAIN_PORT']:
+        abort(404)
+    body, headers = current_app.extensions['exposition'].render(
+        request.headers.get('Accept'), request.headers.get('Accept-Encoding'))
+    return Response(body, headers=headers)
@@ -0,0 +1,51 @@
+"""
+Calculator API helpers
+Validation shared by the single and batch calculate endpoints
+"""
+
+
+class CalculationError(ValueError):
+    """Invalid calculator input; the message is returned to the client"""
+
+    status = 400
+
+
+def calculate_sum(a: int, b: int) -> int:
+    """Calculate sum of two numbers"""
+    return a + b
+
+
+def parse_operands(data) -> tuple:
+    """Validate an ``{a, b}`` payload and return the integer operands"""
+    if not data or not isinstance(data, dict) or 'a' not in data or 'b' not in data:
+        raise CalculationError('Missing parameters')
+    try:
+        return int(data['a']), int(data['b'])
+    except (ValueError, TypeError, OverflowError):  # OverflowError: Infinity, 1e400
+        raise CalculationError('Invalid input')
+
+
+def calculate_batch(items) -> list:
+    """Evaluate a list of ``{a, b}`` payloads in one pass
+
+    Items are validated first, then every valid pair is summed with a single
+    ``map`` over ``calculate_sum``. Invalid items get the same error message
+    and status the single-item endpoint would return; items that could not
+    be decoded may be passed in as ``CalculationError`` instances.
+    """
+    results = [None] * len(items)
+    index, left, right = [], [], []
+    for i, item in enumerate(items):
+        try:
+            if isinstance(item, CalculationError):
+                raise item
+            a, b = parse_operands(item)
+        except CalculationError as e:
+            results[i] = {'error': str(e), 'status': e.status}
+            continue
+        index.append(i)
+        left.append(a)
+        right.append(b)
+    for i, a, b, result in zip(index, left, right, map(calculate_sum, left, right)):
+        results[i] = {'result': result, 'operation': f'{a} + {b}'}
+    return results
@@ -0,0 +1,104 @@
+"""
+Response compression
+Static pages are pre-compressed once; dynamic JSON is compressed on the fly
+"""
+
+import gzip
+import zlib
+from functools import lru_cache
+
+from flask import request
+from werkzeug.http import parse_accept_header
+
+try:
+    import brotli
+except ImportError:  # brotli is optional
+    brotli = None
+
+# Preferred order when the client accepts several encodings equally
+ENCODINGS = ('br', 'gzip') if brotli is not None else ('gzip',)
+COMPRESSIBLE_MIMETYPES = {'application/json', 'text/html', 'text/plain', 'text/css'}
+
+
+def compress_static(body: bytes) -> dict:
+    """Build every available compressed variant of a static body"""
+    variants = {'gzip': gzip.compress(body, compresslevel=9, mtime=0)}
+    if brotli is not None:
+        variants['br'] = brotli.compress(body, quality=11)
+    return variants
+
+
+@lru_cache(maxsize=256)
+def accepted_encodings(accept_encoding: str) -> tuple:
+    """Encodings acceptable to the client, best first"""
+    accept = parse_accept_header(accept_encoding)
+    ranked = [(accept.quality(enc), -i, enc) for i, enc in enumerate(ENCODINGS)]
+    return tuple(enc for q, _, enc in sorted(ranked, reverse=True) if q > 0)
+
+
+def negotiate(accept_encoding, available) -> str:
+    """Pick the best encoding in ``available`` for an Accept-Encoding header"""
+    if accept_encoding:
+        for encoding in accepted_encodings(accept_encoding):
+            if encoding in available:
+                return encoding
+    return 'identity'
+
+
+def _gzip_stream(chunks, level: int):
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    for chunk in chunks:
+        if isinstance(chunk, str):
+            chunk = chunk.encode('utf-8')
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+class Compress:
+    """Gzip dynamic responses above ``COMPRESS_MIN_SIZE`` bytes
+
+    Streamed responses are compressed chunk by chunk instead of being
+    buffered. Responses that already carry a Content-Encoding (such as the
+    pre-compressed guide pages) are left alone.
+    """
+
+    def __init__(self, app=None):
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault('COMPRESS_MIN_SIZE', 1024)
+        app.config.setdefault('COMPRESS_LEVEL', 6)
+        app.config.setdefault('COMPRESS_MIMETYPES', COMPRESSIBLE_MIMETYPES)
+        self.app = app
+        app.after_request(self.after_request)
+
+    def _should_compress(self, response, accept_encoding) -> bool:
+        config = self.app.config
+        if (response.status_code < 200 or response.status_code in (204, 304)
+                or 'Content-Encoding' in response.headers
+                or response.mimetype not in config['COMPRESS_MIMETYPES']
+                or negotiate(accept_encoding, ('gzip',)) != 'gzip'):
+            return False
+        if response.is_streamed:
+            return True
+        return response.content_length is not None and \
+            response.content_length >= config['COMPRESS_MIN_SIZE']
+
+    def after_request(self, response):
+        if response.mimetype in self.app.config['COMPRESS_MIMETYPES']:
+            response.vary.add('Accept-Encoding')
+        if not self._should_compress(response, request.headers.get('Accept-Encoding')):
+            return response
+        level = self.app.config['COMPRESS_LEVEL']
+        if response.is_streamed:
+            response.response = _gzip_stream(response.response, level)
+            response.headers.pop('Content-Length', None)
+        else:
+            response.set_data(gzip.compress(response.get_data(), compresslevel=level))
+        response.headers['Content-Encoding'] = 'gzip'
+        if response.headers.get('ETag') and not response.headers['ETag'].startswith('W/'):
+            response.headers['ETag'] = 'W/' + response.headers['ETag']
+        return response
@@ -0,0 +1,25 @@
+"""
+Access control for /debug endpoints
+They exist only when DEBUG_TOKEN is configured and answer only requests
+sending it as ``Authorization: Bearer <token>``
+"""
+
+import hmac
+from functools import wraps
+
+from flask import abort, current_app, jsonify, request
+
+
+def debug_only(view):
+    """Hide ``view`` (404) without DEBUG_TOKEN; reject (403) a wrong token"""
+
+    @wraps(view)
+    def guarded(*args, **kwargs):
+        token = current_app.config.get('DEBUG_TOKEN')
+        if not token:
+            abort(404)
+        given = request.headers.get('Authorization', '')
+        if not hmac.compare_digest(given.encode('utf-8'), b'Bearer ' + token.encode('utf-8')):
+            return jsonify({'error': 'Forbidden'}), 403
+        return view(*args, **kwargs)
+    return guarded
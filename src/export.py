@@ -0,0 +1,150 @@
+"""
+Static-site export
+``freeze`` writes every cached page and asset to a directory: one file per
+route plus ``.br``/``.gz`` siblings, and ``manifest.json`` with the headers
+each route is served with. nginx or a CDN can serve the directory as is
+(``try_files $uri $uri.html``, ``gzip_static``/``brotli_static``).
+
+``StaticSite`` is the same directory served by the app itself: WSGI
+middleware that answers the exported routes from disk before Flask sees the
+request, through ``wsgi.file_wrapper`` so gunicorn can ``sendfile`` the file.
+"""
+
+import json
+import os
+import tempfile
+
+from werkzeug.http import parse_date, parse_etags
+from werkzeug.wsgi import FileWrapper
+
+from .compression import negotiate
+from .metrics import STATIC_RESPONSES
+
+MANIFEST = 'manifest.json'
+MANIFEST_VERSION = 1
+SUFFIXES = {'gzip': '.gz', 'br': '.br'}
+BLOCK_SIZE = 65536
+
+
+def route_file(url: str) -> str:
+    """``/`` -> ``index.html``, ``/aws/all`` -> ``aws/all.html``; assets keep their names"""
+    path = url.strip('/')
+    if not path:
+        return 'index.html'
+    return path if '.' in path.rsplit('/', 1)[-1] else path + '.html'
+
+
+def _write(path: str, data: bytes):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'wb') as fh:
+        fh.write(data)
+
+
+def freeze(directory: str, routes) -> dict:
+    """Write each ``(url, page, headers)`` of ``routes`` under ``directory``
+
+    ``headers`` are the extra response headers for the route (Cache-Control,
+    X-Robots-Tag). The manifest is written last, so a directory with a
+    manifest is complete. Returns the manifest.
+    """
+    manifest = {}
+    for url, page, headers in routes:
+        filename = route_file(url)
+        encodings = {}
+        for encoding, variant in page.variants.items():
+            name = filename + SUFFIXES.get(encoding, '')
+            _write(os.path.join(directory, name), bytes(variant.body))
+            encodings[encoding] = {'file': name, 'etag': variant.etag,
+                                   'length': len(variant.body)}
+        manifest[url] = {'content_type': page.content_type,
+                         'last_modified': page.last_modified,
+                         'last_modified_ts': page.last_modified_ts,
+                         'headers': dict(headers), 'encodings': encodings}
+    document = {'version': MANIFEST_VERSION, 'routes': manifest}
+    fd, tmp = tempfile.mkstemp(dir=directory, prefix='.manifest-')
+    with os.fdopen(fd, 'w') as fh:
+        json.dump(document, fh, indent=1, sort_keys=True)
+    os.replace(tmp, os.path.join(directory, MANIFEST))
+    return document
+
+
+class _Route:
+    """Pre-built header lists for one exported route"""
+
+    __slots__ = ('last_modified_ts', 'files', 'headers', 'not_modified')
+
+    def __init__(self, directory: str, entry: dict):
+        self.last_modified_ts = entry['last_modified_ts']
+        self.files, self.headers, self.not_modified = {}, {}, {}
+        for encoding, variant in entry['encodings'].items():
+            common = [('ETag', variant['etag']), ('Last-Modified', entry['last_modified']),
+                      ('Vary', 'Accept-Encoding')] + list(entry['headers'].items())
+            full = common + [('Content-Type', entry['content_type']),
+                             ('Content-Length', str(variant['length']))]
+            if encoding != 'identity':
+                full.append(('Content-Encoding', encoding))
+            self.files[encoding] = os.path.join(directory, variant['file'])
+            self.headers[encoding] = (variant['etag'], full)
+            self.not_modified[encoding] = common
+
+
+class StaticSite:
+    """Serve a ``freeze`` export from STATIC_SITE_DIR ahead of the app
+
+    Install it last so it is the outermost middleware: exported routes skip
+    admission control, tracing and request metrics and are counted in
+    ``http_static_responses_total{status}``. Other requests pass through.
+    """
+
+    def __init__(self, app=None):
+        self.routes = {}
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        directory = app.config['STATIC_SITE_DIR']
+        try:
+            with open(os.path.join(directory, MANIFEST), encoding='utf-8') as fh:
+                document = json.load(fh)
+        except OSError:
+            raise RuntimeError('%s has no %s: run "flask --app src.app freeze %s" first'
+                               % (directory, MANIFEST, directory))
+        if document.get('version') != MANIFEST_VERSION:
+            raise RuntimeError('%s was written by another version; freeze it again' % directory)
+        self.routes = {url: _Route(directory, entry)
+                       for url, entry in document['routes'].items()}
+        self._served = STATIC_RESPONSES.labels(status='200')
+        self._not_modified = STATIC_RESPONSES.labels(status='304')
+        self.wsgi_app = app.wsgi_app
+        app.wsgi_app = self
+        app.extensions['static_site'] = self
+
+    def __call__(self, environ, start_response):
+        route = self.routes.get(environ.get('PATH_INFO'))
+        method = environ['REQUEST_METHOD']
+        if route is None or (method != 'GET' and method != 'HEAD'):
+            return self.wsgi_app(environ, start_response)
+        encoding = negotiate(environ.get('HTTP_ACCEPT_ENCODING'), route.files)
+        etag, headers = route.headers[encoding]
+        if self._is_not_modified(environ, route, etag):
+            self._not_modified.inc()
+            start_response('304 Not Modified', route.not_modified[encoding])
+            return []
+        self._served.inc()
+        start_response('200 OK', headers)
+        if method == 'HEAD':
+            return []
+        fh = open(route.files[encoding], 'rb')
+        file_wrapper = environ.get('wsgi.file_wrapper', FileWrapper)
+        return file_wrapper(fh, BLOCK_SIZE)
+
+    @staticmethod
+    def _is_not_modified(environ, route, etag: str) -> bool:
+        if_none_match = environ.get('HTTP_IF_NONE_MATCH')
+        if if_none_match:
+            return parse_etags(if_none_match).contains_weak(etag.strip('"'))
+        if_modified_since = environ.get('HTTP_IF_MODIFIED_SINCE')
+        if if_modified_since:
+            since = parse_date(if_modified_since)
+            return since is not None and route.last_modified_ts <= since.timestamp()
+        return False
@@ -0,0 +1,90 @@
+"""
+Prometheus exposition for /metrics
+Scrape output is cached for a short window, negotiated between the text and
+OpenMetrics formats, gzip-compressed on request, and can be served on a
+separate port. This module is imported by the gunicorn master, so it must
+not create any metrics itself.
+"""
+
+import gzip
+import threading
+import time
+from socketserver import ThreadingMixIn
+from wsgiref.simple_server import WSGIRequestHandler, WSGIServer, make_server
+
+from prometheus_client import REGISTRY
+from prometheus_client.exposition import choose_encoder
+
+from . import multiproc
+from .compression import negotiate
+
+
+class Exposition:
+    """Render metrics at most once per ``ttl`` seconds per format
+
+    With ``ttl`` 0 every scrape renders fresh output. When ``path`` is set
+    metrics are aggregated from the multiprocess directory.
+    """
+
+    def __init__(self, ttl: float = 0.0, path: str = None, registry=REGISTRY):
+        self.ttl = ttl
+        self.path = path
+        self.registry = registry
+        self._cache = {}
+        self._lock = threading.Lock()
+
+    def _generate(self, encoder) -> bytes:
+        if self.path:
+            return multiproc.generate(self.path, encoder)
+        return encoder(self.registry)
+
+    def _entry(self, accept):
+        encoder, content_type = choose_encoder(accept)
+        entry = self._cache.get(content_type)
+        if entry is None or time.monotonic() - entry[0] >= self.ttl:
+            with self._lock:
+                entry = self._cache.get(content_type)
+                if entry is None or time.monotonic() - entry[0] >= self.ttl:
+                    body = self._generate(encoder)
+                    entry = self._cache[content_type] = [time.monotonic(), body, None]
+        return content_type, entry
+
+    def render(self, accept=None, accept_encoding=None):
+        """Return ``(body, headers)`` for a scrape"""
+        content_type, entry = self._entry(accept or '')
+        headers = {'Content-Type': content_type, 'Vary': 'Accept, Accept-Encoding'}
+        if negotiate(accept_encoding, ('gzip',)) == 'gzip':
+            if entry[2] is None:
+                entry[2] = gzip.compress(entry[1], compresslevel=6)
+            headers['Content-Encoding'] = 'gzip'
+            return entry[2], headers
+        return entry[1], headers
+
+    def wsgi_app(self, environ, start_response):
+        """Standalone WSGI app for serving metrics on their own port"""
+        if environ.get('PATH_INFO') not in ('/', '/metrics'):
+            start_response('404 Not Found', [('Content-Type', 'text/plain')])
+            return [b'Not Found']
+        body, headers = self.render(environ.get('HTTP_ACCEPT'),
+                                    environ.get('HTTP_ACCEPT_ENCODING'))
+        headers['Content-Length'] = str(len(body))
+        start_response('200 OK', list(headers.items()))
+        return [body]
+
+    def serve(self, port: int, addr: str = '0.0.0.0'):
+        """Serve ``wsgi_app`` from a daemon thread; returns the server"""
+        server = make_server(addr, port, self.wsgi_app, _ThreadingWSGIServer,
+                             handler_class=_QuietHandler)
+        thread = threading.Thread(target=server.serve_forever, name='metrics-server',
+                                  daemon=True)
+        thread.start()
+        return server
+
+
+class _ThreadingWSGIServer(ThreadingMixIn, WSGIServer):
+    daemon_threads = True
+
+
+class _QuietHandler(WSGIRequestHandler):
+    def log_message(self, format, *args):
+        pass
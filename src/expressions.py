@@ -0,0 +1,268 @@
+"""
+Arithmetic expressions for the calculator API
+Expressions are parsed (no ``eval``) into a tree of closures once and kept
+in an LRU cache, so a repeated formula only pays for evaluation. Grammar:
+numbers, variables, ``+ - * / // % **``, parentheses and the functions in
+FUNCTIONS. Size limits bound the work per request: the node count fixes
+the evaluation cost and every intermediate integer is capped at
+MAX_INT_BITS, checked before ``**`` computes anything large.
+"""
+
+import math
+import re
+from functools import lru_cache
+
+from .calculator import CalculationError
+from .tracing import span
+
+MAX_LENGTH = 500
+MAX_NODES = 200
+MAX_DEPTH = 32
+MAX_INT_BITS = 1024
+MAX_ROUND_DIGITS = 100
+CACHE_SIZE = 1024
+
+TOKEN = re.compile(r'\s*(?:((?:\d+\.?\d*|\.\d+)(?:[eE][+-]?\d+)?)|([A-Za-z_]\w*)'
+                   r'|(\*\*|//|[-+*/%(),]))')
+NAME = re.compile(r'[A-Za-z_]\w*$')
+
+
+def check_number(value):
+    """Reject values outside the calculator's range; returns ``value``"""
+    if isinstance(value, bool) or not isinstance(value, (int, float)):
+        raise CalculationError('Result is not a real number')
+    if isinstance(value, int):
+        if value.bit_length() > MAX_INT_BITS:
+            raise CalculationError('Number too large')
+    elif not math.isfinite(value):
+        raise CalculationError('Number too large')
+    return value
+
+
+def _power(base, exponent):
+    if isinstance(base, int) and isinstance(exponent, int) and exponent > 0 \
+            and abs(base) > 1 and (base.bit_length() - 1) * exponent > MAX_INT_BITS:
+        raise CalculationError('Number too large')
+    return base ** exponent
+
+
+def _round(number, ndigits=None):
+    # round(5, -10**7) builds 10**ndigits: bound it like the other large integers
+    if ndigits is not None and not abs(ndigits) <= MAX_ROUND_DIGITS:
+        raise CalculationError('Invalid operation')
+    return round(number, ndigits)
+
+
+BINARY = {
+    '+': lambda a, b: a + b,
+    '-': lambda a, b: a - b,
+    '*': lambda a, b: a * b,
+    '/': lambda a, b: a / b,
+    '//': lambda a, b: a // b,
+    '%': lambda a, b: a % b,
+    '**': _power,
+}
+FUNCTIONS = {
+    'abs': (abs, 1, 1),
+    'round': (_round, 1, 2),
+    'min': (min, 2, 10),
+    'max': (max, 2, 10),
+    'sqrt': (math.sqrt, 1, 1),
+}
+
+
+def _apply(function, *args):
+    try:
+        return check_number(function(*args))
+    except CalculationError:
+        raise
+    except ZeroDivisionError:
+        raise CalculationError('Division by zero')
+    except OverflowError:
+        raise CalculationError('Number too large')
+    except (ArithmeticError, ValueError, TypeError):
+        raise CalculationError('Invalid operation')
+
+
+class Expression:
+    """A compiled expression; call ``evaluate`` with its variables"""
+
+    __slots__ = ('text', 'variables', '_run')
+
+    def __init__(self, text: str, variables: frozenset, run):
+        self.text = text
+        self.variables = variables
+        self._run = run
+
+    def evaluate(self, values: dict):
+        missing = self.variables.difference(values)
+        if missing:
+            raise CalculationError('Unknown variable: %s' % min(missing))
+        return self._run(values)
+
+
+class _Parser:
+    """Recursive descent over tokens, building closures as it goes"""
+
+    def __init__(self, text: str):
+        self.tokens = self._tokenize(text)
+        self.pos = 0
+        self.nodes = 0
+        self.depth = 0
+        self.variables = set()
+
+    @staticmethod
+    def _tokenize(text: str) -> list:
+        tokens, pos, end = [], 0, len(text.rstrip())
+        while pos < end:
+            match = TOKEN.match(text, pos)
+            if match is None:
+                raise CalculationError('Invalid expression')
+            number, name, op = match.groups()
+            if number is not None:
+                tokens.append(('number', number))
+            elif name is not None:
+                tokens.append(('name', name))
+            else:
+                tokens.append(('op', op))
+            pos = match.end()
+        return tokens
+
+    def _peek(self):
+        return self.tokens[self.pos] if self.pos < len(self.tokens) else (None, None)
+
+    def _take(self, value=None):
+        token = self._peek()
+        if token[0] is None or (value is not None and token[1] != value):
+            raise CalculationError('Invalid expression')
+        self.pos += 1
+        return token
+
+    def _enter(self):
+        self.depth += 1
+        if self.depth > MAX_DEPTH:
+            raise CalculationError('Expression too complex')
+
+    def _node(self, fn):
+        self.nodes += 1
+        if self.nodes > MAX_NODES:
+            raise CalculationError('Expression too complex')
+        return fn
+
+    def parse(self):
+        run = self._sum()
+        if self.pos != len(self.tokens):
+            raise CalculationError('Invalid expression')
+        return run
+
+    def _binary(self, operand, operators):
+        left = operand()
+        while self._peek()[1] in operators:
+            op = BINARY[self._take()[1]]
+            right = operand()
+            left = self._node(lambda env, l=left, r=right, op=op: _apply(op, l(env), r(env)))
+        return left
+
+    def _sum(self):
+        return self._binary(self._product, ('+', '-'))
+
+    def _product(self):
+        return self._binary(self._unary, ('*', '/', '//', '%'))
+
+    def _unary(self):
+        if self._peek()[1] in ('+', '-'):
+            sign = self._take()[1]
+            self._enter()
+            operand = self._unary()
+            self.depth -= 1
+            if sign == '+':
+                return operand
+            return self._node(lambda env, x=operand: -x(env))
+        return self._power()
+
+    def _power(self):
+        base = self._atom()
+        if self._peek()[1] != '**':
+            return base
+        self._take()
+        self._enter()
+        exponent = self._unary()
+        self.depth -= 1
+        return self._node(lambda env, b=base, e=exponent: _apply(_power, b(env), e(env)))
+
+    def _atom(self):
+        kind, value = self._take()
+        if kind == 'number':
+            try:
+                number = check_number(float(value) if value.strip('0123456789') else int(value))
+            except OverflowError:
+                raise CalculationError('Number too large')
+            return self._node(lambda env, n=number: n)
+        if kind == 'name':
+            if self._peek()[1] == '(':
+                return self._call(value)
+            self.variables.add(value)
+            return self._node(lambda env, name=value: env[name])
+        if value == '(':
+            self._enter()
+            inner = self._sum()
+            self._take(')')
+            self.depth -= 1
+            return inner
+        raise CalculationError('Invalid expression')
+
+    def _call(self, name):
+        if name not in FUNCTIONS:
+            raise CalculationError('Unknown function: %s' % name)
+        function, least, most = FUNCTIONS[name]
+        self._take('(')
+        self._enter()
+        args = [self._sum()]
+        while self._peek()[1] == ',':
+            self._take()
+            args.append(self._sum())
+        self._take(')')
+        self.depth -= 1
+        if not least <= len(args) <= most:
+            raise CalculationError('Wrong number of arguments for %s()' % name)
+        args = tuple(args)
+        return self._node(lambda env: _apply(function, *(arg(env) for arg in args)))
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def compile_expression(text: str) -> Expression:
+    """Parse ``text`` once; later calls with the same text hit the cache"""
+    with span('expression.compile'):
+        if len(text) > MAX_LENGTH:
+            raise CalculationError('Expression too long')
+        parser = _Parser(text)
+        if not parser.tokens:
+            raise CalculationError('Invalid expression')
+        run = parser.parse()
+        return Expression(text, frozenset(parser.variables), run)
+
+
+def parse_variables(values) -> dict:
+    """Validate a ``variables`` object: names to JSON numbers"""
+    if values is None:
+        return {}
+    if not isinstance(values, dict) or len(values) > MAX_NODES:
+        raise CalculationError('Invalid variables')
+    for name, value in values.items():
+        if not isinstance(name, str) or not NAME.match(name) \
+                or isinstance(value, bool) or not isinstance(value, (int, float)):
+            raise CalculationError('Invalid variables')
+        try:
+            check_number(value)
+        except CalculationError:
+            raise CalculationError('Invalid variables')
+    return values
+
+
+def evaluate(data: dict) -> tuple:
+    """Evaluate an ``{expression, variables}`` payload; returns ``(text, result)``"""
+    text = data['expression']
+    if not isinstance(text, str):
+        raise CalculationError('Invalid expression')
+    expression = compile_expression(text.strip())
+    return expression.text, expression.evaluate(parse_variables(data.get('variables')))
@@ -0,0 +1,295 @@
+"""
+Guide content bundle
+Guides are authored as Markdown with YAML front matter in src/content.
+``build_bundle`` renders them once into a single file of ready-to-serve HTML,
+pre-compressed variants, per-guide CSS and metadata; ``GuideBundle``
+memory-maps that file so every worker shares one copy through the OS page
+cache instead of building the guides at import time.
+Each guide is stored three ways: the full page, a shell holding the first
+INITIAL_SECTIONS sections and only the headings of the rest (its outline),
+and one HTML fragment per ``##`` section that the shell loads as needed.
+"""
+
+import glob
+import json
+import mmap
+import os
+import stat
+import struct
+import tempfile
+import time
+import zlib
+from functools import lru_cache, partial
+
+from jinja2 import Environment
+from markupsafe import Markup
+
+from . import markup
+from .compression import compress_static
+from .pages import Page
+
+CONTENT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'content')
+# Built at runtime, so it goes where the app can write (the source tree may be
+# read-only): a directory only this user can write to, since the bundle is mapped
+# and served as is; one per checkout so two of them don't keep rebuilding each other's
+DEFAULT_BUNDLE = os.path.join(tempfile.gettempdir(), 'deployhub-guides-%d' % os.getuid(),
+                              '%08x.bundle' % zlib.crc32(CONTENT_DIR.encode('utf-8')))
+FORMAT_VERSION = 3
+# Assets every guide links to; a changed fingerprint makes the bundle stale
+SHARED_ASSETS = ('base.css', 'search.js', 'sections.js')
+# Sections inlined in a guide's shell page: the overview and the first step
+INITIAL_SECTIONS = 2
+# Magic and index length, followed by the JSON index and the data section
+HEADER = struct.Struct('>8sI')
+MAGIC = b'DHGUIDE1'
+
+LAYOUT = '''
+<!DOCTYPE html>
+<html lang="en">
+<head>
+    <meta charset="UTF-8">
+    <meta name="viewport" content="width=device-width, initial-scale=1.0">
+    <title>{{ guide.title }} - DeployHub</title>
+    <link rel="stylesheet" href="{{ shared['base.css'] }}">
+    <link rel="stylesheet" href="{{ guide_css }}">
+    <script src="{{ shared['search.js'] }}" defer></script>
+{%- if lazy %}
+    <script src="{{ shared['sections.js'] }}" defer></script>
+{%- endif %}
+</head>
+<body>
+    <nav class="navbar">
+        <h1>🚀 DeployHub</h1>
+        <div class="nav-links">
+            <a href="/">Home</a>
+{%- for item in guides %}
+            <a href="{{ item.path }}">{{ item.nav }}</a>
+{%- endfor %}
+        </div>
+        <form class="search" action="/api/search" role="search">
+            <input type="search" name="q" placeholder="Search guides" aria-label="Search guides" autocomplete="off">
+            <div class="search-results"></div>
+        </form>
+    </nav>
+
+    <div class="container">
+        <h1>{{ guide.heading }}</h1>
+
+        <div class="content">
+{{ body }}
+        </div>
+    </div>
+</body>
+</html>
+'''
+SECTION = '<section class="guide-section" data-step="%d">\n%s\n</section>'
+PLACEHOLDER = ('<section class="guide-section lazy" data-step="%d" data-src="%s">\n'
+               '<h2 id="%s"><a href="%s">%s</a></h2>\n</section>')
+
+
+@lru_cache(maxsize=None)
+def layout():
+    """The compiled page layout; only needed when (re)building the bundle"""
+    return Environment(autoescape=True).from_string(LAYOUT)
+
+
+def parse_guide(filename: str, text: str) -> tuple:
+    """Split a guide into ``(metadata, markdown)``"""
+    import yaml  # only needed when (re)building the bundle
+
+    slug = os.path.splitext(os.path.basename(filename))[0]
+    if not text.startswith('---'):
+        raise ValueError('%s: missing front matter' % filename)
+    _, front, body = text.split('---', 2)
+    meta = yaml.safe_load(front) or {}
+    if 'title' not in meta:
+        raise ValueError('%s: front matter needs a title' % filename)
+    meta.setdefault('heading', meta['title'])
+    meta.setdefault('nav', meta['title'])
+    meta.setdefault('card', meta['title'])
+    meta.setdefault('link', 'Read guide →')
+    meta.setdefault('order', 100)
+    meta.update(slug=slug, path='/' + slug)
+    return meta, body
+
+
+def sources(content_dir: str) -> list:
+    return sorted(glob.glob(os.path.join(content_dir, '*.md')))
+
+
+def shared_urls(assets) -> dict:
+    return {name: assets.url(name) for name in SHARED_ASSETS}
+
+
+def shell_body(meta: dict, parts: list) -> str:
+    """The first sections in full, then headings linking into the full page"""
+    out = []
+    for number, (anchor, title, html) in enumerate(parts):
+        if number < meta.get('initial_sections', INITIAL_SECTIONS):
+            out.append(SECTION % (number, html))
+        else:
+            out.append(PLACEHOLDER % (number, '%s/step/%d' % (meta['path'], number), anchor,
+                                      '%s/all#%s' % (meta['path'], anchor),
+                                      markup.inline(title)))
+    return '\n'.join(out)
+
+
+def private_directory(path: str):
+    """Create ``path`` if missing and check no other user can write to it
+
+    Workers that run as another user can still open the bundle by name
+    (mode 0711), but nobody else can plant or replace a file in it.
+    """
+    try:
+        os.mkdir(path, 0o711)
+    except FileExistsError:
+        pass
+    info = os.lstat(path)
+    if not stat.S_ISDIR(info.st_mode) or info.st_uid != os.getuid() or info.st_mode & 0o022:
+        raise RuntimeError('%s is not a directory writable only by this user' % path)
+
+
+def build_bundle(assets, content_dir: str = CONTENT_DIR, path: str = DEFAULT_BUNDLE) -> str:
+    """Render every guide in ``content_dir`` into the bundle at ``path``
+
+    Guide stylesheets are registered with ``assets`` so the pages link to
+    the same fingerprinted URLs the app serves. Returns ``path``.
+    """
+    files = sources(content_dir)
+    guides = []
+    for filename in files:
+        with open(filename, encoding='utf-8') as fh:
+            guides.append(parse_guide(filename, fh.read()))
+    guides.sort(key=lambda guide: (guide[0]['order'], guide[0]['slug']))
+    nav = [meta for meta, _ in guides]
+
+    data = bytearray()
+
+    def put(blob: bytes) -> list:
+        data.extend(blob)
+        return [len(data) - len(blob), len(blob)]
+
+    def put_variants(html: str) -> dict:
+        body = html.encode('utf-8')
+        variants = {'identity': put(body)}
+        for encoding, compressed in compress_static(body).items():
+            variants[encoding] = put(compressed)
+        return variants
+
+    index = {'version': FORMAT_VERSION, 'built': time.time(),
+             'shared': shared_urls(assets),
+             'sources': [os.path.basename(f) for f in files], 'guides': []}
+    for meta, text in guides:
+        parts = markup.sections(text)
+        css = ('body { background: %s; }\n' % meta['background']).encode('utf-8') \
+            if meta.get('background') else b'\n'
+        render = partial(layout().render, guide=meta, guides=nav, shared=index['shared'],
+                         guide_css=assets.add(meta['slug'] + '.css', css))
+        html = render(body=Markup('\n'.join(part for _, _, part in parts)))
+        shell = render(body=Markup(shell_body(meta, parts)), lazy=True)
+        fragments = [put_variants(SECTION % (number, part))
+                     for number, (_, _, part) in enumerate(parts)]
+        index['guides'].append(dict(meta, css=put(css), variants=put_variants(html),
+                                    shell=put_variants(shell), fragments=fragments,
+                                    sections=[{'id': anchor, 'title': title}
+                                              for anchor, title, _ in parts]))
+
+    encoded = json.dumps(index, ensure_ascii=False, sort_keys=True).encode('utf-8')
+    directory = os.path.dirname(os.path.abspath(path))
+    if path == DEFAULT_BUNDLE:
+        private_directory(directory)
+    else:
+        os.makedirs(directory, exist_ok=True)
+    # Written to a temporary name and renamed so workers never map a partial file
+    fd, tmp = tempfile.mkstemp(dir=directory, prefix='.guides-')
+    try:
+        with os.fdopen(fd, 'wb') as fh:
+            fh.write(HEADER.pack(MAGIC, len(encoded)))
+            fh.write(encoded)
+            fh.write(data)
+        os.chmod(tmp, 0o644)
+        os.replace(tmp, path)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+    return path
+
+
+class GuideBundle:
+    """Read-only, memory-mapped view of a built guide bundle"""
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, 'rb') as fh:
+            self._map = mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, size = HEADER.unpack_from(self._map) if len(self._map) >= HEADER.size \
+            else (None, 0)
+        if magic != MAGIC:
+            self._map.close()
+            raise ValueError('%s is not a guide bundle' % path)
+        self.index = json.loads(self._map[HEADER.size:HEADER.size + size])
+        self._data = memoryview(self._map)[HEADER.size + size:]
+        self.guides = self.index['guides']
+
+    def _slice(self, span) -> memoryview:
+        offset, length = span
+        return self._data[offset:offset + length]
+
+    def css(self, guide: dict) -> bytes:
+        return bytes(self._slice(guide['css']))
+
+    def _page(self, name: str, spans: dict) -> Page:
+        variants = {encoding: self._slice(span) for encoding, span in spans.items()}
+        body = variants.pop('identity')
+        return Page(name, body, None, self.index['built'], compressed=variants)
+
+    def page(self, guide: dict) -> Page:
+        """The full guide as a servable page whose bodies point into the mapped file"""
+        return self._page(guide['slug'], guide['variants'])
+
+    def shell(self, guide: dict) -> Page:
+        """The outline and first sections, with placeholders for the rest"""
+        return self._page(guide['slug'], guide['shell'])
+
+    def fragments(self, guide: dict) -> list:
+        """One ``<section>`` fragment page per ``##`` section, in order"""
+        return [self._page('%s/step/%d' % (guide['slug'], number), spans)
+                for number, spans in enumerate(guide['fragments'])]
+
+    def is_current(self, content_dir: str, shared: dict) -> bool:
+        """False when guides or shared assets changed since the build"""
+        files = sources(content_dir)
+        if (self.index.get('version') != FORMAT_VERSION
+                or self.index.get('shared') != shared
+                or self.index.get('sources') != [os.path.basename(f) for f in files]):
+            return False
+        return all(os.path.getmtime(f) <= self.index['built'] for f in files)
+
+    def check(self) -> str:
+        """Readiness check: the mapping is open and still holds a bundle"""
+        if self._map.closed or HEADER.unpack_from(self._map)[0] != MAGIC:
+            raise RuntimeError('%s is not mapped' % self.path)
+        if not self.guides:
+            raise RuntimeError('%s has no guides' % self.path)
+        return '%d guides' % len(self.guides)
+
+    def close(self):
+        self._data.release()
+        self._map.close()
+
+
+def load_bundle(assets, content_dir: str = CONTENT_DIR, path: str = DEFAULT_BUNDLE):
+    """Map the bundle at ``path``, rebuilding it first if missing or stale"""
+    if path == DEFAULT_BUNDLE:
+        private_directory(os.path.dirname(path))
+    if os.path.exists(path):
+        try:
+            bundle = GuideBundle(path)
+        except ValueError:
+            bundle = None
+        if bundle is not None:
+            if bundle.is_current(content_dir, shared_urls(assets)):
+                return bundle
+            bundle.close()
+    build_bundle(assets, content_dir, path)
+    return GuideBundle(path)
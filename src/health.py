@@ -0,0 +1,119 @@
+"""
+Liveness and readiness probes
+/livez answers as long as the worker can serve a request. /readyz serves
+the cached outcome of readiness checks that a background thread re-runs
+every READINESS_INTERVAL seconds, so a probe never runs the checks itself.
+"""
+
+import json
+import logging
+import os
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+LIVE_BODY = json.dumps({'status': 'alive'}).encode('utf-8')
+
+
+class HealthChecks:
+    """Register checks with ``add``; each returns a detail string or raises"""
+
+    def __init__(self, app=None):
+        self._checks = {}
+        self._result = (503, b'{"status": "starting"}', 0.0)
+        self._thread = None
+        self._pid = None
+        self._stop = threading.Event()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault('READINESS_INTERVAL', 5.0)
+        self.app = app
+        app.add_url_rule('/livez', 'livez', self.livez)
+        app.add_url_rule('/readyz', 'readyz', self.readyz)
+        app.extensions['health'] = self
+
+    def add(self, name: str, check):
+        self._checks[name] = check
+
+    def run_checks(self) -> bool:
+        """Run every check now and cache the response /readyz will serve"""
+        results, ready = {}, True
+        for name, check in self._checks.items():
+            try:
+                results[name] = {'ok': True, 'detail': check()}
+            except Exception as e:
+                ready = False
+                results[name] = {'ok': False, 'detail': str(e)}
+        body = json.dumps({'status': 'ready' if ready else 'not ready', 'checks': results,
+                           'checked_at': time.time()}).encode('utf-8')
+        self._result = (200 if ready else 503, body, time.monotonic())
+        return ready
+
+    def start(self):
+        """Run the checks once, then keep refreshing them in a daemon thread"""
+        self.stop()
+        self._pid = os.getpid()
+        self._stop = threading.Event()
+        self.run_checks()
+        self._thread = threading.Thread(target=self._loop, args=(self._stop,),
+                                        name='readiness-checks', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None and self._thread.is_alive():
+            self._thread.join()
+        self._thread = None
+
+    def _loop(self, stop):
+        while not stop.wait(self.app.config['READINESS_INTERVAL']):
+            try:
+                self.run_checks()
+            except Exception:
+                logger.exception('Readiness checks failed to run')
+
+    def _response(self, status: int, body: bytes):
+        return self.app.response_class(body, status=status, mimetype='application/json',
+                                       headers={'Cache-Control': 'no-store'})
+
+    def livez(self):
+        return self._response(200, LIVE_BODY)
+
+    def readyz(self):
+        if self._pid != os.getpid():
+            # Threads don't survive a fork: restart the checker in this worker
+            self.start()
+        status, body, checked = self._result
+        if time.monotonic() - checked > 3 * self.app.config['READINESS_INTERVAL']:
+            return self._response(503, b'{"status": "not ready", "error": "checks are stale"}')
+        return self._response(status, body)
+
+
+def multiproc_check(path: str):
+    """Metrics can be recorded: the multiprocess directory is writable"""
+    def check():
+        if path is None:
+            return 'in-process registry'
+        if not os.access(path, os.W_OK | os.X_OK):
+            raise RuntimeError('%s is not writable' % path)
+        return path
+    return check
+
+
+def load_check(admission):
+    """The worker is not shedding load or running at its concurrency limit"""
+    seen = [admission.shed if admission is not None else 0]
+
+    def check():
+        if admission is None:
+            return 'admission control disabled'
+        shed, seen[0] = admission.shed - seen[0], admission.shed
+        if shed:
+            raise RuntimeError('shed %d requests since the last check' % shed)
+        if admission.in_flight >= int(admission.limit.limit):
+            raise RuntimeError('at concurrency limit (%d)' % admission.in_flight)
+        return '%d/%d in flight' % (admission.in_flight, admission.limit.limit)
+    return check
@@ -0,0 +1,150 @@
+"""
+Bounded request-body ingestion for the JSON API
+Bodies are read in chunks up to a per-route byte limit and checked as they
+arrive, so an oversized or hostile payload is rejected (413/400) before the
+rest is read or anything is parsed. The checks run at C speed (regex and
+bytes methods) rather than a Python-level tokenizer:
+
+  * no run of more than ``max_digits`` digits, in numbers or strings
+  * nesting no deeper than ``max_depth``: obvious runs of openers are caught
+    per chunk, exact depth once the (bounded) body is complete
+"""
+
+import re
+from functools import lru_cache, wraps
+
+from flask import current_app, g, jsonify, request
+
+from .metrics import REQUEST_BODIES_REJECTED, endpoint_label
+from .tracing import span
+
+CHUNK_SIZE = 16384
+# Bytes of the previous chunk searched again, so matches can span chunks
+OVERLAP = 4096
+JSON = 'application/json'
+NDJSON = 'application/x-ndjson'
+STRING = re.compile(rb'"[^"\\]*(?:\\.[^"\\]*)*"')
+# Deletes every byte except brackets
+NOT_BRACKETS = bytes(b for b in range(256) if b not in b'[]{}')
+
+
+class BodyRejected(Exception):
+    """A request body that breaks a limit; becomes an error response"""
+
+    def __init__(self, status: int, message: str, reason: str):
+        super().__init__(message)
+        self.status = status
+        self.reason = reason
+
+
+@lru_cache(maxsize=16)
+def _patterns(max_digits: int, max_depth: int) -> tuple:
+    digits = re.compile(rb'[0-9]{%d}' % (max_digits + 1))
+    openers = re.compile(rb'(?:[\[{]\s*(?:"[^"\\]{0,64}"\s*:\s*)?){%d}' % (max_depth + 1))
+    return digits, openers
+
+
+def too_deep(body: bytes, max_depth: int) -> bool:
+    """Exact check: do brackets outside strings nest deeper than ``max_depth``?"""
+    brackets = STRING.sub(b'', body).translate(None, NOT_BRACKETS)
+    for _ in range(max_depth):
+        if not brackets:
+            return False
+        reduced = brackets.replace(b'{}', b'').replace(b'[]', b'')
+        if reduced == brackets:
+            return False  # unbalanced: left for the parser to reject
+        brackets = reduced
+    return b'{}' in brackets or b'[]' in brackets
+
+
+def read_body(stream, content_length, max_bytes: int, max_depth: int,
+              max_digits: int) -> bytes:
+    """Read and check a body chunk by chunk, raising ``BodyRejected`` early"""
+    if content_length is not None and content_length > max_bytes:
+        raise BodyRejected(413, 'Request body too large', 'too_large')
+    digits, openers = _patterns(max_digits, max_depth)
+    body = bytearray()
+    while True:
+        chunk = stream.read(CHUNK_SIZE)
+        if not chunk:
+            break
+        start = max(0, len(body) - OVERLAP)
+        body += chunk
+        if len(body) > max_bytes:
+            raise BodyRejected(413, 'Request body too large', 'too_large')
+        if digits.search(body, start):
+            raise BodyRejected(400, 'Number too long', 'number_too_long')
+        if openers.search(body, start):
+            raise BodyRejected(400, 'Nesting too deep', 'too_deep')
+    body = bytes(body)
+    if too_deep(body, max_depth):
+        raise BodyRejected(400, 'Nesting too deep', 'too_deep')
+    return body
+
+
+class BodyLimits:
+    """Config defaults for ``json_body``, which checks and parses a view's JSON body
+
+    Rejections are counted in ``http_request_bodies_rejected_total{endpoint, reason}``.
+    """
+
+    def __init__(self, app=None):
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault('BODY_LIMITS_ENABLED', True)
+        app.config.setdefault('JSON_MAX_BYTES', 65536)
+        app.config.setdefault('JSON_MAX_DEPTH', 32)
+        app.config.setdefault('JSON_MAX_DIGITS', 400)
+        app.extensions['body_limits'] = self
+
+
+def _read(max_bytes, max_depth, max_digits) -> bytes:
+    config = current_app.config
+    if not config['BODY_LIMITS_ENABLED']:
+        return request.get_data(cache=False)
+
+    def limit(value, key):
+        if value is None:
+            value = key
+        return config[value] if isinstance(value, str) else value
+
+    return read_body(request.stream, request.content_length,
+                     limit(max_bytes, 'JSON_MAX_BYTES'), limit(max_depth, 'JSON_MAX_DEPTH'),
+                     limit(max_digits, 'JSON_MAX_DIGITS'))
+
+
+def json_body(max_bytes=None, max_depth=None, max_digits=None, ndjson: bool = False):
+    """Decorator: read the body within limits into ``g.body`` and ``g.json``
+
+    ``g.json`` holds the parsed value for ``application/json``; with
+    ``ndjson=True`` NDJSON bodies are accepted too and left for the view to
+    split. Each limit is a number or the name of a config key read per
+    request, defaulting to JSON_MAX_BYTES, JSON_MAX_DEPTH and JSON_MAX_DIGITS.
+    """
+    mimetypes = (JSON, NDJSON) if ndjson else (JSON,)
+
+    def decorator(view):
+        @wraps(view)
+        def checked(*args, **kwargs):
+            try:
+                if request.mimetype not in mimetypes:
+                    raise BodyRejected(415, 'Content-Type must be %s' % ' or '.join(mimetypes),
+                                       'content_type')
+                with span('body.read'):
+                    g.body = _read(max_bytes, max_depth, max_digits)
+                g.json = None
+                if request.mimetype == JSON:
+                    try:
+                        with span('json.parse'):
+                            g.json = current_app.json.loads(g.body)
+                    except (ValueError, RecursionError):
+                        raise BodyRejected(400, 'Invalid JSON', 'invalid_json')
+            except BodyRejected as e:
+                REQUEST_BODIES_REJECTED.labels(endpoint=endpoint_label(request.endpoint),
+                                               reason=e.reason).inc()
+                return jsonify({'error': str(e)}), e.status
+            return view(*args, **kwargs)
+        return checked
+    return decorator
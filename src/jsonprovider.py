@@ -0,0 +1,72 @@
+"""
+Fast JSON provider
+Responses are compact, keep dict insertion order and are encoded straight
+to bytes, with orjson when it is installed and the stdlib otherwise. Both
+paths emit the same bytes (floats in exponent notation aside: ``1e16`` vs
+``1e+16``), and anything orjson can't handle falls back to the stdlib.
+NaN and infinities raise ValueError on both paths rather than becoming
+``null`` (orjson) or the invalid ``NaN`` (stdlib).
+"""
+
+import json
+import re
+
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:  # orjson is optional
+    orjson = None
+
+# orjson reads integers beyond 64 bits as floats; such bodies go to the stdlib
+LONG_INT = re.compile(r'[0-9]{19}')
+LONG_INT_BYTES = re.compile(rb'[0-9]{19}')
+# Datetimes and dataclasses are left to Flask's default() so they encode as
+# they always have (HTTP dates, asdict)
+ORJSON_OPTIONS = (orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_PASSTHROUGH_DATACLASS
+                  if orjson is not None else 0)
+
+
+class FastJSONProvider(DefaultJSONProvider):
+    """``app.json`` provider; ``dumps``/``loads`` with arguments use the stdlib"""
+
+    ensure_ascii = False
+    sort_keys = False
+
+    def __init__(self, app):
+        super().__init__(app)
+        # Built once; json.dumps() makes a new encoder per call for non-default options
+        self._encode = json.JSONEncoder(default=self.default, ensure_ascii=False,
+                                        allow_nan=False, separators=(',', ':')).encode
+
+    def dumps_bytes(self, obj) -> bytes:
+        if orjson is not None:
+            try:
+                data = orjson.dumps(obj, default=self.default, option=ORJSON_OPTIONS)
+            except TypeError:  # integers beyond 64 bits, non-string keys
+                pass
+            else:
+                # orjson writes non-finite floats as null: the stdlib rejects them
+                if b'null' not in data:
+                    return data
+        return self._encode(obj).encode('utf-8')
+
+    def dumps(self, obj, **kwargs) -> str:
+        if kwargs:
+            return super().dumps(obj, **kwargs)
+        return self.dumps_bytes(obj).decode('utf-8')
+
+    def loads(self, s, **kwargs):
+        if orjson is not None and not kwargs:
+            pattern = LONG_INT_BYTES if isinstance(s, (bytes, bytearray)) else LONG_INT
+            if not pattern.search(s):
+                try:
+                    return orjson.loads(s)
+                except orjson.JSONDecodeError:
+                    pass  # NaN, lone surrogates...: the stdlib decides
+        return super().loads(s, **kwargs)
+
+    def response(self, *args, **kwargs):
+        """Like ``jsonify``, but never pretty-printed"""
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(self.dumps_bytes(obj) + b'\n', mimetype=self.mimetype)
@@ -0,0 +1,173 @@
+"""
+Queue-based structured logging
+Request threads only enqueue records; a background listener thread formats
+and writes them, so logging I/O never adds to request latency
+"""
+
+import atexit
+import json
+import logging
+import os
+import queue
+import random
+import sys
+import uuid
+from contextvars import ContextVar
+from logging.handlers import QueueHandler, QueueListener
+from time import perf_counter_ns
+
+from flask import request
+
+from .metrics import LOG_RECORDS_DROPPED, LOG_RECORDS_SAMPLED, endpoint_label
+from .tracing import span
+
+# (request_id, endpoint, start_ns) for the request being served
+_request_ctx = ContextVar('deployhub_log_request', default=None)
+
+TEXT_FORMAT = '%(levelname)s:%(name)s:%(message)s'
+_listener = None
+
+
+def current_request_id():
+    ctx = _request_ctx.get()
+    return ctx[0] if ctx is not None else None
+
+
+def parse_sample_rates(value: str) -> dict:
+    """``'api_calculate=0.01,demo=0.5'`` -> ``{'api_calculate': 0.01, 'demo': 0.5}``"""
+    rates = {}
+    for item in filter(None, (part.strip() for part in (value or '').split(','))):
+        endpoint, _, rate = item.partition('=')
+        rates[endpoint.strip()] = float(rate)
+    return rates
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line, with request fields when present"""
+
+    def format(self, record):
+        entry = {
+            'ts': self.formatTime(record),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+        }
+        for field in ('request_id', 'endpoint', 'latency_ms'):
+            value = getattr(record, field, None)
+            if value is not None:
+                entry[field] = value
+        if record.exc_info:
+            entry['exc'] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False)
+
+
+class RequestContextFilter(logging.Filter):
+    """Attach request fields and sample INFO-and-below on busy endpoints
+
+    Runs on the request thread, so it must stay cheap: a context variable
+    read, a dict lookup and (for sampled endpoints) one random number.
+    """
+
+    def __init__(self, sample_rates: dict = None):
+        super().__init__()
+        self.sample_rates = sample_rates or {}
+
+    def filter(self, record):
+        ctx = _request_ctx.get()
+        if ctx is None:
+            return True
+        request_id, endpoint, start_ns = ctx
+        rate = self.sample_rates.get(endpoint)
+        if rate is not None and record.levelno <= logging.INFO and random.random() >= rate:
+            LOG_RECORDS_SAMPLED.inc()
+            return False
+        record.request_id = request_id
+        record.endpoint = endpoint
+        record.latency_ms = round((perf_counter_ns() - start_ns) / 1e6, 3)
+        return True
+
+
+class BoundedQueueHandler(QueueHandler):
+    """Enqueue records unformatted and count the ones a full queue drops"""
+
+    def handle(self, record):
+        with span('log', level=record.levelname):
+            return super().handle(record)
+
+    def prepare(self, record):
+        # Formatting is deferred to the listener thread
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            LOG_RECORDS_DROPPED.inc()
+
+
+class RequestLogContext:
+    """Bind a request id (X-Request-ID or a fresh one) and endpoint per request"""
+
+    def __init__(self, app=None):
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.before_request(self.before_request)
+        app.after_request(self.after_request)
+        app.teardown_request(self.teardown_request)
+
+    def before_request(self):
+        request_id = request.headers.get('X-Request-ID', '')[:128] or uuid.uuid4().hex
+        endpoint = request.endpoint
+        _request_ctx.set((request_id, endpoint and endpoint_label(endpoint), perf_counter_ns()))
+
+    def after_request(self, response):
+        request_id = current_request_id()
+        if request_id is not None:
+            response.headers['X-Request-ID'] = request_id
+        return response
+
+    def teardown_request(self, exc=None):
+        _request_ctx.set(None)
+
+
+def setup_logging(level='INFO', fmt: str = 'json', queue_size: int = 10000,
+                  sample_rates: dict = None, stream=None) -> QueueListener:
+    """Route the root logger through a bounded queue to a writer thread"""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        atexit.unregister(_listener.stop)
+    writer = logging.StreamHandler(stream or sys.stderr)
+    writer.setFormatter(JsonFormatter() if fmt == 'json' else logging.Formatter(TEXT_FORMAT))
+
+    handler = BoundedQueueHandler(queue.Queue(maxsize=queue_size))
+    handler.addFilter(RequestContextFilter(sample_rates))
+
+    root = logging.getLogger()
+    for existing in [h for h in root.handlers if isinstance(h, BoundedQueueHandler)]:
+        root.removeHandler(existing)
+    root.addHandler(handler)
+    root.setLevel(level)
+
+    _listener = QueueListener(handler.queue, writer, respect_handler_level=True)
+    _listener.start()
+    atexit.register(_listener.stop)
+    return _listener
+
+
+def _pause_listener():
+    if _listener is not None and _listener._thread is not None:
+        _listener.stop()
+
+
+def _resume_listener():
+    if _listener is not None and _listener._thread is None:
+        _listener.start()
+
+
+# A fork copies the queue but not the writer thread, which may also hold the
+# queue's lock at that moment: stop it first and start one on each side after
+os.register_at_fork(before=_pause_listener, after_in_parent=_resume_listener,
+                    after_in_child=_resume_listener)
@@ -0,0 +1,114 @@
+"""
+Markdown subset for guide content
+Covers what the guides use: ``##``/``###`` headings, paragraphs, ``-`` lists,
+fenced code (rendered as copyable ``.command`` blocks), ``**bold**``,
+```code```, ``[links](url)`` and ``::: step`` / ``::: note`` containers
+"""
+
+import re
+from html import escape
+
+INLINE = re.compile(r'\*\*(.+?)\*\*|`([^`]+)`|\[([^\]]+)\]\(([^)\s]+)\)')
+HEADING = re.compile(r'<h2 id="([^"]*)">')
+CONTAINERS = ('step', 'note')
+
+
+def slugify(text: str) -> str:
+    return re.sub(r'[^a-z0-9]+', '-', text.lower()).strip('-')
+
+
+def inline(text: str) -> str:
+    """Escape ``text`` and render bold, code and links"""
+    out, pos = [], 0
+    for match in INLINE.finditer(text):
+        out.append(escape(text[pos:match.start()], quote=False))
+        bold, code, label, url = match.groups()
+        if bold is not None:
+            out.append('<strong>%s</strong>' % inline(bold))
+        elif code is not None:
+            out.append('<code>%s</code>' % escape(code, quote=False))
+        else:
+            out.append('<a href="%s">%s</a>' % (escape(url), inline(label)))
+        pos = match.end()
+    out.append(escape(text[pos:], quote=False))
+    return ''.join(out)
+
+
+def render(text: str, toc: list = None) -> str:
+    """Render Markdown to HTML; ``##`` headings are appended to ``toc`` as ``(id, title)``"""
+    lines = text.splitlines()
+    html, _ = _blocks(lines, 0, toc if toc is not None else [])
+    return '\n'.join(html)
+
+
+def sections(text: str) -> list:
+    """Render Markdown split at top-level ``##`` headings into ``(id, title, html)``
+
+    Anything before the first heading belongs to the first section; joined
+    with newlines, the sections' HTML is exactly ``render(text)``.
+    """
+    toc = []
+    blocks, _ = _blocks(text.splitlines(), 0, toc)
+    titles = dict(toc)
+    out = []
+    for block in blocks:
+        match = HEADING.match(block)
+        if not out or (match and out[-1][0] is not None):
+            out.append([None, '', []])
+        if match and out[-1][0] is None:
+            out[-1][:2] = match.group(1), titles[match.group(1)]
+        out[-1][2].append(block)
+    return [(anchor or '', title, '\n'.join(html)) for anchor, title, html in out]
+
+
+def _blocks(lines, i, toc, closing=False):
+    html, paragraph, items = [], [], []
+
+    def flush():
+        if paragraph:
+            html.append('<p>%s</p>' % inline(' '.join(paragraph)))
+            paragraph.clear()
+        if items:
+            html.append('<ul>\n%s\n</ul>' % '\n'.join('<li>%s</li>' % inline(item)
+                                                       for item in items))
+            items.clear()
+
+    while i < len(lines):
+        line = lines[i].strip()
+        i += 1
+        if line == ':::' and closing:
+            break
+        if line.startswith(':::') and line[3:].strip() in CONTAINERS:
+            flush()
+            inner, i = _blocks(lines, i, toc, closing=True)
+            html.append('<div class="%s">\n%s\n</div>' % (line[3:].strip(), '\n'.join(inner)))
+        elif line.startswith('```'):
+            flush()
+            code = []
+            while i < len(lines) and not lines[i].strip().startswith('```'):
+                code.append(lines[i])
+                i += 1
+            i += 1
+            html.append('<div class="command">%s</div>' % escape('\n'.join(code), quote=False))
+        elif line.startswith('#'):
+            flush()
+            level = len(line) - len(line.lstrip('#'))
+            title = line[level:].strip()
+            if level == 2:
+                anchor = slugify(title)
+                toc.append((anchor, title))
+                html.append('<h2 id="%s">%s</h2>' % (anchor, inline(title)))
+            else:
+                html.append('<h%d>%s</h%d>' % (level, inline(title), level))
+        elif line.startswith('- '):
+            if paragraph:
+                flush()
+            items.append(line[2:])
+        elif not line:
+            flush()
+        elif items:
+            items[-1] += ' ' + line
+        else:
+            paragraph.append(line)
+    flush()
+    return html, i
@@ -0,0 +1,92 @@
+"""
+Per-worker memory accounting
+RSS counts every resident page a process maps, so pages a worker still
+shares with the gunicorn master are counted once per worker. PSS splits
+each shared page between the processes mapping it (summed over workers it
+is their real footprint) and USS counts only private pages (what exiting
+would free). A background thread reads them from /proc every
+MEMORY_SAMPLE_INTERVAL seconds into ``process_memory_bytes{kind}``.
+"""
+
+import logging
+import threading
+
+from .metrics import PROCESS_MEMORY
+
+logger = logging.getLogger(__name__)
+
+KINDS = ('rss', 'pss', 'uss', 'shared')
+# smaps fields (in kB) summed into each kind
+FIELDS = {
+    b'Rss': 'rss',
+    b'Pss': 'pss',
+    b'Private_Clean': 'uss',
+    b'Private_Dirty': 'uss',
+    b'Shared_Clean': 'shared',
+    b'Shared_Dirty': 'shared',
+}
+
+
+def read_memory(pid='self') -> dict:
+    """Bytes of each kind for ``pid``, or None where /proc has no smaps"""
+    for name in ('smaps_rollup', 'smaps'):
+        try:
+            with open('/proc/%s/%s' % (pid, name), 'rb') as fh:
+                data = fh.read()
+        except OSError:
+            continue
+        totals = dict.fromkeys(KINDS, 0)
+        for line in data.splitlines():
+            field, _, rest = line.partition(b':')
+            kind = FIELDS.get(field)
+            if kind is not None:
+                totals[kind] += int(rest.split()[0]) * 1024
+        return totals
+    return None
+
+
+class MemoryStats:
+    """Keeps this process's ``process_memory_bytes`` gauges up to date"""
+
+    def __init__(self, app=None):
+        self._thread = None
+        self._stop = threading.Event()
+        self._gauges = {kind: PROCESS_MEMORY.labels(kind=kind) for kind in KINDS}
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault('MEMORY_SAMPLE_INTERVAL', 15.0)
+        self.app = app
+        app.extensions['memory_stats'] = self
+
+    def sample(self) -> dict:
+        """Read this process's memory now and update the gauges"""
+        totals = read_memory()
+        if totals is not None:
+            for kind, value in totals.items():
+                self._gauges[kind].set(value)
+        return totals
+
+    def start(self):
+        """Sample once, then keep sampling in a daemon thread (one per process)"""
+        self.stop()
+        self._stop = threading.Event()
+        if self.sample() is None:
+            return  # no /proc: nothing to report
+        self._thread = threading.Thread(target=self._loop, args=(self._stop,),
+                                        name='memory-stats', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None and self._thread.is_alive():
+            self._thread.join()
+        self._thread = None
+
+    def _loop(self, stop):
+        while not stop.wait(self.app.config['MEMORY_SAMPLE_INTERVAL']):
+            try:
+                self.sample()
+            except Exception:
+                logger.exception('Memory sampling failed')
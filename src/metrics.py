@@ -0,0 +1,172 @@
+"""
+Prometheus request instrumentation
+Label children are bound once per endpoint so the per-request path is a
+couple of dict lookups and lock-protected increments
+"""
+
+import os
+from collections import deque
+from contextvars import ContextVar
+from functools import partial
+from time import perf_counter_ns
+
+from prometheus_client import Counter, Gauge, Histogram
+
+from .tracing import span
+
+# Set by gunicorn.conf.py before workers import the app
+MULTIPROCESS = bool(os.environ.get('PROMETHEUS_MULTIPROC_DIR'))
+
+REQUEST_COUNT = Counter('http_requests_total', 'Total HTTP requests',
+                        ['method', 'endpoint', 'status'])
+REQUEST_DURATION = Histogram('http_request_duration_seconds',
+                             'HTTP request duration', ['method', 'endpoint'])
+RESPONSE_SIZE = Histogram('http_response_size_bytes', 'HTTP response body size',
+                          ['method', 'endpoint'],
+                          buckets=(256, 1024, 4096, 16384, 65536, 262144, 1048576))
+LOG_RECORDS_DROPPED = Counter('log_records_dropped',
+                              'Log records dropped because the log queue was full')
+LOG_RECORDS_SAMPLED = Counter('log_records_sampled_out',
+                              'INFO log records skipped by per-endpoint sampling')
+RATELIMIT_THROTTLED = Counter('http_requests_throttled',
+                              'Requests rejected with 429 by the rate limiter', ['endpoint'])
+REQUEST_BODIES_REJECTED = Counter('http_request_bodies_rejected',
+                                  'Request bodies rejected by size, number or nesting limits',
+                                  ['endpoint', 'reason'])
+STATIC_RESPONSES = Counter('http_static_responses',
+                           'Responses served from the exported static site', ['status'])
+REQUESTS_SHED = Counter('http_requests_shed',
+                        'Requests rejected with 503 by load shedding', ['reason'])
+# Summed over live workers: the total number of requests the service admits at once
+CONCURRENCY_LIMIT = Gauge('http_concurrency_limit', 'Adaptive concurrency limit',
+                          multiprocess_mode='livesum')
+IN_FLIGHT = Gauge('http_requests_in_flight', 'HTTP requests currently being served',
+                  multiprocess_mode='livesum')
+# One series per live worker (pid label) when metrics are multiprocess
+PROCESS_MEMORY = Gauge('process_memory_bytes',
+                       'Memory of this process by kind (rss, pss, uss, shared)', ['kind'],
+                       multiprocess_mode='liveall')
+
+# Per-request holder for the matched endpoint, filled in during URL routing
+_endpoint = ContextVar('deployhub_endpoint')
+
+
+def endpoint_label(endpoint: str) -> str:
+    """``guides.aws`` -> ``aws``: labels don't change when a route moves between blueprints"""
+    return endpoint.rpartition('.')[2]
+
+
+class EndpointMetrics:
+    """Pre-bound label children for one (method, endpoint) pair"""
+
+    __slots__ = ('method', 'endpoint', 'observe_duration', 'observe_size', 'counts')
+
+    def __init__(self, method: str, endpoint: str):
+        self.method = method
+        self.endpoint = endpoint
+        self.observe_duration = REQUEST_DURATION.labels(method=method, endpoint=endpoint).observe
+        self.observe_size = RESPONSE_SIZE.labels(method=method, endpoint=endpoint).observe
+        self.counts = {}
+
+    def count(self, status: int):
+        """Bound ``inc`` for the request counter of one status code"""
+        inc = self.counts.get(status)
+        if inc is None:
+            child = REQUEST_COUNT.labels(method=self.method, endpoint=self.endpoint,
+                                         status=status)
+            inc = self.counts[status] = child.inc
+        return inc
+
+    def record(self, status: int, duration_ns: int, size):
+        self.count(status)(1)
+        self.observe_duration(duration_ns / 1e9)
+        if size is not None:
+            self.observe_size(size)
+
+
+class RequestMetrics:
+    """Record count, duration, response size and in-flight requests
+
+    Installed as WSGI middleware around ``app.wsgi_app`` so it times the
+    whole Flask dispatch without touching the request context proxies; the
+    endpoint is handed over by a URL value preprocessor. Call
+    ``bind_routes()`` once every route is registered to pre-bind the label
+    children; endpoints seen later are bound on first use.
+    """
+
+    def __init__(self, app=None):
+        self._bound = {}
+        if MULTIPROCESS:
+            # Callback gauges are not shared between processes
+            self._enter, self._exit = IN_FLIGHT.inc, IN_FLIGHT.dec
+        else:
+            # deque append/pop are atomic, so in-flight tracking needs no
+            # lock; the gauge reads the length at scrape time
+            active = deque()
+            IN_FLIGHT.set_function(active.__len__)
+            self._enter, self._exit = partial(active.append, None), active.pop
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.app = app
+        self.wsgi_app = app.wsgi_app
+        app.wsgi_app = self
+        app.url_value_preprocessor(self._capture_endpoint)
+        app.extensions['request_metrics'] = self
+
+    @staticmethod
+    def _capture_endpoint(endpoint, values):
+        holder = _endpoint.get(None)
+        if holder is not None and endpoint is not None:
+            holder[0] = endpoint_label(endpoint)
+
+    def bind_routes(self):
+        for rule in self.app.url_map.iter_rules():
+            for method in rule.methods - {'OPTIONS'}:
+                self.bind(method, endpoint_label(rule.endpoint))
+        for method in ('GET', 'POST', 'HEAD'):
+            self.bind(method, 'unknown')
+
+    def bind(self, method: str, endpoint: str) -> EndpointMetrics:
+        key = (method, endpoint)
+        metrics = self._bound.get(key)
+        if metrics is None:
+            metrics = self._bound[key] = EndpointMetrics(method, endpoint)
+        return metrics
+
+    def __call__(self, environ, start_response):
+        start = perf_counter_ns()
+        captured = []
+        holder = ['unknown']
+        token = _endpoint.set(holder)
+
+        def capture(status, headers, exc_info=None):
+            captured.append(status)
+            captured.append(headers)
+            return start_response(status, headers, exc_info)
+
+        self._enter()
+        try:
+            result = self.wsgi_app(environ, capture)
+        finally:
+            self._exit()
+            _endpoint.reset(token)
+        duration = perf_counter_ns() - start
+        if captured:
+            with span('metrics.record'):
+                self.record(environ['REQUEST_METHOD'], holder[0], captured[0], captured[1],
+                            duration)
+        return result
+
+    def record(self, method: str, endpoint: str, status: str, headers, duration_ns: int):
+        key = (method, endpoint)
+        metrics = self._bound.get(key)
+        if metrics is None:
+            metrics = self.bind(*key)
+        size = None
+        for name, value in headers:
+            if name == 'Content-Length':
+                size = int(value)
+                break
+        metrics.record(int(status[:3]), duration_ns, size)
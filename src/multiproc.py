@@ -0,0 +1,98 @@
+"""
+Multiprocess Prometheus metrics for gunicorn
+Workers write their metrics to mmap-backed files in PROMETHEUS_MULTIPROC_DIR
+and /metrics aggregates them. This module is imported by the gunicorn master,
+so it must not create any metrics itself.
+"""
+
+import fcntl
+import glob
+import os
+from contextlib import contextmanager
+
+from prometheus_client import CollectorRegistry, generate_latest
+from prometheus_client.mmap_dict import MmapedDict
+from prometheus_client.multiprocess import MultiProcessCollector, mark_process_dead
+
+# Metric types whose samples are summed across processes and so can be
+# folded into a single archive file once a worker has exited
+ARCHIVABLE_TYPES = ('counter', 'histogram', 'summary')
+LOCK_FILE = '.scrape.lock'
+
+# Gunicorn calls child_exit from its SIGCHLD handler, so worker_exited can be
+# re-entered while a compaction holds the lock; queue and drain instead
+_pending = []
+_compacting = False
+
+
+def multiproc_dir():
+    return os.environ.get('PROMETHEUS_MULTIPROC_DIR') or None
+
+
+def reset_directory(path: str):
+    """Remove metric files left by a previous run (called once on master start)
+
+    Only the ``*.db`` files are removed: PROMETHEUS_MULTIPROC_DIR may name a
+    directory that holds other things.
+    """
+    os.makedirs(path, exist_ok=True)
+    for filename in glob.glob(os.path.join(path, '*.db')):
+        os.remove(filename)
+
+
+@contextmanager
+def _locked(path: str, mode: int):
+    with open(os.path.join(path, LOCK_FILE), 'a') as fh:
+        fcntl.flock(fh, mode)
+        try:
+            yield
+        finally:
+            fcntl.flock(fh, fcntl.LOCK_UN)
+
+
+def compact_worker(pid: int, path: str):
+    """Fold a dead worker's counters and histograms into the archive files
+
+    Keeps the number of files a scrape has to read proportional to the live
+    worker count rather than to every worker that has ever run.
+    """
+    with _locked(path, fcntl.LOCK_EX):
+        for typ in ARCHIVABLE_TYPES:
+            source = os.path.join(path, '%s_%d.db' % (typ, pid))
+            if not os.path.exists(source):
+                continue
+            archive = MmapedDict(os.path.join(path, '%s_archive.db' % typ))
+            try:
+                for key, value, timestamp, _ in MmapedDict.read_all_values_from_file(source):
+                    current, _ = archive.read_value(key)
+                    archive.write_value(key, current + value, timestamp)
+            finally:
+                archive.close()
+            os.remove(source)
+
+
+def worker_exited(pid: int, path: str):
+    """Gunicorn child_exit bookkeeping: drop live gauges, archive the rest"""
+    global _compacting
+    mark_process_dead(pid, path)
+    _pending.append(pid)
+    if _compacting:
+        return
+    _compacting = True
+    try:
+        while _pending:
+            compact_worker(_pending.pop(), path)
+    finally:
+        _compacting = False
+
+
+def generate(path: str, encoder=generate_latest) -> bytes:
+    """Render metrics aggregated across every worker's files"""
+    registry = CollectorRegistry()
+    MultiProcessCollector(registry, path)
+    with _locked(path, fcntl.LOCK_SH):
+        return encoder(registry)
+
+
+def file_count(path: str) -> int:
+    return len(glob.glob(os.path.join(path, '*.db')))
@@ -0,0 +1,200 @@
+"""
+Pre-rendered page cache for the guide routes
+Templates are compiled once, rendered once and served as cached bytes
+with strong ETags, conditional (304) handling and pre-compressed variants
+"""
+
+import hashlib
+import time
+
+from flask import current_app, request
+from werkzeug.http import http_date, parse_date, parse_etags
+
+from .compression import compress_static, negotiate
+
+DEFAULT_CACHE_CONTROL = 'public, max-age=300'
+
+
+class Variant:
+    """One encoding of a page body"""
+
+    __slots__ = ('encoding', 'body', 'content_length', 'etag')
+
+    def __init__(self, encoding: str, body: bytes, etag: str):
+        self.encoding = encoding
+        self.body = body
+        self.content_length = str(len(body))
+        self.etag = etag
+
+
+class Page:
+    """A rendered page ready to be written to the wire"""
+
+    __slots__ = ('name', 'body', 'content_length', 'source_hash', 'content_type',
+                 'etag', 'last_modified', 'last_modified_ts', '_variants')
+
+    def __init__(self, name: str, body: bytes, source_hash: str, last_modified: float,
+                 content_type: str = 'text/html; charset=utf-8', compressed: dict = None):
+        self.name = name
+        self.content_type = content_type
+        self.body = body
+        self.content_length = str(len(body))
+        self.source_hash = source_hash
+        digest = hashlib.sha256(body).hexdigest()[:32]
+        self.etag = '"%s"' % digest
+        self.last_modified_ts = int(last_modified)
+        self.last_modified = http_date(self.last_modified_ts)
+        self._variants = None if compressed is None else self._encode(compressed)
+
+    def _encode(self, compressed: dict) -> dict:
+        # Each representation needs its own strong validator
+        digest = self.etag.strip('"')
+        variants = {'identity': Variant('identity', self.body, self.etag)}
+        for encoding, data in compressed.items():
+            variants[encoding] = Variant(encoding, data, '"%s-%s"' % (digest, encoding))
+        return variants
+
+    @property
+    def variants(self) -> dict:
+        """Variants by encoding; compressed on first use unless given up front"""
+        if self._variants is None:
+            self._variants = self._encode(compress_static(self.body))
+        return self._variants
+
+    def select(self, accept_encoding) -> Variant:
+        return self.variants[negotiate(accept_encoding, self.variants)]
+
+    def is_not_modified(self, if_none_match, if_modified_since, etag: str = None) -> bool:
+        """Evaluate conditional request headers (If-None-Match wins)"""
+        if if_none_match:
+            return parse_etags(if_none_match).contains_weak((etag or self.etag).strip('"'))
+        if if_modified_since:
+            since = parse_date(if_modified_since)
+            return since is not None and self.last_modified_ts <= since.timestamp()
+        return False
+
+
+def _hash_source(source: str) -> str:
+    return hashlib.sha1(source.encode('utf-8')).hexdigest()
+
+
+def serve_page(page: Page, cache_control: str):
+    """Build the response for a cached page, or a bodiless 304"""
+    variant = page.select(request.headers.get('Accept-Encoding'))
+    headers = {'ETag': variant.etag,
+               'Last-Modified': page.last_modified,
+               'Cache-Control': cache_control,
+               'Vary': 'Accept-Encoding'}
+    if page.is_not_modified(request.headers.get('If-None-Match'),
+                            request.headers.get('If-Modified-Since'),
+                            variant.etag):
+        return current_app.response_class(status=304, headers=headers)
+    headers['Content-Type'] = page.content_type
+    headers['Content-Length'] = variant.content_length
+    if variant.encoding != 'identity':
+        headers['Content-Encoding'] = variant.encoding
+    # Bundled pages are memoryviews into a shared mapping; servers want bytes
+    return current_app.response_class((bytes(variant.body),), headers=headers)
+
+
+class PageCache:
+    """Compile and render each registered template exactly once
+
+    Sources are registered as callables returning the template string, so
+    in development (``TEMPLATES_AUTO_RELOAD`` or debug mode) a changed
+    source is detected and the page is rebuilt on the next request.
+    ``transform(name, html)`` post-processes each page after rendering.
+    """
+
+    def __init__(self, app=None, last_modified: float = None, transform=None):
+        self.app = None
+        self.last_modified = last_modified
+        self.transform = transform
+        self._sources = {}
+        self._cache_control = {}
+        self._pages = {}
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.app = app
+        app.config.setdefault('PAGE_CACHE_CONTROL', DEFAULT_CACHE_CONTROL)
+        app.extensions['page_cache'] = self
+
+    def add(self, name: str, page: Page, cache_control: str = None):
+        """Serve an already-built page as is; it is never re-rendered"""
+        self._sources[name] = None
+        self._pages[name] = page
+        if cache_control is not None:
+            self._cache_control[name] = cache_control
+
+    def register(self, name: str, source, cache_control: str = None):
+        """Register a template source (string or zero-arg callable)
+
+        ``cache_control`` overrides the app-wide ``PAGE_CACHE_CONTROL`` policy.
+        """
+        if isinstance(source, str):
+            text = source
+            source = lambda: text  # noqa: E731
+        self._sources[name] = source
+        if cache_control is not None:
+            self._cache_control[name] = cache_control
+        self._pages.pop(name, None)
+
+    def cache_control(self, name: str) -> str:
+        return self._cache_control.get(name, self.app.config['PAGE_CACHE_CONTROL'])
+
+    @property
+    def auto_reload(self) -> bool:
+        if self.app is None:
+            return False
+        reload = self.app.config.get('TEMPLATES_AUTO_RELOAD')
+        return self.app.debug if reload is None else bool(reload)
+
+    def _build(self, name: str, source: str, rebuilt: bool = False) -> Page:
+        template = self.app.jinja_env.from_string(source)
+        html = template.render()
+        if self.transform is not None:
+            html = self.transform(name, html)
+        body = html.encode('utf-8')
+        if rebuilt or self.last_modified is None:
+            last_modified = time.time()
+        else:
+            last_modified = self.last_modified
+        return Page(name, body, _hash_source(source), last_modified)
+
+    def build_all(self):
+        """Render and compress every page up front (e.g. in a preloading master)"""
+        for name, source in self._sources.items():
+            if source is not None:
+                self._pages[name] = self._build(name, source())
+        for page in self._pages.values():
+            page.variants  # compressed on first access
+
+    def invalidate(self, name: str = None):
+        names = list(self._pages) if name is None else [name]
+        for name in names:
+            if self._sources.get(name) is not None:
+                self._pages.pop(name, None)
+
+    def get(self, name: str) -> Page:
+        page = self._pages.get(name)
+        if page is not None and not self.auto_reload:
+            return page
+        source = self._sources[name]
+        if source is None:
+            return page
+        source = source()
+        if page is None or page.source_hash != _hash_source(source):
+            page = self._pages[name] = self._build(name, source, rebuilt=page is not None)
+        return page
+
+    def response(self, name: str):
+        """Serve a cached page, or a bodiless 304 when the client is current"""
+        return serve_page(self.get(name), self.cache_control(name))
+
+    def __contains__(self, name):
+        return name in self._sources
+
+    def __iter__(self):
+        return iter(self._sources)
@@ -0,0 +1,51 @@
+"""
+Memory shared between gunicorn workers
+With ``preload_app`` (PRELOAD=1) the master builds the app once and forks
+its workers from it, so the guide bundle, rendered and compressed pages,
+compiled templates and the search index exist once, shared copy-on-write.
+``prepare`` builds everything a worker would otherwise build on first use
+and stops the master's background threads; ``gc.freeze`` before each fork
+keeps the collector from writing to every inherited object, which would
+copy its page into the worker. Reference counts still dirty the pages of
+objects a worker uses, so workers are recycled after MAX_REQUESTS.
+"""
+
+import gc
+
+# Extensions running a background thread: one per process, never forked
+THREADED = ('health', 'memory_stats')
+
+
+def warm(app):
+    """Build the state that is otherwise built on first use, in every worker"""
+    for name in ('page_cache', 'assets'):
+        if name in app.extensions:
+            app.extensions[name].build_all()
+    if 'guide_bundle' in app.extensions:
+        from .blueprints.guides import search_index
+        search_index(app)
+
+
+def prepare(app):
+    """In the master once the app is loaded: warm it and stop its threads"""
+    warm(app)
+    for name in THREADED:
+        if name in app.extensions:
+            app.extensions[name].stop()
+    gc.collect()
+
+
+def before_fork():
+    """In the master: move every object into the collector's permanent generation"""
+    gc.freeze()
+
+
+def after_fork(app):
+    """In a new worker: start the threads the master stopped, report its gauges"""
+    for name in THREADED:
+        if name in app.extensions:
+            app.extensions[name].start()
+    # Set in the master; multiprocess gauges are per process, so each worker
+    # reports its own value or the livesum misses it
+    if 'admission' in app.extensions:
+        app.extensions['admission'].publish()
@@ -0,0 +1,259 @@
+"""
+On-demand statistical profiler
+The sampler periodically snapshots every other thread's Python stack
+(``sys._current_frames``) and counts identical stacks, so a live worker can
+be profiled without tracing hooks or a restart. Results are returned as
+collapsed stacks (flamegraph.pl, speedscope, inferno) or speedscope JSON.
+Profiles run in a background thread and are written to PROFILE_DIR, so the
+worker's threads keep serving (a sync worker's only thread would otherwise
+be held by the profile request): GET /debug/profile?seconds=N starts one
+and returns its name, GET /debug/profile/<name> fetches it once written,
+and ``install_signal_handler`` starts one on SIGUSR2.
+"""
+
+import json
+import logging
+import math
+import os
+import re
+import signal
+import sys
+import tempfile
+import threading
+import time
+from time import perf_counter
+
+from flask import Response, jsonify, request, url_for
+
+from .debug import debug_only
+
+logger = logging.getLogger(__name__)
+
+# Output file suffix and content type per format
+FORMATS = {
+    'collapsed': ('.collapsed', 'text/plain'),
+    'speedscope': ('.speedscope.json', 'application/json'),
+}
+PROFILE_NAME = re.compile(r'profile-\d+-\d+$')
+SPEEDSCOPE_SCHEMA = 'https://www.speedscope.app/file-format-schema.json'
+
+
+def _paths() -> list:
+    return sorted((os.path.join(os.path.abspath(p), '') for p in sys.path if p),
+                  key=len, reverse=True)
+
+
+class Profile:
+    """Sample counts per ``(thread id, stack)``; stacks are code objects, innermost first"""
+
+    def __init__(self, counts: dict, threads: dict, duration: float, samples: int,
+                 busy: float, interval: float):
+        self.counts = counts
+        self.threads = threads
+        self.duration = duration
+        self.samples = samples
+        self.interval = interval
+        # Fraction of wall time the sampler itself held the GIL
+        self.overhead = busy / duration if duration else 0.0
+        self._labels = {}
+        self._paths = _paths()
+
+    def label(self, code) -> str:
+        name = self._labels.get(code)
+        if name is None:
+            filename = code.co_filename
+            for prefix in self._paths:
+                if filename.startswith(prefix):
+                    filename = filename[len(prefix):]
+                    break
+            name = self._labels[code] = '%s (%s:%d)' % (
+                code.co_qualname, filename, code.co_firstlineno)
+        return name
+
+    def _thread(self, ident) -> str:
+        return self.threads.get(ident, 'thread-%d' % ident)
+
+    def collapsed(self) -> str:
+        """``thread;outer;...;inner count`` lines, heaviest first"""
+        lines = []
+        for (ident, stack), count in sorted(self.counts.items(), key=lambda item: -item[1]):
+            frames = [self._thread(ident)] + [self.label(code) for code in reversed(stack)]
+            lines.append('%s %d' % (';'.join(f.replace(';', ',') for f in frames), count))
+        return '\n'.join(lines) + '\n'
+
+    def speedscope(self) -> dict:
+        """A speedscope file with one sampled profile per thread"""
+        frames, index = [], {}
+        profiles = {}
+        for (ident, stack), count in self.counts.items():
+            sample = []
+            for code in reversed(stack):
+                if code not in index:
+                    index[code] = len(frames)
+                    frames.append({'name': self.label(code), 'file': code.co_filename,
+                                   'line': code.co_firstlineno})
+                sample.append(index[code])
+            profile = profiles.setdefault(ident, {
+                'type': 'sampled', 'name': self._thread(ident), 'unit': 'seconds',
+                'startValue': 0, 'endValue': self.duration, 'samples': [], 'weights': []})
+            profile['samples'].append(sample)
+            profile['weights'].append(count * self.duration / max(self.samples, 1))
+        return {'$schema': SPEEDSCOPE_SCHEMA, 'name': 'deployhub pid %d' % os.getpid(),
+                'exporter': 'deployhub', 'shared': {'frames': frames},
+                'profiles': list(profiles.values())}
+
+
+def sample(seconds: float, interval: float = 0.01, max_overhead: float = 0.05) -> Profile:
+    """Sample every thread but the caller's for ``seconds``
+
+    Walking stacks holds the GIL, so the wait between samples stretches to
+    keep the sampler's share of wall time under ``max_overhead``.
+    """
+    me = threading.get_ident()
+    counts, threads = {}, {}
+    samples, busy = 0, 0.0
+    start = perf_counter()
+    deadline = start + seconds
+    while True:
+        begin = perf_counter()
+        if begin >= deadline:
+            break
+        for ident, frame in sys._current_frames().items():
+            if ident == me:
+                continue
+            stack = []
+            while frame is not None:
+                stack.append(frame.f_code)
+                frame = frame.f_back
+            key = (ident, tuple(stack))
+            counts[key] = counts.get(key, 0) + 1
+        frame = None
+        for thread in threading.enumerate():
+            threads.setdefault(thread.ident, thread.name)
+        samples += 1
+        cost = perf_counter() - begin
+        busy += cost
+        time.sleep(max(interval, cost / max_overhead) - cost)
+    return Profile(counts, threads, perf_counter() - start, samples, busy, interval)
+
+
+class Profiler:
+    """/debug/profile plus a signal that profiles into PROFILE_DIR
+
+    One profile runs per worker at a time; the duration is capped by
+    PROFILE_MAX_SECONDS and the sampling cost by PROFILE_MAX_OVERHEAD.
+    """
+
+    def __init__(self, app=None):
+        self._running = threading.Lock()
+        # Samples and overhead of the last profile written by this worker
+        self._last = (None, None)
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        config = app.config
+        config.setdefault('PROFILE_MAX_SECONDS', 30.0)
+        config.setdefault('PROFILE_INTERVAL_MS', 10.0)
+        config.setdefault('PROFILE_MAX_OVERHEAD', 0.05)
+        config.setdefault('PROFILE_SIGNAL_SECONDS', 10.0)
+        config.setdefault('PROFILE_DIR', tempfile.gettempdir())
+        self.app = app
+        app.add_url_rule('/debug/profile', 'debug_profile', debug_only(self.view))
+        app.add_url_rule('/debug/profile/<name>', 'debug_profile_result',
+                         debug_only(self.result))
+        app.extensions['profiler'] = self
+
+    def _sample(self, seconds: float) -> Profile:
+        config = self.app.config
+        return sample(seconds, config['PROFILE_INTERVAL_MS'] / 1000,
+                      config['PROFILE_MAX_OVERHEAD'])
+
+    def profile(self, seconds: float):
+        """Run the sampler, or return None when a profile is already running"""
+        if not self._running.acquire(blocking=False):
+            return None
+        try:
+            return self._sample(seconds)
+        finally:
+            self._running.release()
+
+    def start(self, seconds: float):
+        """Profile in a background thread and write the files to PROFILE_DIR
+
+        Returns the path of the files without extension, or None when a
+        profile is already running.
+        """
+        if not self._running.acquire(blocking=False):
+            return None
+        base = os.path.join(self.app.config['PROFILE_DIR'],
+                            'profile-%d-%d' % (os.getpid(), time.time_ns() // 1000000))
+        try:
+            threading.Thread(target=self.profile_to_file, args=(seconds, base),
+                             name='profiler', daemon=True).start()
+        except BaseException:
+            self._running.release()
+            raise
+        return base
+
+    def profile_to_file(self, seconds: float, base: str):
+        """Sample, then write ``base`` in every format; releases the lock ``start`` took"""
+        try:
+            profile = self._sample(seconds)
+            for fmt, (suffix, _) in FORMATS.items():
+                data = (profile.collapsed() if fmt == 'collapsed'
+                        else json.dumps(profile.speedscope()))
+                # Written aside and renamed, so a fetch never sees half a file
+                with open(base + suffix + '.tmp', 'w', encoding='utf-8') as fh:
+                    fh.write(data)
+                os.replace(base + suffix + '.tmp', base + suffix)
+            self._last = (os.path.basename(base), profile)
+        finally:
+            self._running.release()
+        logger.info('Profile written to %s.{collapsed,speedscope.json} '
+                    '(%d samples, %.2f%% overhead)', base, profile.samples,
+                    profile.overhead * 100)
+
+    def view(self):
+        limit = self.app.config['PROFILE_MAX_SECONDS']
+        seconds = request.args.get('seconds', 5.0, type=float)
+        if not 0 < seconds <= limit:
+            return jsonify({'error': 'seconds must be between 0 and %g' % limit}), 400
+        base = self.start(seconds)
+        if base is None:
+            return jsonify({'error': 'A profile is already running'}), 409
+        name = os.path.basename(base)
+        url = url_for('debug_profile_result', name=name)
+        response = jsonify({'profile': name, 'seconds': seconds, 'url': url,
+                            'files': [base + suffix for suffix, _ in FORMATS.values()]})
+        response.headers.update({'Location': url, 'Retry-After': str(math.ceil(seconds))})
+        return response, 202
+
+    def result(self, name: str):
+        """A finished profile, as collapsed stacks or ``?format=speedscope``"""
+        fmt = request.args.get('format', 'collapsed')
+        if fmt not in FORMATS:
+            return jsonify({'error': 'format must be one of: %s' % ', '.join(FORMATS)}), 400
+        suffix, mimetype = FORMATS[fmt]
+        path = os.path.join(self.app.config['PROFILE_DIR'], name + suffix)
+        if not PROFILE_NAME.match(name) or not os.path.exists(path):
+            return jsonify({'error': 'No such profile (or it is still running)'}), 404
+        with open(path, encoding='utf-8') as fh:
+            response = Response(fh.read(), mimetype=mimetype)
+        last, profile = self._last
+        if last == name:
+            response.headers['X-Profile-Samples'] = str(profile.samples)
+            response.headers['X-Profile-Overhead'] = '%.4f' % profile.overhead
+        return response
+
+    def install_signal_handler(self, signum: int = signal.SIGUSR2):
+        """Profile for PROFILE_SIGNAL_SECONDS in the background on ``signum``
+
+        Call from the worker process (gunicorn's ``post_worker_init``):
+        gunicorn resets signal handlers when it forks a worker.
+        """
+        signal.signal(signum, self._on_signal)
+
+    def _on_signal(self, signum, frame):
+        if self.start(self.app.config['PROFILE_SIGNAL_SECONDS']) is None:
+            logger.warning('Profile requested while one is already running')
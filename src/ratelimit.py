@@ -0,0 +1,170 @@
+"""
+Per-client token-bucket rate limiting
+Buckets live in a memory-mapped table so every gunicorn worker sees the same
+state; the table is backed by RATELIMIT_STORAGE (a file) when workers share
+it, or by anonymous memory in a single process.
+"""
+
+import fcntl
+import hashlib
+import math
+import mmap
+import os
+import struct
+import threading
+import time
+from functools import partial, wraps
+
+from flask import current_app, jsonify, make_response, request
+
+from .metrics import RATELIMIT_THROTTLED
+
+# key hash, tokens left, last update (unix time)
+SLOT = struct.Struct('=Qdd')
+DEFAULT_SLOTS = 65536
+LOCK_STRIPES = 64
+
+
+def key_hash(key: str) -> int:
+    """Stable across processes (unlike ``hash()``); 0 marks an empty slot"""
+    return int.from_bytes(hashlib.blake2b(key.encode('utf-8'), digest_size=8).digest(),
+                          'little') or 1
+
+
+class BucketTable:
+    """Fixed-size, direct-mapped table of token buckets
+
+    A key hashes to exactly one slot. A different key landing on the same
+    slot takes it over with the tokens left in it, so keys that collide
+    share a bucket rather than a new key resetting it to full. Slots are updated
+    under a thread lock and, when file-backed, an fcntl lock on the slot's
+    byte range so workers never lose each other's updates.
+    """
+
+    def __init__(self, path: str = None, slots: int = DEFAULT_SLOTS):
+        self.path = path
+        self.slots = slots
+        size = slots * SLOT.size
+        if path is None:
+            self._fd = None
+            self._map = mmap.mmap(-1, size)
+        else:
+            # O_NOFOLLOW: never map (and truncate) whatever a symlink points at
+            self._fd = os.open(path, os.O_RDWR | os.O_CREAT | os.O_NOFOLLOW, 0o600)
+            if os.fstat(self._fd).st_size < size:
+                os.ftruncate(self._fd, size)
+            self._map = mmap.mmap(self._fd, size)
+        self._locks = [threading.Lock() for _ in range(LOCK_STRIPES)]
+
+    def take(self, key: str, rate: float, burst: int, now: float = None,
+             cost: int = 1) -> tuple:
+        """Spend ``cost`` tokens from ``key``'s bucket; returns ``(allowed, tokens_left)``"""
+        if now is None:
+            now = time.time()
+        digest = key_hash(key)
+        slot = digest % self.slots
+        offset = slot * SLOT.size
+        with self._locks[slot % LOCK_STRIPES]:
+            if self._fd is not None:
+                fcntl.lockf(self._fd, fcntl.LOCK_EX, SLOT.size, offset)
+            try:
+                stored, tokens, updated = SLOT.unpack_from(self._map, offset)
+                if stored == 0:
+                    tokens = burst
+                else:
+                    tokens = min(burst, tokens + max(0.0, now - updated) * rate)
+                allowed = tokens >= cost
+                if allowed:
+                    tokens -= cost
+                SLOT.pack_into(self._map, offset, digest, tokens, now)
+            finally:
+                if self._fd is not None:
+                    fcntl.lockf(self._fd, fcntl.LOCK_UN, SLOT.size, offset)
+        return allowed, tokens
+
+    def close(self):
+        self._map.close()
+        if self._fd is not None:
+            os.close(self._fd)
+
+
+class RateLimiter:
+    """Token buckets keyed by API key (``X-API-Key``) or client address
+
+    Only keys listed in RATELIMIT_API_KEYS get a bucket of their own; any
+    other ``X-API-Key`` is ignored, so a client can't dodge its limit by
+    sending a new key with every request.
+
+    Decorate a view with ``limit`` to charge one token per request, or
+    ``limit(cost=...)`` to charge what a callable returns for it (capped at
+    RATELIMIT_BURST, so every request can eventually pass).
+    Responses carry ``RateLimit-Limit``/``-Remaining``/``-Reset``; rejected
+    requests get a 429 with ``Retry-After``.
+    """
+
+    def __init__(self, app=None):
+        self.table = None
+        self.api_keys = frozenset()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault('RATELIMIT_ENABLED', True)
+        app.config.setdefault('RATELIMIT_RATE', 10.0)
+        app.config.setdefault('RATELIMIT_BURST', 20)
+        app.config.setdefault('RATELIMIT_STORAGE', None)
+        app.config.setdefault('RATELIMIT_API_KEYS', ())
+        self.app = app
+        api_keys = app.config['RATELIMIT_API_KEYS']
+        if isinstance(api_keys, str):
+            api_keys = [key.strip() for key in api_keys.split(',')]
+        self.api_keys = frozenset(key for key in api_keys if key)
+        self.table = BucketTable(app.config['RATELIMIT_STORAGE'])
+        app.extensions['rate_limiter'] = self
+
+    def client_key(self) -> str:
+        api_key = request.headers.get('X-API-Key')
+        if api_key and api_key in self.api_keys:
+            return 'key:' + api_key
+        return 'ip:' + (request.remote_addr or '')
+
+    def headers(self, tokens: float, rate: float, burst: int) -> dict:
+        return {'RateLimit-Limit': str(burst),
+                'RateLimit-Remaining': str(int(tokens)),
+                'RateLimit-Reset': str(math.ceil((burst - tokens) / rate)),
+                'RateLimit-Policy': '%d;w=%d' % (burst, math.ceil(burst / rate))}
+
+    def limit(self, view=None, *, cost=None):
+        if view is None:
+            return partial(self.limit, cost=cost)
+        return _limited(view, lambda: self, cost)
+
+
+def limit(view=None, *, cost=None):
+    """``RateLimiter.limit`` for blueprint views: charges the current app's limiter"""
+    if view is None:
+        return partial(limit, cost=cost)
+    return _limited(view, lambda: current_app.extensions['rate_limiter'], cost)
+
+
+def _limited(view, get_limiter, cost=None):
+    throttled = RATELIMIT_THROTTLED.labels(endpoint=view.__name__)
+
+    @wraps(view)
+    def limited(*args, **kwargs):
+        limiter = get_limiter()
+        config = limiter.app.config
+        if not config['RATELIMIT_ENABLED']:
+            return view(*args, **kwargs)
+        rate, burst = config['RATELIMIT_RATE'], config['RATELIMIT_BURST']
+        charge = 1 if cost is None else max(1, min(cost(), burst))
+        allowed, tokens = limiter.table.take(limiter.client_key(), rate, burst, cost=charge)
+        if allowed:
+            response = make_response(view(*args, **kwargs))
+        else:
+            throttled.inc()
+            response = make_response(jsonify({'error': 'Too many requests'}), 429)
+            response.headers['Retry-After'] = str(math.ceil((charge - tokens) / rate))
+        response.headers.update(limiter.headers(tokens, rate, burst))
+        return response
+    return limited
@@ -0,0 +1,252 @@
+"""
+Full-text search over the guide pages
+Pages are split into sections at each ``<h2>`` and indexed once at startup
+into an inverted index with term positions and precomputed BM25 weights,
+so a query only merges a few posting lists. Query syntax: plain terms (all
+must match), ``term*`` prefixes and ``"quoted phrases"``.
+"""
+
+import heapq
+import pickle
+import re
+from bisect import bisect_left
+from html import escape
+from html.parser import HTMLParser
+from math import log
+
+TOKEN = re.compile(r'[a-z0-9]+')
+QUERY = re.compile(r'"([^"]*)"?|(\S+)')
+# BM25 parameters
+K1 = 1.2
+B = 0.75
+# A heading occurrence counts as this many body occurrences
+HEADING_WEIGHT = 3
+MAX_CLAUSES = 10
+MAX_EXPANSIONS = 50
+SNIPPET_CHARS = 160
+BLOCK_TAGS = {'p', 'li', 'div', 'h3', 'h4', 'br', 'ul', 'ol', 'pre'}
+SKIP_TAGS = {'nav', 'script', 'style', 'form'}
+
+
+def tokenize(text: str) -> list:
+    return TOKEN.findall(text.lower())
+
+
+class Section:
+    """One searchable unit: a page's intro or one ``<h2>`` section"""
+
+    __slots__ = ('url', 'page', 'heading', 'text')
+
+    def __init__(self, url: str, page: str, heading: str, text: str):
+        self.url = url
+        self.page = page
+        self.heading = heading
+        self.text = text
+
+
+class _SectionParser(HTMLParser):
+    """Split rendered HTML into ``(anchor, heading, text)`` sections"""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.title = ''
+        self.sections = []
+        self._title = []
+        self._skip = 0
+        self._target = None
+
+    def _open(self, anchor):
+        self.sections.append([anchor, [], []])
+        self._target = self.sections[-1][1]
+
+    def handle_starttag(self, tag, attrs):
+        if tag in SKIP_TAGS:
+            self._skip += 1
+        elif tag == 'title':
+            self._target = self._title
+        elif tag in ('h1', 'h2'):
+            if tag == 'h2' or not self.sections:
+                self._open(dict(attrs).get('id') if tag == 'h2' else None)
+            else:
+                self._target = self.sections[-1][1]
+        elif tag in BLOCK_TAGS:
+            self._text(' ')
+
+    def handle_endtag(self, tag):
+        if tag in SKIP_TAGS:
+            self._skip -= 1
+        elif tag == 'title':
+            self.title = ''.join(self._title).split(' - DeployHub')[0].strip()
+            self._target = None
+        elif tag in ('h1', 'h2') and self.sections:
+            self._target = self.sections[-1][2]
+        elif tag in BLOCK_TAGS:
+            self._text(' ')
+
+    def _text(self, data):
+        if self._target is not None and not self._skip:
+            self._target.append(data)
+
+    handle_data = _text
+
+
+class SearchIndex:
+    """Positional inverted index over page sections, ranked with BM25"""
+
+    def __init__(self):
+        self.sections = []
+        # term -> {section id: (bm25 weight, positions)}
+        self._postings = {}
+        self._vocabulary = []
+
+    def add_page(self, url: str, html: str):
+        """Index every section of a rendered page"""
+        parser = _SectionParser()
+        parser.feed(html)
+        parser.close()
+        for anchor, heading, text in parser.sections:
+            heading = ' '.join(''.join(heading).split())
+            text = ' '.join(''.join(text).split())
+            if heading or text:
+                target = '%s#%s' % (url, anchor) if anchor else url
+                self.add(Section(target, parser.title, heading, text))
+
+    def add(self, section: Section):
+        self.sections.append(section)
+
+    def build(self):
+        """Compute postings and BM25 weights for everything added so far"""
+        terms_by_section = []
+        for section in self.sections:
+            heading = tokenize(section.heading)
+            # None keeps phrases from spanning the heading and the body
+            terms_by_section.append((heading + [None] + tokenize(section.text), len(heading)))
+        lengths = [len(terms) - 1 + (HEADING_WEIGHT - 1) * heading_len
+                   for terms, heading_len in terms_by_section]
+        average = sum(lengths) / max(len(lengths), 1)
+
+        positions = {}
+        for doc, (terms, _) in enumerate(terms_by_section):
+            for pos, term in enumerate(terms):
+                if term is not None:
+                    positions.setdefault(term, {}).setdefault(doc, []).append(pos)
+
+        count = len(self.sections)
+        postings = {}
+        for term, docs in positions.items():
+            idf = log(1 + (count - len(docs) + 0.5) / (len(docs) + 0.5))
+            entry = postings[term] = {}
+            for doc, found in docs.items():
+                heading_len = terms_by_section[doc][1]
+                tf = len(found) + (HEADING_WEIGHT - 1) * sum(1 for p in found if p < heading_len)
+                norm = K1 * (1 - B + B * lengths[doc] / average)
+                entry[doc] = (idf * tf * (K1 + 1) / (tf + norm), tuple(found))
+        self._postings = postings
+        self._vocabulary = sorted(postings)
+        return self
+
+    def __len__(self):
+        return len(self.sections)
+
+    def stats(self) -> dict:
+        """Section, term and posting counts plus the serialized index size"""
+        texts = [(s.url, s.page, s.heading, s.text) for s in self.sections]
+        return {'sections': len(self.sections), 'terms': len(self._postings),
+                'postings': sum(len(docs) for docs in self._postings.values()),
+                'bytes': len(pickle.dumps((texts, self._postings)))}
+
+    def _expand(self, prefix: str) -> list:
+        vocabulary = self._vocabulary
+        i = bisect_left(vocabulary, prefix)
+        terms = []
+        while i < len(vocabulary) and vocabulary[i].startswith(prefix) \
+                and len(terms) < MAX_EXPANSIONS:
+            terms.append(vocabulary[i])
+            i += 1
+        return terms
+
+    def _clauses(self, query: str) -> list:
+        """Parse a query into ``(kind, terms)`` clauses"""
+        clauses = []
+        for phrase, word in QUERY.findall(query)[:MAX_CLAUSES]:
+            terms = tokenize(phrase or word)
+            if not terms:
+                continue
+            if len(terms) > 1:
+                clauses.append(('phrase', terms))
+            elif word.endswith('*'):
+                clauses.append(('prefix', self._expand(terms[0])))
+            else:
+                clauses.append(('term', terms))
+        return clauses
+
+    def _match(self, kind: str, terms: list) -> dict:
+        """``{section id: score}`` for one clause"""
+        postings = self._postings
+        if kind != 'phrase':
+            scores = {}
+            for term in terms:
+                for doc, (weight, _) in postings.get(term, {}).items():
+                    scores[doc] = scores.get(doc, 0.0) + weight
+            return scores
+        lists = [postings.get(term) for term in terms]
+        if not all(lists):
+            return {}
+        scores = {}
+        for doc in set(lists[0]).intersection(*lists[1:]):
+            starts = set(lists[0][doc][1])
+            for offset, docs in enumerate(lists[1:], 1):
+                starts &= {p - offset for p in docs[doc][1]}
+            if starts:
+                scores[doc] = sum(docs[doc][0] for docs in lists)
+        return scores
+
+    def search(self, query: str, limit: int = 10) -> list:
+        """Ranked results with highlighted snippets (all clauses must match)"""
+        clauses = self._clauses(query)
+        if not clauses:
+            return []
+        scores = None
+        matched = set()
+        for kind, terms in clauses:
+            found = self._match(kind, terms)
+            if scores is None:
+                scores = found
+            else:
+                scores = {doc: score + found[doc] for doc, score in scores.items()
+                          if doc in found}
+            if not scores:
+                return []
+            matched.update(terms)
+        results = []
+        for doc, score in heapq.nlargest(limit, scores.items(), key=lambda item: item[1]):
+            section = self.sections[doc]
+            results.append({'url': section.url, 'page': section.page,
+                            'section': section.heading, 'score': round(score, 3),
+                            'snippet': snippet(section.text, matched)})
+        return results
+
+
+def snippet(text: str, terms: set, width: int = SNIPPET_CHARS) -> str:
+    """An HTML-escaped window of ``text`` around the first match, with matches in ``<mark>``"""
+    lower = text.lower()
+    matches = [m for m in TOKEN.finditer(lower) if m.group() in terms]
+    start = 0
+    if matches and matches[0].start() > width // 3:
+        start = lower.rfind(' ', 0, matches[0].start() - width // 3) + 1
+    end = len(text) if start + width >= len(text) else text.rfind(' ', start, start + width)
+    if end <= start:
+        end = min(len(text), start + width)
+    out, pos = ['…' if start else ''], start
+    for match in matches:
+        if match.start() < start:
+            continue
+        if match.end() > end:
+            break
+        out.append(escape(text[pos:match.start()]))
+        out.append('<mark>%s</mark>' % escape(text[match.start():match.end()]))
+        pos = match.end()
+    out.append(escape(text[pos:end]))
+    if end < len(text):
+        out.append('…')
+    return ''.join(out)
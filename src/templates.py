@@ -0,0 +1,479 @@
+"""
+Page templates, styles and scripts for the guide site
+Plain strings: they are only compiled (by the page cache) when first served.
+"""
+
+# Base styling
+BASE_STYLE = '''
+    * { margin: 0; padding: 0; box-sizing: border-box; }
+    body {
+        font-family: 'Segoe UI', Tahoma, Geneva, Verdana, sans-serif;
+        min-height: 100vh;
+        color: white;
+    }
+    .navbar {
+        background: rgba(0, 0, 0, 0.3);
+        padding: 1rem 2rem;
+        display: flex;
+        justify-content: space-between;
+        align-items: center;
+        flex-wrap: wrap;
+    }
+    .navbar h1 { font-size: 1.5rem; }
+    .nav-links { display: flex; gap: 2rem; flex-wrap: wrap; }
+    .nav-links a {
+        color: white;
+        text-decoration: none;
+        transition: opacity 0.3s;
+    }
+    .nav-links a:hover { opacity: 0.7; }
+    .container {
+        max-width: 1200px;
+        margin: 2rem auto;
+        padding: 0 2rem;
+    }
+    .content {
+        background: rgba(255, 255, 255, 0.1);
+        backdrop-filter: blur(10px);
+        border-radius: 15px;
+        padding: 2rem;
+        margin-top: 2rem;
+    }
+    h1 { font-size: 2.5rem; margin-bottom: 1rem; }
+    h2 { font-size: 1.8rem; margin: 2rem 0 1rem 0; color: #ffd700; }
+    h3 { font-size: 1.3rem; margin: 1.5rem 0 0.5rem 0; }
+    p, li { line-height: 1.8; margin-bottom: 1rem; }
+    .step {
+        background: rgba(0, 0, 0, 0.2);
+        padding: 1.5rem;
+        border-radius: 10px;
+        margin: 1rem 0;
+    }
+    .command {
+        background: #2d2d2d;
+        color: #0f0;
+        padding: 1rem;
+        border-radius: 5px;
+        font-family: 'Courier New', monospace;
+        overflow-x: auto;
+        margin: 1rem 0;
+        white-space: pre;
+    }
+    .note {
+        background: rgba(255, 193, 7, 0.2);
+        border-left: 4px solid #FFC107;
+        padding: 1rem;
+        margin: 1rem 0;
+        border-radius: 5px;
+    }
+    a { color: #ffd700; }
+    ul { margin-left: 2rem; }
+    .search { position: relative; }
+    .search input {
+        padding: 0.4rem 0.8rem;
+        border-radius: 5px;
+        border: none;
+        width: 220px;
+        font-size: 0.95rem;
+    }
+    .search-results {
+        position: absolute;
+        right: 0;
+        top: 2.5rem;
+        width: 380px;
+        max-height: 70vh;
+        overflow-y: auto;
+        background: #222;
+        border-radius: 10px;
+        z-index: 10;
+    }
+    .search-results a {
+        display: block;
+        padding: 0.75rem 1rem;
+        color: white;
+        text-decoration: none;
+        border-bottom: 1px solid rgba(255, 255, 255, 0.1);
+    }
+    .search-results a:hover { background: rgba(255, 255, 255, 0.1); }
+    .search-results span { display: block; font-size: 0.85rem; opacity: 0.8; }
+    .search-results p { padding: 0.75rem 1rem; margin: 0; }
+    mark { background: #ffd700; color: #222; }
+    .guide-section.lazy h2 a { color: inherit; text-decoration: none; }
+'''
+
+# Navbar search box: queries /api/search as you type
+SEARCH_SCRIPT = '''
+document.querySelectorAll('form.search').forEach(function (form) {
+    var input = form.querySelector('input');
+    var results = form.querySelector('.search-results');
+    var timer;
+    function text(value) {
+        var node = document.createElement('div');
+        node.textContent = value;
+        return node.innerHTML;
+    }
+    function show(data) {
+        results.innerHTML = data.results.map(function (hit) {
+            return '<a href="' + text(hit.url) + '"><strong>' + text(hit.page) + ' › ' +
+                text(hit.section) + '</strong><span>' + hit.snippet + '</span></a>';
+        }).join('') || '<p>No results</p>';
+    }
+    form.addEventListener('submit', function (event) { event.preventDefault(); });
+    input.addEventListener('input', function () {
+        clearTimeout(timer);
+        timer = setTimeout(function () {
+            var query = input.value.trim();
+            if (!query) { results.innerHTML = ''; return; }
+            // The word being typed is matched as a prefix (outside open quotes)
+            if (/[a-z0-9]$/i.test(query) && query.split('"').length % 2) { query += '*'; }
+            fetch('/api/search?limit=8&q=' + encodeURIComponent(query))
+                .then(function (response) { return response.json(); })
+                .then(show);
+        }, 150);
+    });
+});
+'''
+
+# Guide shell pages: fetches the sections left out as fragments when they
+# are linked to or scrolled near, and prefetches the rest once idle
+SECTIONS_SCRIPT = '''
+(function () {
+    var pending = [].slice.call(document.querySelectorAll('section[data-src]'));
+    if (!pending.length || !window.fetch) { return; }
+    function load(section) {
+        if (section.dataset.loading) { return Promise.resolve(); }
+        section.dataset.loading = '1';
+        return fetch(section.dataset.src)
+            .then(function (response) {
+                if (!response.ok) { throw new Error(response.status); }
+                return response.text();
+            })
+            .then(function (html) { section.outerHTML = html; })
+            .catch(function () { delete section.dataset.loading; });
+    }
+    function reveal() {
+        var id = decodeURIComponent(location.hash.slice(1));
+        var target = id && document.getElementById(id);
+        var section = target && target.closest('section[data-src]');
+        if (section) {
+            load(section).then(function () {
+                var heading = document.getElementById(id);
+                if (heading) { heading.scrollIntoView(); }
+            });
+        }
+    }
+    if ('IntersectionObserver' in window) {
+        var observer = new IntersectionObserver(function (entries) {
+            entries.forEach(function (entry) {
+                if (entry.isIntersecting) {
+                    observer.unobserve(entry.target);
+                    load(entry.target);
+                }
+            });
+        }, {rootMargin: '800px 0px'});
+        pending.forEach(function (section) { observer.observe(section); });
+    }
+    window.addEventListener('hashchange', reveal);
+    reveal();
+    if (!(navigator.connection && navigator.connection.saveData)) {
+        window.addEventListener('load', function () {
+            (window.requestIdleCallback || setTimeout)(function () {
+                pending.reduce(function (chain, section) {
+                    return chain.then(function () { return load(section); });
+                }, Promise.resolve());
+            });
+        });
+    }
+})();
+'''
+
+# Home page template
+HOME_TEMPLATE = '''
+<!DOCTYPE html>
+<html lang="en">
+<head>
+    <meta charset="UTF-8">
+    <meta name="viewport" content="width=device-width, initial-scale=1.0">
+    <title>DeployHub - Learn Cloud Deployment</title>
+    <link rel="stylesheet" href="{{ asset_url('base.css') }}">
+    <script src="{{ asset_url('search.js') }}" defer></script>
+    <style>
+        body { background: linear-gradient(135deg, #667eea 0%, #764ba2 100%); }
+        .hero {
+            text-align: center;
+            padding: 3rem 0;
+        }
+        .hero h1 {
+            font-size: 3rem;
+            margin-bottom: 1rem;
+        }
+        .hero p {
+            font-size: 1.2rem;
+            opacity: 0.9;
+        }
+        .cards {
+            display: grid;
+            grid-template-columns: repeat(auto-fit, minmax(300px, 1fr));
+            gap: 2rem;
+            margin-top: 3rem;
+        }
+        .card {
+            background: rgba(255, 255, 255, 0.1);
+            backdrop-filter: blur(10px);
+            border-radius: 15px;
+            padding: 2rem;
+            transition: transform 0.3s, box-shadow 0.3s;
+            cursor: pointer;
+        }
+        .card:hover {
+            transform: translateY(-5px);
+            box-shadow: 0 10px 30px rgba(0, 0, 0, 0.3);
+        }
+        .card h3 {
+            font-size: 1.5rem;
+            margin-bottom: 1rem;
+            color: #ffd700;
+        }
+        .card p { line-height: 1.6; color: rgba(255, 255, 255, 0.9); }
+        .card a {
+            display: inline-block;
+            margin-top: 1rem;
+            padding: 0.5rem 1.5rem;
+            background: #4CAF50;
+            color: white;
+            text-decoration: none;
+            border-radius: 5px;
+            transition: background 0.3s;
+        }
+        .card a:hover { background: #45a049; }
+        .icon { font-size: 3rem; margin-bottom: 1rem; }
+    </style>
+</head>
+<body>
+    <nav class="navbar">
+        <h1>🚀 DeployHub</h1>
+        <div class="nav-links">
+            <a href="/">Home</a>
+{%- for guide in guides %}
+            <a href="{{ guide.path }}">{{ guide.nav }}</a>
+{%- endfor %}
+        </div>
+        <form class="search" action="/api/search" role="search">
+            <input type="search" name="q" placeholder="Search guides" aria-label="Search guides" autocomplete="off">
+            <div class="search-results"></div>
+        </form>
+    </nav>
+
+    <div class="container">
+        <div class="hero">
+            <h1>Master Cloud Deployment</h1>
+            <p>Learn to deploy web applications on AWS, Digital Ocean, and more</p>
+        </div>
+
+        <div class="cards">
+{%- for guide in guides %}
+            <div class="card">
+                <div class="icon">{{ guide.icon }}</div>
+                <h3>{{ guide.card }}</h3>
+                <p>{{ guide.summary }}</p>
+                <a href="{{ guide.path }}">{{ guide.link }}</a>
+            </div>
+{% endfor %}
+            <div class="card">
+                <div class="icon">🧪</div>
+                <h3>API Demo</h3>
+                <p>Try our live API calculator endpoint.</p>
+                <a href="/demo">Try Demo →</a>
+            </div>
+        </div>
+    </div>
+</body>
+</html>
+'''
+
+DEMO_TEMPLATE = '''
+<!DOCTYPE html>
+<html lang="en">
+<head>
+    <meta charset="UTF-8">
+    <meta name="viewport" content="width=device-width, initial-scale=1.0">
+    <title>API Demo - DeployHub</title>
+    <link rel="stylesheet" href="{{ asset_url('base.css') }}">
+    <script src="{{ asset_url('search.js') }}" defer></script>
+    <style>
+        body { background: linear-gradient(135deg, #11998e 0%, #38ef7d 100%); }
+        .api-demo {
+            background: rgba(255, 255, 255, 0.15);
+            padding: 2rem;
+            border-radius: 10px;
+            margin: 2rem 0;
+        }
+        input {
+            padding: 10px;
+            margin: 5px;
+            border-radius: 5px;
+            border: none;
+            width: 150px;
+            font-size: 1rem;
+        }
+        button {
+            padding: 10px 20px;
+            background: #4CAF50;
+            color: white;
+            border: none;
+            border-radius: 5px;
+            cursor: pointer;
+            font-size: 1rem;
+            margin: 5px;
+        }
+        button:hover { background: #45a049; }
+        input#expression { width: 310px; }
+        #result, #expression-result {
+            margin-top: 1rem;
+            font-size: 1.5rem;
+            font-weight: bold;
+            color: #ffd700;
+        }
+    </style>
+</head>
+<body>
+    <nav class="navbar">
+        <h1>🚀 DeployHub</h1>
+        <div class="nav-links">
+            <a href="/">Home</a>
+{%- for guide in guides %}
+            <a href="{{ guide.path }}">{{ guide.nav }}</a>
+{%- endfor %}
+        </div>
+        <form class="search" action="/api/search" role="search">
+            <input type="search" name="q" placeholder="Search guides" aria-label="Search guides" autocomplete="off">
+            <div class="search-results"></div>
+        </form>
+    </nav>
+
+    <div class="container">
+        <h1>🧪 API Demo</h1>
+        
+        <div class="content">
+            <h2 id="live-calculator-api">Live Calculator API</h2>
+            <p>Test our REST API endpoint in real-time!</p>
+
+            <div class="api-demo">
+                <h3>Calculator</h3>
+                <p>Enter two numbers to calculate their sum:</p>
+                <input type="number" id="num1" placeholder="Number 1" value="5">
+                <input type="number" id="num2" placeholder="Number 2" value="7">
+                <button onclick="calculate()">Calculate Sum</button>
+                <div id="result"></div>
+            </div>
+
+            <div class="api-demo">
+                <h3>Expressions</h3>
+                <p>Use the two numbers above as <code>a</code> and <code>b</code> in a formula:</p>
+                <input type="text" id="expression" placeholder="Expression" value="a * (b + 2) ** 2">
+                <button onclick="evaluateExpression()">Evaluate</button>
+                <div id="expression-result"></div>
+            </div>
+
+            <h2 id="how-it-works">How It Works</h2>
+            <div class="step">
+                <h3>API Endpoint</h3>
+                <div class="command">POST /api/calculate
+Content-Type: application/json
+
+{
+  "a": 5,
+  "b": 7
+}</div>
+                
+                <h3>Response</h3>
+                <div class="command">{
+  "result": 12,
+  "operation": "5 + 7"
+}</div>
+
+                <h3>Expressions</h3>
+                <p>Send an <code>expression</code> with optional <code>variables</code> instead.
+                It supports <code>+ - * / // % **</code>, parentheses and
+                <code>abs</code>, <code>round</code>, <code>min</code>, <code>max</code> and <code>sqrt</code>:</p>
+                <div class="command">{
+  "expression": "a * (b + 2) ** 2",
+  "variables": {"a": 5, "b": 7}
+}</div>
+                <div class="command">{
+  "result": 405,
+  "operation": "a * (b + 2) ** 2"
+}</div>
+            </div>
+
+            <h2 id="try-it-yourself">Try It Yourself</h2>
+            <div class="step">
+                <p>Using curl:</p>
+                <div class="command">curl -X POST http://YOUR_IP/api/calculate \\
+  -H "Content-Type: application/json" \\
+  -d '{"a": 5, "b": 7}'</div>
+                
+                <p>Using Python:</p>
+                <div class="command">import requests
+
+response = requests.post(
+    'http://YOUR_IP/api/calculate',
+    json={'a': 5, 'b': 7}
+)
+print(response.json())</div>
+            </div>
+        </div>
+    </div>
+
+    <script>
+        function calculate() {
+            const num1 = document.getElementById('num1').value;
+            const num2 = document.getElementById('num2').value;
+            
+            fetch('/api/calculate', {
+                method: 'POST',
+                headers: {
+                    'Content-Type': 'application/json',
+                },
+                body: JSON.stringify({a: parseInt(num1), b: parseInt(num2)})
+            })
+            .then(response => response.json())
+            .then(data => {
+                document.getElementById('result').innerHTML = 
+                    `Result: ${num1} + ${num2} = ${data.result}`;
+            })
+            .catch(error => {
+                document.getElementById('result').innerHTML = 
+                    'Error: ' + error;
+            });
+        }
+
+        function evaluateExpression() {
+            const output = document.getElementById('expression-result');
+            fetch('/api/calculate', {
+                method: 'POST',
+                headers: {
+                    'Content-Type': 'application/json',
+                },
+                body: JSON.stringify({
+                    expression: document.getElementById('expression').value,
+                    variables: {
+                        a: Number(document.getElementById('num1').value),
+                        b: Number(document.getElementById('num2').value)
+                    }
+                })
+            })
+            .then(response => response.json())
+            .then(data => {
+                output.textContent = data.error
+                    ? 'Error: ' + data.error
+                    : `Result: ${data.operation} = ${data.result}`;
+            })
+            .catch(error => {
+                output.textContent = 'Error: ' + error;
+            });
+        }
+    </script>
+</body>
+</html>
+'''
@@ -0,0 +1,310 @@
+"""
+Sampled in-process request tracing
+A sampled request gets a trace whose spans time its phases (JSON parsing,
+rendering, logging, metrics recording). Finished traces are kept in a
+bounded ring buffer for /debug/traces and, with TRACE_EXPORT_PATH set,
+appended to that file as OTLP JSON lines by a background thread. Sampling is
+decided once per request (head sampling), so an unsampled request costs one
+random number and ``span()`` is a shared no-op outside a sampled request.
+"""
+
+import json
+import os
+import queue
+import random
+import re
+import threading
+import time
+from collections import deque
+from contextvars import ContextVar
+from time import perf_counter_ns
+
+from flask import Response, jsonify, request
+
+from .debug import debug_only
+
+# W3C trace context: version-trace id-parent span id-flags
+TRACEPARENT = re.compile(r'00-([0-9a-f]{32})-([0-9a-f]{16})-([0-9a-f]{2})$')
+SERVICE_NAME = 'deployhub'
+# OTLP span kinds
+KIND_INTERNAL = 1
+KIND_SERVER = 2
+EXCLUDE_PATHS = ('/health', '/livez', '/readyz', '/metrics', '/debug/traces', '/debug/profile')
+EXPORT_QUEUE_SIZE = 1024
+
+_trace = ContextVar('deployhub_trace', default=None)
+
+
+class Trace:
+    """Spans of one sampled request, in start order"""
+
+    __slots__ = ('trace_id', 'request_id', 'spans', 'stack', 'epoch_ns')
+
+    def __init__(self, trace_id: str, parent_id: str = None):
+        self.trace_id = trace_id
+        self.request_id = None
+        self.spans = []
+        # Ids of the open spans; the bottom one is the remote parent, if any
+        self.stack = [parent_id]
+        # perf_counter_ns() + epoch_ns is wall-clock time
+        self.epoch_ns = time.time_ns() - perf_counter_ns()
+
+    @property
+    def root(self):
+        return self.spans[0] if self.spans else None
+
+
+class Span:
+    """A timed phase of a request; use as a context manager"""
+
+    __slots__ = ('trace', 'name', 'span_id', 'parent_id', 'kind', 'start', 'end',
+                 'attributes', 'error')
+
+    def __init__(self, trace: Trace, name: str, kind: int = KIND_INTERNAL,
+                 attributes: dict = None):
+        self.trace = trace
+        self.name = name
+        self.span_id = os.urandom(8).hex()
+        self.parent_id = trace.stack[-1]
+        self.kind = kind
+        self.start = self.end = None
+        self.attributes = attributes or {}
+        self.error = None
+
+    def set(self, key: str, value):
+        self.attributes[key] = value
+
+    def __enter__(self):
+        self.trace.spans.append(self)
+        self.trace.stack.append(self.span_id)
+        self.start = perf_counter_ns()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.end = perf_counter_ns()
+        self.trace.stack.pop()
+        if exc is not None:
+            self.error = '%s: %s' % (exc_type.__name__, exc)
+        return False
+
+
+class _NoopSpan:
+    __slots__ = ()
+
+    def set(self, key, value):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+NOOP_SPAN = _NoopSpan()
+
+
+def span(name: str, **attributes):
+    """A child span of the current one, or a no-op when not sampled"""
+    trace = _trace.get()
+    if trace is None:
+        return NOOP_SPAN
+    return Span(trace, name, attributes=attributes)
+
+
+def _attributes(values: dict) -> list:
+    out = []
+    for key, value in values.items():
+        if isinstance(value, bool):
+            typed = {'boolValue': value}
+        elif isinstance(value, int):
+            typed = {'intValue': str(value)}
+        elif isinstance(value, float):
+            typed = {'doubleValue': value}
+        else:
+            typed = {'stringValue': str(value)}
+        out.append({'key': key, 'value': typed})
+    return out
+
+
+def to_otlp(traces) -> dict:
+    """An OTLP/JSON ``ExportTraceServiceRequest`` holding ``traces``"""
+    spans = []
+    for trace in traces:
+        for item in trace.spans:
+            attributes = dict(item.attributes)
+            if item is trace.root and trace.request_id:
+                attributes['request.id'] = trace.request_id
+            entry = {'traceId': trace.trace_id, 'spanId': item.span_id, 'name': item.name,
+                     'kind': item.kind,
+                     'startTimeUnixNano': str(trace.epoch_ns + item.start),
+                     'endTimeUnixNano': str(trace.epoch_ns + (item.end or item.start)),
+                     'attributes': _attributes(attributes),
+                     'status': {'code': 2, 'message': item.error} if item.error else {}}
+            if item.parent_id:
+                entry['parentSpanId'] = item.parent_id
+            spans.append(entry)
+    resource = {'service.name': SERVICE_NAME, 'process.pid': os.getpid()}
+    return {'resourceSpans': [{'resource': {'attributes': _attributes(resource)},
+                               'scopeSpans': [{'scope': {'name': __name__},
+                                               'spans': spans}]}]}
+
+
+def summary(trace: Trace) -> dict:
+    """A trace with span times in milliseconds from the start of the request"""
+    root = trace.root
+    base = root.start
+
+    def ms(ns):
+        return round(ns / 1e6, 3) if ns is not None else None
+
+    return {'trace_id': trace.trace_id, 'request_id': trace.request_id, 'name': root.name,
+            'start': (trace.epoch_ns + base) / 1e9,
+            'duration_ms': ms(root.end - base if root.end else None),
+            'spans': [{'name': item.name, 'span_id': item.span_id,
+                       'parent_id': item.parent_id, 'offset_ms': ms(item.start - base),
+                       'duration_ms': ms(item.end - item.start if item.end else None),
+                       'attributes': item.attributes, 'error': item.error}
+                      for item in trace.spans]}
+
+
+def render_text(traces) -> str:
+    """Indented span trees, one block per trace"""
+    lines = []
+    for trace in traces:
+        data = summary(trace)
+        lines.append('%s %s %sms request_id=%s' % (data['trace_id'], data['name'],
+                                                  data['duration_ms'], data['request_id']))
+        depth = {}
+        for item in data['spans']:
+            level = depth[item['span_id']] = depth.get(item['parent_id'], -1) + 1
+            lines.append('  %-40s +%8.3fms %8sms%s' % (
+                '  ' * level + item['name'], item['offset_ms'], item['duration_ms'],
+                '  ' + item['error'] if item['error'] else ''))
+        lines.append('')
+    return '\n'.join(lines)
+
+
+class Tracer:
+    """WSGI middleware that samples requests and records their traces
+
+    Install it after ``RequestMetrics`` so the root span covers metrics
+    recording. A ``traceparent`` header continues the caller's trace and
+    follows its sampling decision.
+    """
+
+    def __init__(self, app=None):
+        self.traces = deque()
+        self.dropped = 0
+        self._queue = None
+        self._pid = None
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        config = app.config
+        config.setdefault('TRACE_SAMPLE_RATE', 0.01)
+        config.setdefault('TRACE_BUFFER_SIZE', 256)
+        config.setdefault('TRACE_EXPORT_PATH', None)
+        config.setdefault('TRACE_EXCLUDE_PATHS', EXCLUDE_PATHS)
+        self.rate = config['TRACE_SAMPLE_RATE']
+        self.traces = deque(maxlen=config['TRACE_BUFFER_SIZE'])
+        self.export_path = config['TRACE_EXPORT_PATH']
+        self.exclude = frozenset(config['TRACE_EXCLUDE_PATHS'])
+        self.wsgi_app = app.wsgi_app
+        app.wsgi_app = self
+        app.url_value_preprocessor(self._name_root)
+        app.add_url_rule('/debug/traces', 'debug_traces', debug_only(self.view))
+        app.extensions['tracer'] = self
+
+    def _sample(self, environ):
+        if environ.get('PATH_INFO') in self.exclude:
+            return None
+        header = environ.get('HTTP_TRACEPARENT')
+        if header:
+            match = TRACEPARENT.match(header.strip().lower())
+            if match:
+                if not int(match.group(3), 16) & 1:
+                    return None
+                return Trace(match.group(1), match.group(2))
+        if random.random() >= self.rate:
+            return None
+        return Trace(os.urandom(16).hex())
+
+    @staticmethod
+    def _name_root(endpoint, values):
+        trace = _trace.get()
+        if trace is not None and endpoint is not None:
+            trace.root.name = '%s %s' % (trace.root.attributes['http.method'], endpoint)
+
+    def __call__(self, environ, start_response):
+        trace = self._sample(environ)
+        if trace is None:
+            return self.wsgi_app(environ, start_response)
+
+        def capture(status, headers, exc_info=None):
+            root.set('http.status_code', int(status[:3]))
+            for name, value in headers:
+                if name == 'X-Request-ID':
+                    trace.request_id = value
+            return start_response(status, headers, exc_info)
+
+        method = environ['REQUEST_METHOD']
+        root = Span(trace, method, KIND_SERVER,
+                    {'http.method': method, 'http.target': environ.get('PATH_INFO', '')})
+        token = _trace.set(trace)
+        try:
+            with root:
+                return self.wsgi_app(environ, capture)
+        finally:
+            _trace.reset(token)
+            self.finish(trace)
+
+    def finish(self, trace: Trace):
+        self.traces.append(trace)
+        if self.export_path:
+            if self._pid != os.getpid():
+                # The writer thread doesn't survive a fork; start one per worker
+                self._start_exporter()
+            try:
+                self._queue.put_nowait(trace)
+            except queue.Full:
+                self.dropped += 1
+
+    def _start_exporter(self):
+        self._pid = os.getpid()
+        self._queue = queue.Queue(maxsize=EXPORT_QUEUE_SIZE)
+        threading.Thread(target=self._export, args=(self._queue,), name='trace-exporter',
+                         daemon=True).start()
+
+    def _export(self, pending):
+        fd = os.open(self.export_path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        while True:
+            batch = [pending.get()]
+            while True:
+                try:
+                    batch.append(pending.get_nowait())
+                except queue.Empty:
+                    break
+            line = json.dumps(to_otlp(batch), separators=(',', ':')).encode('utf-8') + b'\n'
+            try:
+                # One write per line so workers sharing the file never interleave
+                os.write(fd, line)
+            except OSError:
+                self.dropped += len(batch)
+
+    def view(self):
+        """Recent traces, newest first (``?format=text|otlp``, ``request_id``, ``limit``)"""
+        traces = list(self.traces)[::-1]
+        request_id = request.args.get('request_id')
+        if request_id:
+            traces = [trace for trace in traces if trace.request_id == request_id]
+        traces = traces[:max(1, request.args.get('limit', 20, type=int))]
+        fmt = request.args.get('format')
+        if fmt == 'otlp':
+            return jsonify(to_otlp(traces))
+        if fmt == 'text':
+            return Response(render_text(traces), mimetype='text/plain')
+        return jsonify({'sample_rate': self.rate, 'buffered': len(self.traces),
+                        'export_dropped': self.dropped,
+                        'traces': [summary(trace) for trace in traces]})
@@ -0,0 +1,98 @@
+"""Tests for adaptive concurrency limiting and load shedding"""
+import threading
+import time
+import pytest
+from flask import Flask
+from src.admission import AdmissionControl, AIMDLimit, queue_time
+from src.app import app
+from src.metrics import REQUESTS_SHED
+
+@pytest.fixture
+def saturated():
+    """An app whose only slot is held by a request blocked in /slow"""
+    test_app = Flask(__name__)
+    test_app.config['ADMISSION_INITIAL_LIMIT'] = 1
+    release, entered = threading.Event(), threading.Event()
+
+    @test_app.route('/slow')
+    def slow():
+        entered.set()
+        release.wait(5)
+        return 'done'
+
+    @test_app.route('/fast')
+    def fast():
+        return 'ok'
+
+    @test_app.route('/health')
+    def health():
+        return 'healthy'
+
+    AdmissionControl(test_app)
+    holder = threading.Thread(target=lambda: test_app.test_client().get('/slow'))
+    holder.start()
+    entered.wait(5)
+    yield test_app.test_client()
+    release.set()
+    holder.join()
+
+def shed_count(reason):
+    return REQUESTS_SHED.labels(reason=reason)._value.get()
+
+def test_aimd_grows_only_when_utilised():
+    """Test fast requests raise the limit only while it is actually in use"""
+    limit = AIMDLimit(initial=10, max_limit=11)
+    limit.on_sample(0.01, in_flight=1, now=1.0)
+    assert limit.limit == 10
+    for _ in range(50):
+        limit.on_sample(0.01, in_flight=8, now=1.0)
+    assert limit.limit == 11
+
+def test_aimd_backs_off_once_per_window():
+    """Test a burst of slow requests cuts the limit once, not per request"""
+    limit = AIMDLimit(initial=10, target=0.25, backoff=0.5)
+    for _ in range(5):
+        limit.on_sample(1.0, in_flight=10, now=100.0)
+    assert limit.limit == 5
+    limit.on_sample(1.0, in_flight=5, now=100.3)
+    assert limit.limit == 2.5
+
+def test_queue_time_units():
+    """Test X-Request-Start is accepted in seconds, milliseconds and microseconds"""
+    now = 1700000010.0
+    assert queue_time('t=1700000000.0', now) == pytest.approx(10)
+    assert queue_time('t=1700000000000', now) == pytest.approx(10)
+    assert queue_time('1700000000000000', now) == pytest.approx(10)
+    assert queue_time('bogus', now) == 0.0
+
+def test_sheds_beyond_limit(saturated):
+    """Test a request over the limit gets an immediate 503"""
+    before = shed_count('limit')
+    start = time.perf_counter()
+    response = saturated.get('/fast')
+    assert time.perf_counter() - start < 1
+    assert response.status_code == 503
+    assert response.headers['Retry-After'] == '1'
+    assert response.get_json() == {'error': 'Server overloaded'}
+    assert shed_count('limit') == before + 1
+
+def test_health_admitted_while_saturated(saturated):
+    """Test health checks bypass the limit"""
+    assert saturated.get('/health').status_code == 200
+
+def test_sheds_requests_queued_too_long():
+    """Test requests that waited in a proxy queue past the budget are shed"""
+    before = shed_count('queue')
+    with app.test_client() as client:
+        stale = client.get('/aws', headers={'X-Request-Start': 't=%.3f' % (time.time() - 30)})
+        fresh = client.get('/aws', headers={'X-Request-Start': 't=%.3f' % time.time()})
+    assert stale.status_code == 503
+    assert fresh.status_code == 200
+    assert shed_count('queue') == before + 1
+
+def test_limit_exported():
+    """Test the current limit is exposed on /metrics"""
+    with app.test_client() as client:
+        body = client.get('/metrics').data.decode()
+    assert 'http_concurrency_limit ' in body
+    assert 'http_requests_shed_total' in body
@@ -1,7 +1,30 @@
 """Test suite for DeployHub application"""
 import pytest
 import json
-from src.app import app, calculate_sum
+import os
+import subprocess
+import sys
+from src.app import app, calculate_sum, create_app
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# Budgets for a fresh interpreter, generous enough for a loaded CI machine
+IMPORT_BUDGET_MS = float(os.environ.get('IMPORT_BUDGET_MS', '100'))
+COLD_START_BUDGET_MS = float(os.environ.get('COLD_START_BUDGET_MS', '1500'))
+
+# Runs in a fresh interpreter so nothing is imported or built beforehand
+STARTUP_SCRIPT = '''
+import json, sys, time
+start = time.perf_counter()
+import src.app
+imported = time.perf_counter()
+heavy = sorted(m for m in ('flask', 'jinja2', 'prometheus_client', 'brotli', 'orjson')
+               if m in sys.modules)
+client = src.app.create_app({'FEATURES': ['guides', 'api']}).test_client()
+status = client.get('/').status_code
+ready = time.perf_counter()
+print(json.dumps({'import_ms': (imported - start) * 1000, 'heavy': heavy, 'status': status,
+                  'cold_start_ms': (ready - start) * 1000}))
+'''
 
 @pytest.fixture
 def client():
@@ -66,3 +89,37 @@ def test_api_invalid(client):
                           data=json.dumps({'a': 'invalid'}),
                           content_type='application/json')
     assert response.status_code == 400
+
+def startup():
+    out = subprocess.run([sys.executable, '-c', STARTUP_SCRIPT], cwd=ROOT,
+                         capture_output=True, text=True, check=True).stdout
+    return json.loads(out.strip().splitlines()[-1])
+
+def test_import_budget():
+    """Test importing the app module is cheap: no framework, no app built"""
+    result = startup()
+    assert result['heavy'] == []
+    assert result['import_ms'] < IMPORT_BUDGET_MS
+
+def test_cold_start_budget():
+    """Test a fresh interpreter serves its first page within the cold-start budget"""
+    result = min((startup() for _ in range(2)), key=lambda result: result['cold_start_ms'])
+    assert result['status'] == 200
+    assert result['cold_start_ms'] < COLD_START_BUDGET_MS
+
+def test_feature_toggles():
+    """Test only the blueprints named in FEATURES are registered"""
+    api_only = create_app({'FEATURES': 'api'})
+    rules = {rule.rule for rule in api_only.url_map.iter_rules()}
+    assert '/api/calculate' in rules
+    assert not rules & {'/', '/aws', '/health', '/metrics', '/static/<path:filename>'}
+    assert 'guide_bundle' not in api_only.extensions
+    client = api_only.test_client()
+    assert client.get('/aws').status_code == 404
+    response = client.post('/api/calculate', json={'a': 5, 'b': 7})
+    assert response.get_json()['result'] == 12
+
+def test_unknown_feature():
+    """Test a misspelt feature fails at startup rather than serving nothing"""
+    with pytest.raises(ValueError):
+        create_app({'FEATURES': ['guides', 'admin']})
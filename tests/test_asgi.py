@@ -0,0 +1,91 @@
+"""Tests for the ASGI serving mode"""
+import asyncio
+import io
+import json
+from src.asgi import app, build_environ
+
+def call(method, path, body=b'', headers=(), query=b''):
+    """Drive the ASGI app once and collect the response"""
+    scope = {'type': 'http', 'method': method, 'path': path, 'query_string': query,
+             'headers': [(k.encode(), v.encode()) for k, v in headers],
+             'http_version': '1.1', 'scheme': 'http',
+             'server': ('testserver', 80), 'client': ('127.0.0.1', 5555)}
+    messages = [{'type': 'http.request', 'body': body[:3], 'more_body': True},
+                {'type': 'http.request', 'body': body[3:], 'more_body': False}]
+    sent = []
+
+    async def receive():
+        return messages.pop(0)
+
+    async def send(message):
+        sent.append(message)
+
+    asyncio.run(app(scope, receive, send))
+    start = sent[0]
+    headers = {k.decode(): v.decode() for k, v in start['headers']}
+    return start['status'], headers, b''.join(m.get('body', b'') for m in sent[1:])
+
+def test_build_environ():
+    """Test ASGI scopes map onto WSGI environ keys"""
+    environ = build_environ({'method': 'GET', 'path': '/aws', 'query_string': b'x=1',
+                             'headers': [(b'content-type', b'text/plain'),
+                                         (b'accept', b'a'), (b'accept', b'b')]},
+                            io.BytesIO())
+    assert environ['PATH_INFO'] == '/aws'
+    assert environ['QUERY_STRING'] == 'x=1'
+    assert environ['CONTENT_TYPE'] == 'text/plain'
+    assert environ['HTTP_ACCEPT'] == 'a,b'
+
+def test_asgi_page():
+    """Test guide pages are served through the ASGI adapter"""
+    status, headers, body = call('GET', '/aws')
+    assert status == 200
+    assert b'AWS' in body
+    assert headers['content-length'] == str(len(body))
+
+def test_asgi_api_calculate():
+    """Test request bodies are reassembled from several ASGI messages"""
+    status, _, body = call('POST', '/api/calculate', json.dumps({'a': 5, 'b': 7}).encode(),
+                           headers=[('content-type', 'application/json')])
+    assert status == 200
+    assert json.loads(body)['result'] == 12
+
+def stream_body(headers, chunk=b' ' * 1024):
+    """POST an endless body to /api/calculate; returns (status, messages received)"""
+    scope = {'type': 'http', 'method': 'POST', 'path': '/api/calculate',
+             'headers': [(b'content-type', b'application/json')] + headers,
+             'client': ('10.0.0.9', 5555)}
+    received, sent = [], []
+
+    async def receive():
+        received.append(chunk)
+        return {'type': 'http.request', 'body': chunk, 'more_body': True}
+
+    async def send(message):
+        sent.append(message)
+
+    asyncio.run(app(scope, receive, send))
+    return sent[0]['status'], len(received)
+
+def test_asgi_body_limits_stop_reading():
+    """Test oversized bodies get a 413 without the adapter buffering them first"""
+    # Refused on Content-Length alone: no body message is awaited
+    assert stream_body([(b'content-length', b'1000000000')]) == (413, 0)
+    # Chunked: refused once the bytes read pass CALCULATE_MAX_BYTES (4 KiB)
+    status, received = stream_body([])
+    assert status == 413
+    assert received <= 32
+
+def test_asgi_lifespan():
+    """Test lifespan startup and shutdown are acknowledged"""
+    messages = [{'type': 'lifespan.startup'}, {'type': 'lifespan.shutdown'}]
+    sent = []
+
+    async def receive():
+        return messages.pop(0)
+
+    async def send(message):
+        sent.append(message['type'])
+
+    asyncio.run(app({'type': 'lifespan'}, receive, send))
+    assert sent == ['lifespan.startup.complete', 'lifespan.shutdown.complete']
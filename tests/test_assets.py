@@ -0,0 +1,54 @@
+"""Tests for the static asset pipeline"""
+import re
+import pytest
+from flask import Flask
+from src.app import app, assets
+from src.assets import AssetRegistry, fingerprint
+
+@pytest.fixture
+def client():
+    app.config['TESTING'] = True
+    with app.test_client() as client:
+        yield client
+
+def _stylesheets(html):
+    return re.findall(r'<link rel="stylesheet" href="([^"]+)">', html)
+
+def test_fingerprint():
+    """Test asset names embed a content hash"""
+    assert re.match(r'^base\.[0-9a-f]{12}\.css$', fingerprint('base.css', b'body {}'))
+    assert fingerprint('base.css', b'a') != fingerprint('base.css', b'b')
+
+def test_pages_link_external_styles(client):
+    """Test pages link fingerprinted CSS instead of inlining it"""
+    html = client.get('/aws').data.decode()
+    assert '<style>' not in html
+    urls = _stylesheets(html)
+    assert urls[0] == assets.url('base.css')
+    assert re.match(r'^/static/aws\.[0-9a-f]{12}\.css$', urls[1])
+
+def test_base_stylesheet_shared(client):
+    """Test every guide page links the same base stylesheet"""
+    for path in ('/', '/aws', '/digitalocean', '/demo'):
+        assert assets.url('base.css') in _stylesheets(client.get(path).data.decode())
+
+def test_asset_immutable_caching(client):
+    """Test assets are served with year-long immutable caching"""
+    response = client.get(assets.url('base.css'))
+    assert response.status_code == 200
+    assert response.headers['Cache-Control'] == 'public, max-age=31536000, immutable'
+    assert response.headers['Content-Type'].startswith('text/css')
+    assert b'.navbar' in response.data
+
+def test_unknown_asset_404(client):
+    """Test unknown asset names return 404"""
+    assert client.get('/static/missing.css').status_code == 404
+
+def test_write_assets(tmp_path):
+    """Test assets are written with gzip siblings for nginx"""
+    registry = AssetRegistry(Flask(__name__))
+    url = registry.add('base.css', 'body { color: red; }')
+    registry.write(str(tmp_path))
+    filename = url.rsplit('/', 1)[1]
+    assert (tmp_path / filename).read_text() == 'body { color: red; }'
+    assert (tmp_path / (filename + '.gz')).exists()
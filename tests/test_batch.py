@@ -0,0 +1,109 @@
+"""Tests for the batch calculator endpoint"""
+import json
+import pytest
+from src.app import app
+from src.calculator import CalculationError, calculate_batch
+
+@pytest.fixture
+def client(request):
+    app.config['TESTING'] = True
+    with app.test_client() as client:
+        # Batches are charged per item: a rate-limit bucket per test
+        client.environ_base['REMOTE_ADDR'] = request.node.name
+        yield client
+
+def test_calculate_batch():
+    """Test batch evaluation keeps order and reports per-item errors"""
+    results = calculate_batch([{'a': 1, 'b': 2}, {'a': 'x', 'b': 1}, {'a': 1},
+                               CalculationError('Invalid input'), {'a': '3', 'b': 4}])
+    assert results[0] == {'result': 3, 'operation': '1 + 2'}
+    assert results[1] == {'error': 'Invalid input', 'status': 400}
+    assert results[2] == {'error': 'Missing parameters', 'status': 400}
+    assert results[3] == {'error': 'Invalid input', 'status': 400}
+    assert results[4] == {'result': 7, 'operation': '3 + 4'}
+
+def test_batch_json_array(client):
+    """Test a JSON array batch returns a JSON array of results"""
+    response = client.post('/api/calculate/batch',
+                           data=json.dumps([{'a': 5, 'b': 7}, {'a': 'bad', 'b': 1}]),
+                           content_type='application/json')
+    assert response.status_code == 200
+    data = json.loads(response.data)
+    assert data[0]['result'] == 12
+    assert data[1] == {'error': 'Invalid input', 'status': 400}
+
+def test_batch_ndjson(client):
+    """Test NDJSON input streams NDJSON results"""
+    body = '{"a": 1, "b": 1}\n{oops\n\n{"a": 2, "b": 2}\n'
+    response = client.post('/api/calculate/batch', data=body,
+                           content_type='application/x-ndjson')
+    assert response.status_code == 200
+    assert response.mimetype == 'application/x-ndjson'
+    lines = [json.loads(line) for line in response.data.decode().splitlines()]
+    assert [line.get('result') for line in lines] == [2, None, 4]
+    assert lines[1]['error'] == 'Invalid input'
+
+def test_batch_large_streams(client):
+    """Test batches larger than one chunk are streamed intact"""
+    items = [{'a': i, 'b': i} for i in range(1000)]
+    response = client.post('/api/calculate/batch', data=json.dumps(items),
+                           content_type='application/json')
+    data = json.loads(response.data)
+    assert len(data) == 1000
+    assert data[-1]['result'] == 1998
+
+@pytest.mark.parametrize('body, content_type', [
+    ('[{"a": Infinity, "b": 1}, {"a": 1e400, "b": 1}, {"a": 1, "b": 1}]', 'application/json'),
+    ('{"a": Infinity, "b": 1}\n{"a": 1e400, "b": 1}\n{"a": 1, "b": 1}\n',
+     'application/x-ndjson'),
+])
+def test_batch_non_finite_numbers(client, body, content_type):
+    """Test infinite operands are per-item 400s, not a 500 for the whole batch"""
+    response = client.post('/api/calculate/batch', data=body, content_type=content_type)
+    assert response.status_code == 200
+    if content_type == 'application/json':
+        results = json.loads(response.data)
+    else:
+        results = [json.loads(line) for line in response.data.splitlines()]
+    assert results[:2] == [{'error': 'Invalid input', 'status': 400}] * 2
+    assert results[2]['result'] == 2
+
+def test_batch_not_a_list(client):
+    """Test a non-array body is rejected"""
+    response = client.post('/api/calculate/batch', data=json.dumps({'a': 1, 'b': 2}),
+                           content_type='application/json')
+    assert response.status_code == 400
+
+def test_batch_limits(client):
+    """Test item and byte limits return 413"""
+    app.config['BATCH_MAX_ITEMS'] = 2
+    try:
+        response = client.post('/api/calculate/batch', data=json.dumps([{'a': 1, 'b': 1}] * 3),
+                               content_type='application/json')
+    finally:
+        app.config['BATCH_MAX_ITEMS'] = 10000
+    assert response.status_code == 413
+    app.config['BATCH_MAX_BYTES'] = 10
+    try:
+        response = client.post('/api/calculate/batch', data=json.dumps([{'a': 1, 'b': 1}]),
+                               content_type='application/json')
+    finally:
+        app.config['BATCH_MAX_BYTES'] = 1024 * 1024
+    assert response.status_code == 413
+
+def test_batch_is_rate_limited_per_item(client, monkeypatch):
+    """Test a batch spends a token per item and gets a 429 once they run out"""
+    monkeypatch.setitem(app.config, 'RATELIMIT_RATE', 0.001)
+    monkeypatch.setitem(app.config, 'RATELIMIT_BURST', 5)
+    batch = json.dumps([{'a': 1, 'b': 1}] * 3)
+    first = client.post('/api/calculate/batch', data=batch, content_type='application/json')
+    assert first.status_code == 200
+    assert first.headers['RateLimit-Remaining'] == '2'
+    second = client.post('/api/calculate/batch', data=batch, content_type='application/json')
+    assert second.status_code == 429
+    assert second.json == {'error': 'Too many requests'}
+    # More items than the burst cost the whole burst, not a request that never passes
+    client.environ_base['REMOTE_ADDR'] += '-large'
+    large = json.dumps([{'a': 1, 'b': 1}] * 50)
+    assert client.post('/api/calculate/batch', data=large,
+                       content_type='application/json').status_code == 200
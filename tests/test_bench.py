@@ -0,0 +1,23 @@
+"""Tests for the benchmark regression check"""
+from bench.run import compare
+
+BASELINE = {'routes': {'health': {'rps': 1000.0, 'p99_ms': 10.0, 'cpu_ms_per_request': 1.0}}}
+
+def result(**stats):
+    return {'routes': {'health': dict(BASELINE['routes']['health'], **stats)}}
+
+def test_no_regression_within_threshold():
+    """Test changes below the threshold pass"""
+    assert compare(result(rps=950.0, p99_ms=10.5), BASELINE, 10) == []
+
+def test_regressions_are_reported():
+    """Test lower throughput and higher latency past the threshold are flagged"""
+    messages = compare(result(rps=800.0, p99_ms=12.0), BASELINE, 10)
+    assert len(messages) == 2
+    assert messages[0].startswith('health: rps')
+
+def test_improvements_and_new_routes_pass():
+    """Test faster results and routes missing from the baseline are not flagged"""
+    results = result(rps=2000.0, p99_ms=5.0)
+    results['routes']['aws'] = {'rps': 1.0}
+    assert compare(results, BASELINE, 10) == []
@@ -0,0 +1,79 @@
+"""Tests for response compression"""
+import gzip
+import json
+import pytest
+from flask import Flask, Response, jsonify
+from src.app import app, pages
+from src.compression import Compress, negotiate
+
+@pytest.fixture
+def client():
+    app.config['TESTING'] = True
+    with app.test_client() as client:
+        yield client
+
+def test_negotiate():
+    """Test Accept-Encoding negotiation honours q-values"""
+    assert negotiate(None, ('gzip',)) == 'identity'
+    assert negotiate('gzip, deflate', ('gzip',)) == 'gzip'
+    assert negotiate('gzip;q=0', ('gzip',)) == 'identity'
+    assert negotiate('*', ('gzip',)) == 'gzip'
+    assert negotiate('br;q=0.5, gzip', ('br', 'gzip')) == 'gzip'
+
+def test_page_gzip_variant(client):
+    """Test pages are served pre-compressed when gzip is accepted"""
+    response = client.get('/aws', headers={'Accept-Encoding': 'gzip'})
+    assert response.headers['Content-Encoding'] == 'gzip'
+    assert 'Accept-Encoding' in response.headers['Vary']
+    assert response.headers['Content-Length'] == str(len(response.data))
+    assert gzip.decompress(response.data) == pages.get('aws').body
+
+def test_page_identity_without_accept_encoding(client):
+    """Test pages are sent uncompressed by default"""
+    response = client.get('/aws')
+    assert 'Content-Encoding' not in response.headers
+    assert 'Accept-Encoding' in response.headers['Vary']
+
+def test_variant_etags_differ(client):
+    """Test each encoding has its own validator"""
+    plain = client.get('/demo').headers['ETag']
+    packed = client.get('/demo', headers={'Accept-Encoding': 'gzip'}).headers['ETag']
+    assert plain != packed
+    response = client.get('/demo', headers={'Accept-Encoding': 'gzip', 'If-None-Match': packed})
+    assert response.status_code == 304
+
+def _json_app():
+    test_app = Flask(__name__)
+    test_app.config['COMPRESS_MIN_SIZE'] = 100
+    Compress(test_app)
+
+    @test_app.route('/small')
+    def small():
+        return jsonify({'ok': True})
+
+    @test_app.route('/large')
+    def large():
+        return jsonify({'items': list(range(200))})
+
+    @test_app.route('/stream')
+    def stream():
+        return Response((json.dumps(i) + '\n' for i in range(100)),
+                        mimetype='application/json')
+    return test_app.test_client()
+
+def test_dynamic_json_threshold():
+    """Test JSON is compressed only above the size threshold"""
+    client = _json_app()
+    small = client.get('/small', headers={'Accept-Encoding': 'gzip'})
+    assert 'Content-Encoding' not in small.headers
+    large = client.get('/large', headers={'Accept-Encoding': 'gzip'})
+    assert large.headers['Content-Encoding'] == 'gzip'
+    assert json.loads(gzip.decompress(large.data))['items'][-1] == 199
+
+def test_streamed_json_compressed():
+    """Test streamed responses are compressed incrementally"""
+    client = _json_app()
+    response = client.get('/stream', headers={'Accept-Encoding': 'gzip'})
+    assert response.headers['Content-Encoding'] == 'gzip'
+    lines = gzip.decompress(response.data).decode().splitlines()
+    assert lines[-1] == '99'
@@ -0,0 +1,101 @@
+"""Tests for the static-site export"""
+import json
+import os
+import pytest
+from src.app import create_app
+from src.blueprints.guides import frozen_routes
+from src.export import MANIFEST, freeze, route_file
+from src.metrics import STATIC_RESPONSES
+
+FEATURES = ['guides', 'api', 'ops']
+
+@pytest.fixture(scope='module')
+def site(tmp_path_factory):
+    directory = str(tmp_path_factory.mktemp('site'))
+    freeze(directory, frozen_routes(create_app({'FEATURES': FEATURES})))
+    return directory
+
+@pytest.fixture(scope='module')
+def clients(site):
+    plain = create_app({'FEATURES': FEATURES})
+    static = create_app({'FEATURES': FEATURES, 'STATIC_SITE_DIR': site})
+    return plain.test_client(), static.test_client()
+
+def served():
+    return STATIC_RESPONSES.labels(status='200')._value.get()
+
+def test_route_file():
+    """Test URLs map to files nginx finds with try_files $uri $uri.html"""
+    assert route_file('/') == 'index.html'
+    assert route_file('/aws') == 'aws.html'
+    assert route_file('/aws/step/2') == 'aws/step/2.html'
+    assert route_file('/static/base.0123abcd.css') == 'static/base.0123abcd.css'
+
+def test_freeze_writes_files_and_manifest(site):
+    """Test every route has its file and compressed siblings listed in the manifest"""
+    with open(os.path.join(site, MANIFEST)) as fh:
+        routes = json.load(fh)['routes']
+    assert {'/', '/demo', '/aws', '/aws/all', '/aws/step/1'} <= set(routes)
+    assert any(url.startswith('/static/') for url in routes)
+    assert '/api/search' not in routes and '/health' not in routes
+    entry = routes['/aws/step/1']
+    assert entry['headers']['X-Robots-Tag'] == 'noindex'
+    assert {'identity', 'gzip'} <= set(entry['encodings'])
+    for variant in entry['encodings'].values():
+        assert os.path.getsize(os.path.join(site, variant['file'])) == variant['length']
+
+def test_static_site_matches_app(clients):
+    """Test exported routes serve the same bytes and headers as the app"""
+    plain, static = clients
+    css = plain.get('/').data.decode().split('href="/static/')[1].split('"')[0]
+    for path in ('/', '/demo', '/aws', '/aws/all', '/aws/step/2', '/static/' + css):
+        for accept in ('', 'gzip', 'br, gzip'):
+            expected = plain.get(path, headers={'Accept-Encoding': accept})
+            before = served()
+            response = static.get(path, headers={'Accept-Encoding': accept})
+            assert response.status_code == 200
+            assert response.data == expected.data
+            expected.headers.remove('X-Request-ID')
+            assert sorted(response.headers.items()) == sorted(expected.headers.items())
+            assert served() == before + 1  # answered by the export, not by Flask
+
+def test_static_site_conditional_and_head(clients):
+    """Test 304s for current validators and bodiless HEAD responses"""
+    _, static = clients
+    response = static.get('/aws', headers={'Accept-Encoding': 'gzip'})
+    revalidated = static.get('/aws', headers={'Accept-Encoding': 'gzip',
+                                              'If-None-Match': response.headers['ETag']})
+    assert revalidated.status_code == 304 and revalidated.data == b''
+    assert revalidated.headers['ETag'] == response.headers['ETag']
+    since = static.get('/aws', headers={'If-Modified-Since': response.headers['Last-Modified']})
+    assert since.status_code == 304
+    head = static.head('/aws')
+    assert head.status_code == 200 and head.data == b''
+    assert head.headers['Content-Length'] == static.get('/aws').headers['Content-Length']
+
+def test_static_site_passes_other_routes(clients):
+    """Test dynamic routes and other methods still reach the app"""
+    _, static = clients
+    assert static.get('/api/search?q=docker').status_code == 200
+    assert static.get('/health').status_code == 200
+    assert static.post('/aws').status_code == 405
+    assert static.get('/aws/step/99').status_code == 404
+
+def test_static_site_file_wrapper(site):
+    """Test bodies go through the server's wsgi.file_wrapper"""
+    app = create_app({'FEATURES': [], 'STATIC_SITE_DIR': site})
+    wrapped = []
+
+    def file_wrapper(fh, block_size):
+        wrapped.append(fh.name)
+        return iter(lambda: fh.read(block_size), b'')
+
+    environ = {'REQUEST_METHOD': 'GET', 'PATH_INFO': '/aws', 'wsgi.file_wrapper': file_wrapper}
+    body = b''.join(app.wsgi_app(environ, lambda status, headers: None))
+    assert wrapped == [os.path.join(site, 'aws.html')]
+    assert b'AWS' in body
+
+def test_static_site_needs_manifest(tmp_path):
+    """Test a missing export fails at startup instead of serving nothing"""
+    with pytest.raises(RuntimeError):
+        create_app({'FEATURES': [], 'STATIC_SITE_DIR': str(tmp_path)})
@@ -0,0 +1,74 @@
+"""Tests for the /metrics exposition"""
+import gzip
+import os
+import subprocess
+import sys
+import pytest
+from prometheus_client import CollectorRegistry, Counter
+from src.app import app
+from src.exposition import Exposition
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+OPENMETRICS = 'application/openmetrics-text; version=1.0.0'
+
+@pytest.fixture
+def client():
+    app.config['TESTING'] = True
+    with app.test_client() as client:
+        yield client
+
+@pytest.fixture
+def registry():
+    registry = CollectorRegistry()
+    Counter('jobs', 'Jobs processed', registry=registry).inc()
+    return registry
+
+def test_metrics_content_type(client):
+    """Test /metrics uses the Prometheus text content type"""
+    response = client.get('/metrics')
+    assert response.status_code == 200
+    assert response.headers['Content-Type'].startswith('text/plain; version=0.0.4')
+
+def test_metrics_openmetrics_negotiation(client):
+    """Test OpenMetrics is served when Prometheus asks for it"""
+    response = client.get('/metrics', headers={'Accept': OPENMETRICS})
+    assert response.headers['Content-Type'].startswith('application/openmetrics-text')
+    assert response.data.rstrip().endswith(b'# EOF')
+
+def test_metrics_gzip(client):
+    """Test gzip is used when accepted"""
+    response = client.get('/metrics', headers={'Accept-Encoding': 'gzip'})
+    assert response.headers['Content-Encoding'] == 'gzip'
+    assert b'http_requests_total' in gzip.decompress(response.data)
+
+def test_exposition_cached_within_ttl(registry):
+    """Test scrapes inside the window reuse the rendered output"""
+    exposition = Exposition(ttl=60, registry=registry)
+    first, _ = exposition.render()
+    registry._names_to_collectors['jobs'].inc()
+    second, _ = exposition.render()
+    assert first == second
+    assert Exposition(ttl=0, registry=registry).render()[0] != first
+
+def test_exposition_wsgi_app(registry):
+    """Test the standalone metrics app used for METRICS_PORT"""
+    exposition = Exposition(registry=registry)
+    statuses = []
+    body = b''.join(exposition.wsgi_app({'PATH_INFO': '/metrics'},
+                                        lambda status, headers: statuses.append(status)))
+    assert statuses == ['200 OK']
+    assert b'jobs_total 1.0' in body
+    exposition.wsgi_app({'PATH_INFO': '/other'}, lambda status, headers: statuses.append(status))
+    assert statuses[-1] == '404 Not Found'
+
+def test_metrics_port_needs_multiprocess_metrics_with_several_workers():
+    """Test gunicorn refuses METRICS_PORT when each worker would serve it"""
+    env = {key: value for key, value in os.environ.items()
+           if key != 'PROMETHEUS_MULTIPROC_DIR'}
+    env.update(WORKERS='2', METRICS_MULTIPROC='0', METRICS_PORT='9464')
+    result = subprocess.run([sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py',
+                             '--check-config'], cwd=ROOT, env=env, capture_output=True,
+                            text=True)
+    assert result.returncode != 0
+    assert 'METRICS_PORT with WORKERS > 1 needs multiprocess metrics' in result.stderr
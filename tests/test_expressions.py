@@ -0,0 +1,101 @@
+"""Tests for the expression calculator"""
+import json
+import pytest
+from src.app import app
+from src.calculator import CalculationError
+from src.expressions import MAX_INT_BITS, compile_expression, evaluate
+
+@pytest.fixture
+def client():
+    app.config['TESTING'] = True
+    with app.test_client() as client:
+        yield client
+
+def calc(expression, **variables):
+    return evaluate({'expression': expression, 'variables': variables})[1]
+
+@pytest.mark.parametrize('expression, expected', [
+    ('1 + 2 * 3', 7),
+    ('(1 + 2) * 3', 9),
+    ('-2 ** 2', -4),
+    ('2 ** 3 ** 2', 512),
+    ('2 ** -1', 0.5),
+    ('7 // 2 + 7 % 2', 4),
+    ('10 / 4', 2.5),
+    ('max(1, 5, 3) - min(4, 2)', 3),
+    ('round(2.567, 2)', 2.57),
+    ('sqrt(16) + abs(-3)', 7.0),
+    ('1e3 + .5', 1000.5),
+])
+def test_arithmetic(expression, expected):
+    """Test operators, precedence and functions follow Python's rules"""
+    assert calc(expression) == expected
+
+def test_variables():
+    """Test variables are bound at evaluation, not compile time"""
+    assert calc('a * (b + 2) ** 2', a=5, b=7) == 405
+    assert calc('a * (b + 2) ** 2', a=1, b=0) == 4
+    with pytest.raises(CalculationError, match='Unknown variable: b'):
+        calc('a + b', a=1)
+
+def test_compiled_cache():
+    """Test a repeated formula is compiled once"""
+    compile_expression.cache_clear()
+    for a in range(5):
+        calc('a * 2 + 1', a=a)
+    info = compile_expression.cache_info()
+    assert (info.misses, info.hits) == (1, 4)
+
+@pytest.mark.parametrize('expression, message', [
+    ('1 +', 'Invalid expression'),
+    ('__import__("os")', 'Invalid expression'),
+    ('x.y', 'Invalid expression'),
+    ('open(1)', 'Unknown function: open'),
+    ('1 / 0', 'Division by zero'),
+    ('(-8) ** 0.5', 'Result is not a real number'),
+    ('9 ** 9 ** 9', 'Number too large'),
+    ('2 ** %d' % (MAX_INT_BITS + 1), 'Number too large'),
+    ('1e308 * 10', 'Number too large'),
+    ('9' * 400, 'Number too large'),
+    ('+'.join(['1'] * 201), 'Expression too complex'),
+    ('(' * 40 + '1' + ')' * 40, 'Expression too complex'),
+    (' + '.join(['1'] * 200), 'Expression too long'),
+    ('min(1)', 'Wrong number of arguments for min()'),
+    ('round(5, -10000000)', 'Invalid operation'),
+    ('round(5, 101)', 'Invalid operation'),
+])
+def test_rejected(expression, message):
+    """Test unsafe, malformed and oversized expressions are rejected"""
+    with pytest.raises(CalculationError, match=message.replace('(', r'\(').replace(')', r'\)')):
+        calc(expression)
+
+def test_api_expression(client):
+    """Test /api/calculate evaluates expressions with variables"""
+    response = client.post('/api/calculate', json={'expression': ' a * (b + 2) ** 2 ',
+                                                   'variables': {'a': 5, 'b': 7}})
+    assert response.status_code == 200
+    assert response.json == {'result': 405, 'operation': 'a * (b + 2) ** 2'}
+
+@pytest.mark.parametrize('payload, message', [
+    ({'expression': '2 +'}, 'Invalid expression'),
+    ({'expression': 42}, 'Invalid expression'),
+    ({'expression': 'a', 'variables': {'a': '5'}}, 'Invalid variables'),
+    ({'expression': 'a', 'variables': {'a': True}}, 'Invalid variables'),
+    ({'expression': 'a', 'variables': [1]}, 'Invalid variables'),
+])
+def test_api_expression_errors(client, payload, message):
+    """Test expression errors are 400s with a message"""
+    response = client.post('/api/calculate', data=json.dumps(payload),
+                           content_type='application/json')
+    assert response.status_code == 400
+    assert response.json == {'error': message}
+
+def test_api_legacy_shape(client):
+    """Test {a, b} requests keep their response and 400 semantics"""
+    response = client.post('/api/calculate', json={'a': '5', 'b': 7})
+    assert response.json == {'result': 12, 'operation': '5 + 7'}
+    for payload, message in (({'a': 5}, 'Missing parameters'),
+                             ({'a': 'x', 'b': 1}, 'Invalid input')):
+        response = client.post('/api/calculate', json=payload)
+        assert response.status_code == 400
+        assert response.json == {'error': message}
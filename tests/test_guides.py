@@ -0,0 +1,188 @@
+"""Tests for Markdown guide content and the compiled guide bundle"""
+import os
+import tempfile
+import pytest
+from flask import Flask
+from src.app import app, guide_bundle, pages
+from src.assets import AssetRegistry
+from src.guides import (DEFAULT_BUNDLE, GuideBundle, build_bundle, load_bundle,
+                        private_directory)
+from src.markup import render, sections
+
+GUIDE = '''---
+title: Test Cloud
+nav: Test
+order: 5
+background: linear-gradient(#000, #fff)
+---
+
+## Overview
+
+Deploy <anywhere> with **ease** and [docs](https://example.com).
+
+::: step
+- one
+- two
+```
+echo "a" && echo b
+```
+:::
+'''
+
+@pytest.fixture
+def client():
+    app.config['TESTING'] = True
+    with app.test_client() as client:
+        yield client
+
+@pytest.fixture
+def assets():
+    registry = AssetRegistry(Flask(__name__))
+    registry.add('base.css', 'body {}')
+    registry.add('search.js', '')
+    registry.add('sections.js', '')
+    return registry
+
+@pytest.fixture
+def content(tmp_path):
+    directory = tmp_path / 'content'
+    directory.mkdir()
+    (directory / 'testcloud.md').write_text(GUIDE, encoding='utf-8')
+    return directory
+
+def test_markdown_subset():
+    """Test headings, containers, lists, code and inline markup"""
+    toc = []
+    html = render(GUIDE.split('---', 2)[2], toc)
+    assert toc == [('overview', 'Overview')]
+    assert '<p>Deploy &lt;anywhere&gt; with <strong>ease</strong> and ' \
+        '<a href="https://example.com">docs</a>.</p>' in html
+    assert '<div class="step">\n<ul>\n<li>one</li>\n<li>two</li>\n</ul>' in html
+    assert '<div class="command">echo "a" &amp;&amp; echo b</div>' in html
+
+def test_markdown_sections():
+    """Test guides split at ## headings and rejoin into the full render"""
+    text = 'Intro\n\n## First\n\none\n\n## Second `x`\n\n::: step\ntwo\n:::\n'
+    parts = sections(text)
+    assert [(anchor, title) for anchor, title, _ in parts] == \
+        [('first', 'First'), ('second-x', 'Second `x`')]
+    assert parts[0][2].startswith('<p>Intro</p>\n<h2 id="first">')
+    assert '\n'.join(html for _, _, html in parts) == render(text)
+
+def test_bundle_shell_and_fragments(tmp_path, content, assets):
+    """Test the shell inlines the first sections and links fragments for the rest"""
+    steps = ''.join('\n## Step %d\n\nDo thing %d.\n' % (n, n) for n in range(1, 5))
+    (content / 'testcloud.md').write_text(GUIDE + steps, encoding='utf-8')
+    bundle = GuideBundle(build_bundle(assets, str(content), str(tmp_path / 'g.bundle')))
+    [guide] = bundle.guides
+    shell = bytes(bundle.shell(guide).body).decode()
+    full = bytes(bundle.page(guide).body).decode()
+    assert 'Do thing 1.' in shell and 'Do thing 2.' not in shell
+    assert all('Do thing %d.' % n in full for n in range(1, 5))
+    assert '<section class="guide-section lazy" data-step="4" data-src="/testcloud/step/4">' \
+        '\n<h2 id="step-4"><a href="/testcloud/all#step-4">Step 4</a></h2>' in shell
+    assert assets.url('sections.js') in shell and assets.url('sections.js') not in full
+    fragments = bundle.fragments(guide)
+    assert [page.name for page in fragments] == ['testcloud/step/%d' % n for n in range(5)]
+    assert bytes(fragments[3].body).decode() == \
+        '<section class="guide-section" data-step="3">\n' \
+        '<h2 id="step-3">Step 3</h2>\n<p>Do thing 3.</p>\n</section>'
+    assert 'gzip' in fragments[3].variants
+
+def test_bundle_round_trip(tmp_path, content, assets):
+    """Test a built bundle serves the rendered page and its variants"""
+    bundle = GuideBundle(build_bundle(assets, str(content), str(tmp_path / 'g.bundle')))
+    [guide] = bundle.guides
+    assert guide['slug'] == 'testcloud' and guide['path'] == '/testcloud'
+    assert guide['sections'] == [{'id': 'overview', 'title': 'Overview'}]
+    page = bundle.page(guide)
+    body = bytes(page.body)
+    assert b'<title>Test Cloud - DeployHub</title>' in body
+    assert 'gzip' in page.variants
+    assert assets.url('testcloud.css').encode() in body
+
+def test_bundle_rebuilt_when_content_changes(tmp_path, content, assets):
+    """Test an edited or added guide triggers a rebuild on load"""
+    path = str(tmp_path / 'g.bundle')
+    first = load_bundle(assets, str(content), path)
+    assert load_bundle(assets, str(content), path).index['built'] == first.index['built']
+    (content / 'other.md').write_text('---\ntitle: Other\n---\n', encoding='utf-8')
+    assert [g['slug'] for g in load_bundle(assets, str(content), path).guides] == \
+        ['testcloud', 'other']
+
+def test_corrupt_bundle_is_rebuilt(tmp_path, content, assets):
+    """Test a truncated or foreign file is replaced instead of served"""
+    path = tmp_path / 'g.bundle'
+    path.write_bytes(b'junk')
+    assert load_bundle(assets, str(content), str(path)).guides[0]['slug'] == 'testcloud'
+
+def test_guides_served_from_bundle(client):
+    """Test every bundled guide has a route serving the mapped bytes"""
+    assert [g['slug'] for g in guide_bundle.guides] == \
+        ['aws', 'digitalocean', 'docker', 'cicd', 'monitoring']
+    for guide in guide_bundle.guides:
+        response = client.get(guide['path'])
+        assert response.status_code == 200
+        assert response.data == pages.get(guide['slug']).body
+
+def test_home_lists_every_guide(client):
+    """Test home page cards and navigation come from the bundle metadata"""
+    html = client.get('/').data.decode()
+    for guide in guide_bundle.guides:
+        assert 'href="%s"' % guide['path'] in html
+        assert guide['summary'] in html
+
+def test_bundle_file_is_readable():
+    """Test the bundle can be mapped by workers running as another user"""
+    assert os.stat(guide_bundle.path).st_mode & 0o044 == 0o044
+
+def test_default_bundle_outside_source_tree():
+    """Test the bundle is built in this user's temp directory, not into src/content"""
+    directory = os.path.dirname(DEFAULT_BUNDLE)
+    assert os.path.dirname(directory) == tempfile.gettempdir()
+    info = os.lstat(directory)
+    assert info.st_uid == os.getuid() and not info.st_mode & 0o022
+
+def test_shared_bundle_directory_refused(tmp_path):
+    """Test a bundle directory others can write to, or a symlink, is not used"""
+    shared = tmp_path / 'shared'
+    shared.mkdir()
+    shared.chmod(0o777)
+    (tmp_path / 'link').symlink_to(tmp_path)
+    for path in (shared, tmp_path / 'link'):
+        with pytest.raises(RuntimeError):
+            private_directory(str(path))
+    private_directory(str(tmp_path / 'private'))
+    assert not os.stat(tmp_path / 'private').st_mode & 0o022
+
+def test_guide_fragments_served(client):
+    """Test each section is served as a cacheable, non-indexed fragment"""
+    guide = guide_bundle.guides[0]
+    response = client.get('%s/step/4' % guide['path'])
+    assert response.status_code == 200
+    assert response.data == pages.get('%s/step/4' % guide['slug']).body
+    assert response.data.startswith(b'<section class="guide-section" data-step="4">')
+    assert response.headers['X-Robots-Tag'] == 'noindex'
+    assert response.headers['ETag']
+    assert client.get('%s/step/4' % guide['path'],
+                      headers={'If-None-Match': response.headers['ETag']}).status_code == 304
+    count = len(guide['sections'])
+    assert client.get('%s/step/%d' % (guide['path'], count)).status_code == 404
+
+def test_guide_shell_and_full_page(client):
+    """Test the guide route serves the shell and /all the whole guide"""
+    # Guides with sections beyond the shell's first two (not the stubs)
+    guides = [guide for guide in guide_bundle.guides if len(guide['sections']) > 2]
+    assert guides
+    for guide in guides:
+        shell = client.get(guide['path']).data.decode()
+        full = client.get(guide['path'] + '/all').data.decode()
+        for number, section in enumerate(guide['sections']):
+            heading = '<h2 id="%s">' % section['id']
+            assert heading in full
+            if number >= 2:
+                assert 'data-src="%s/step/%d"' % (guide['path'], number) in shell
+                assert 'href="%s/all#%s"' % (guide['path'], section['id']) in shell
+            else:
+                assert heading in shell
+        assert len(shell) < len(full)
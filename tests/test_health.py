@@ -0,0 +1,98 @@
+"""Tests for the liveness and readiness probes"""
+import os
+import threading
+import pytest
+from flask import Flask
+from src.admission import AdmissionControl
+from src.app import app
+from src.health import HealthChecks, load_check, multiproc_check
+
+@pytest.fixture
+def client():
+    app.config['TESTING'] = True
+    with app.test_client() as client:
+        yield client
+
+@pytest.fixture
+def probes():
+    """A bare app with a HealthChecks whose checks the test controls"""
+    test_app = Flask(__name__)
+    checks = HealthChecks(test_app)
+    return checks, test_app.test_client()
+
+def test_livez(client):
+    """Test liveness answers without running checks"""
+    response = client.get('/livez')
+    assert response.status_code == 200
+    assert response.json == {'status': 'alive'}
+    assert response.headers['Cache-Control'] == 'no-store'
+
+def test_readyz(client):
+    """Test the app's readiness checks pass"""
+    response = client.get('/readyz')
+    assert response.status_code == 200
+    data = response.json
+    assert data['status'] == 'ready'
+    assert set(data['checks']) == {'guides', 'metrics', 'load'}
+    assert all(check['ok'] for check in data['checks'].values())
+
+def test_readyz_serves_cached_result(probes):
+    """Test probes don't run checks; only the background refresh does"""
+    checks, client = probes
+    calls = []
+    checks.add('counted', lambda: calls.append(1) or 'ok')
+    checks.start()
+    checks.stop()
+    for _ in range(5):
+        assert client.get('/readyz').status_code == 200
+    assert len(calls) == 1
+
+def test_failing_check(probes):
+    """Test a raising check makes readiness fail with its message"""
+    checks, client = probes
+
+    def broken():
+        raise RuntimeError('disk full')
+
+    checks.add('ok', lambda: 'fine')
+    checks.add('broken', broken)
+    assert checks.run_checks() is False
+    checks._pid = os.getpid()
+    response = client.get('/readyz')
+    assert response.status_code == 503
+    assert response.json['checks']['broken'] == {'ok': False, 'detail': 'disk full'}
+    assert response.json['checks']['ok']['ok'] is True
+
+def test_stale_results(probes):
+    """Test results older than three intervals are not trusted"""
+    checks, client = probes
+    checks.app.config['READINESS_INTERVAL'] = 0.0001
+    checks.run_checks()
+    checks._pid = os.getpid()
+    threading.Event().wait(0.01)
+    response = client.get('/readyz')
+    assert response.status_code == 503
+    assert response.json['error'] == 'checks are stale'
+
+def test_multiproc_check(tmp_path):
+    """Test the metrics check requires a writable directory"""
+    assert multiproc_check(None)() == 'in-process registry'
+    assert multiproc_check(str(tmp_path))() == str(tmp_path)
+    with pytest.raises(RuntimeError):
+        multiproc_check(str(tmp_path / 'missing'))()
+
+def test_load_check_after_shedding():
+    """Test shedding since the last check marks the worker overloaded"""
+    test_app = Flask(__name__)
+    admission = AdmissionControl(test_app)
+    check = load_check(admission)
+    assert check() == '0/20 in flight'
+    admission.shed += 3
+    with pytest.raises(RuntimeError, match='shed 3'):
+        check()
+    assert check() == '0/20 in flight'
+
+def test_guide_bundle_check():
+    """Test the bundle check reports the mapped guides"""
+    bundle = app.extensions['health']._checks['guides']
+    assert bundle().endswith(' guides')
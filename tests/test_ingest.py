@@ -0,0 +1,160 @@
+"""Tests for bounded request-body ingestion"""
+import io
+import json
+import pytest
+from src.app import app
+from src.ingest import BodyRejected, read_body, too_deep
+from src.metrics import REQUEST_BODIES_REJECTED
+
+@pytest.fixture
+def client(request):
+    app.config['TESTING'] = True
+    with app.test_client() as client:
+        # A rate-limit bucket per test, so these don't drain the shared one
+        client.environ_base['REMOTE_ADDR'] = request.node.name
+        yield client
+
+class CountingStream(io.BytesIO):
+    """A body stream that records how many bytes were read"""
+    def __init__(self, data):
+        super().__init__(data)
+        self.consumed = 0
+
+    def read(self, size=-1):
+        chunk = super().read(size)
+        self.consumed += len(chunk)
+        return chunk
+
+def rejected(endpoint, reason):
+    return REQUEST_BODIES_REJECTED.labels(endpoint=endpoint, reason=reason)._value.get()
+
+def read(data, max_bytes=65536, max_depth=32, max_digits=400, content_length=None):
+    return read_body(io.BytesIO(data), content_length, max_bytes, max_depth, max_digits)
+
+def test_read_body_passes_valid_json():
+    """Test bodies within every limit are returned unchanged"""
+    body = json.dumps({'a': [[1, 2], {'b': '9' * 400}], 'c': 12345.678e10}).encode()
+    assert read(body) == body
+
+def test_read_body_content_length_rejected_unread():
+    """Test an oversized Content-Length is refused before reading anything"""
+    stream = CountingStream(b'x' * 100)
+    with pytest.raises(BodyRejected) as exc:
+        read_body(stream, 10 ** 9, 1024, 32, 400)
+    assert exc.value.status == 413 and exc.value.reason == 'too_large'
+    assert stream.consumed == 0
+
+def test_read_body_stops_at_byte_limit():
+    """Test a body without a usable length stops being read past the limit"""
+    stream = CountingStream(b'[' + b'1,' * 500000 + b'1]')
+    with pytest.raises(BodyRejected) as exc:
+        read_body(stream, None, 65536, 32, 400)
+    assert exc.value.status == 413
+    assert stream.consumed <= 65536 + 16384
+
+def test_read_body_digit_run_rejected_early():
+    """Test a giant number is rejected in the chunk it starts in"""
+    stream = CountingStream(b'{"a": ' + b'9' * 500000 + b', "b": 1}')
+    with pytest.raises(BodyRejected) as exc:
+        read_body(stream, None, 1024 * 1024, 32, 400)
+    assert exc.value.reason == 'number_too_long'
+    assert stream.consumed <= 2 * 16384
+
+def test_read_body_digit_run_across_chunks():
+    """Test a digit run split over a chunk boundary is still found"""
+    body = b' ' * (16384 - 200) + b'[' + b'7' * 401 + b']'
+    with pytest.raises(BodyRejected):
+        read(body)
+    assert read(b' ' * (16384 - 200) + b'[' + b'7' * 400 + b']')
+
+def test_read_body_deep_nesting_rejected_early():
+    """Test runs of openers are rejected before the body is complete"""
+    for opener in (b'[', b'{"a":', b'{"key" : '):
+        stream = CountingStream(opener * 200000)
+        with pytest.raises(BodyRejected) as exc:
+            read_body(stream, None, 10 * 1024 * 1024, 32, 400)
+        assert exc.value.reason == 'too_deep'
+        assert stream.consumed <= 2 * 16384
+
+def test_too_deep_exact():
+    """Test the exact depth check counts real nesting, not brackets in strings"""
+    assert not too_deep(b'[' * 32 + b']' * 32, 32)
+    assert too_deep(b'[' * 33 + b']' * 33, 32)
+    assert not too_deep(b'[[[1], [2]], [[3]]]', 3)
+    assert too_deep(b'[[[1], [2]], [[[3]]]]', 3)
+    assert not too_deep(b'["[[[[[[", "]]]]]]"]', 2)
+    assert not too_deep(b'{"a": "\\"[[[["}', 1)
+
+def test_read_body_interleaved_nesting_rejected():
+    """Test nesting hidden between values is caught by the exact check"""
+    body = b''.join(b'[1, ' for _ in range(40)) + b'1' + b']' * 40
+    with pytest.raises(BodyRejected) as exc:
+        read(body)
+    assert exc.value.reason == 'too_deep'
+
+def test_calculate_oversized(client):
+    """Test /api/calculate refuses bodies over CALCULATE_MAX_BYTES with 413"""
+    before = rejected('api_calculate', 'too_large')
+    body = json.dumps({'a': 1, 'b': 2, 'pad': 'x' * 5000})
+    response = client.post('/api/calculate', data=body, content_type='application/json')
+    assert response.status_code == 413
+    assert response.get_json() == {'error': 'Request body too large'}
+    assert rejected('api_calculate', 'too_large') == before + 1
+
+def test_calculate_long_number(client):
+    """Test numbers with too many digits are rejected with 400"""
+    response = client.post('/api/calculate', data='{"a": %s, "b": 1}' % ('9' * 1000),
+                           content_type='application/json')
+    assert response.status_code == 400
+    assert response.get_json() == {'error': 'Number too long'}
+
+def test_calculate_deep_nesting(client):
+    """Test deeply nested bodies are rejected with 400"""
+    before = rejected('api_calculate', 'too_deep')
+    response = client.post('/api/calculate', data='[' * 100 + ']' * 100,
+                           content_type='application/json')
+    assert response.status_code == 400
+    assert response.get_json() == {'error': 'Nesting too deep'}
+    assert rejected('api_calculate', 'too_deep') == before + 1
+
+def test_calculate_invalid_json(client):
+    """Test malformed JSON is a 400, not a server error"""
+    response = client.post('/api/calculate', data='{"a": 1,', content_type='application/json')
+    assert response.status_code == 400
+    assert response.get_json() == {'error': 'Invalid JSON'}
+
+def test_calculate_wrong_content_type(client):
+    """Test non-JSON bodies are rejected with 415"""
+    response = client.post('/api/calculate', data='a=1&b=2',
+                           content_type='application/x-www-form-urlencoded')
+    assert response.status_code == 415
+
+def test_calculate_within_limits(client):
+    """Test the existing {a, b} and expression payloads are unaffected"""
+    response = client.post('/api/calculate', json={'a': 5, 'b': 7})
+    assert response.get_json() == {'result': 12, 'operation': '5 + 7'}
+    response = client.post('/api/calculate', json={'expression': 'x * 2', 'variables': {'x': 4}})
+    assert response.status_code == 200
+
+def test_batch_limits(client):
+    """Test the batch endpoint applies the limits to JSON and NDJSON bodies"""
+    response = client.post('/api/calculate/batch', data='[' * 100 + ']' * 100,
+                           content_type='application/json')
+    assert response.status_code == 400
+    body = '{"a": 1, "b": %s}\n' % ('1' * 500)
+    response = client.post('/api/calculate/batch', data=body,
+                           content_type='application/x-ndjson')
+    assert response.status_code == 400
+    response = client.post('/api/calculate/batch', data='{"a": 1, "b": 1}\n',
+                           content_type='application/x-ndjson')
+    assert response.status_code == 200
+
+def test_limits_disabled(client):
+    """Test BODY_LIMITS_ENABLED=False falls back to plain parsing"""
+    app.config['BODY_LIMITS_ENABLED'] = False
+    try:
+        response = client.post('/api/calculate', data='{"a": %s, "b": 1}' % ('9' * 1000),
+                               content_type='application/json')
+    finally:
+        app.config['BODY_LIMITS_ENABLED'] = True
+    assert response.status_code == 200
@@ -0,0 +1,97 @@
+"""Tests for the fast JSON provider"""
+import datetime
+import pytest
+from flask import Flask
+from src import jsonprovider
+from src.app import app
+from src.jsonprovider import FastJSONProvider
+
+requires_orjson = pytest.mark.skipif(jsonprovider.orjson is None, reason='orjson not installed')
+
+PAYLOADS = [
+    {'result': 12, 'operation': '5 + 7'},
+    {'status': 'healthy', 'timestamp': 1760000000.123456},
+    {'error': 'Missing parameters'},
+    [{'result': -3, 'operation': '-1 + -2'}, {'error': 'Invalid input', 'status': 400}],
+    {'query': 'café "docker"', 'results': [{'snippet': '<mark>Docker</mark> – build\n',
+                                            'score': 1.5, 'url': '/docker#step-1'}]},
+    {'nested': {'z': None, 'a': [True, False, 0.1, -0.0]}, 'emoji': '🚀 '},
+]
+
+@pytest.fixture
+def stdlib(monkeypatch):
+    monkeypatch.setattr(jsonprovider, 'orjson', None)
+
+@pytest.fixture
+def client():
+    app.config['TESTING'] = True
+    with app.test_client() as client:
+        yield client
+
+def dump_all():
+    return [app.json.dumps_bytes(payload) for payload in PAYLOADS]
+
+@requires_orjson
+def test_orjson_and_stdlib_bytes_identical(monkeypatch):
+    """Test both encoders produce the same bytes for API payloads"""
+    fast = dump_all()
+    monkeypatch.setattr(jsonprovider, 'orjson', None)
+    assert dump_all() == fast
+
+@requires_orjson
+def test_responses_identical(client, monkeypatch):
+    """Test API responses are byte-identical with and without orjson"""
+    def responses():
+        return [client.post('/api/calculate', json={'a': 5, 'b': 7}).data,
+                client.post('/api/calculate', json={'a': 5}).data,
+                client.post('/api/calculate/batch', json=[{'a': 1, 'b': 2}, {}]).data,
+                client.get('/api/search?q=docker').data]
+    fast = responses()
+    monkeypatch.setattr(jsonprovider, 'orjson', None)
+    assert responses() == fast
+
+def test_compact_unsorted_output(client):
+    """Test responses are compact, keep key order and end with a newline"""
+    app.debug = True
+    try:
+        data = client.post('/api/calculate', json={'a': 5, 'b': 7}).data
+    finally:
+        app.debug = False
+    assert data == b'{"result":12,"operation":"5 + 7"}\n'
+
+@pytest.mark.parametrize('encoder', ['fast', 'stdlib'])
+def test_fallbacks(encoder, request):
+    """Test values orjson rejects or changes still round-trip exactly"""
+    if encoder == 'stdlib':
+        request.getfixturevalue('stdlib')
+    big = 10 ** 30
+    assert app.json.dumps_bytes({'result': big}) == b'{"result":%d}' % big
+    assert app.json.loads('{"a": %d}' % big) == {'a': big}
+    assert app.json.loads(b'[NaN]')[0] != app.json.loads(b'[NaN]')[0]
+    assert app.json.dumps({1: 'x'}) == '{"1":"x"}'
+
+@pytest.mark.parametrize('encoder', ['fast', 'stdlib'])
+def test_non_finite_floats_rejected(encoder, request):
+    """Test NaN and infinities raise instead of encoding as null or NaN"""
+    if encoder == 'stdlib':
+        request.getfixturevalue('stdlib')
+    for value in (float('nan'), float('inf'), [None, -float('inf')]):
+        with pytest.raises(ValueError):
+            app.json.dumps_bytes({'result': value})
+    assert app.json.dumps_bytes({'result': None}) == b'{"result":null}'
+
+def test_flask_types_unchanged():
+    """Test dates and other Flask-handled types encode like the default provider"""
+    when = datetime.datetime(2024, 1, 2, 3, 4, 5, tzinfo=datetime.timezone.utc)
+    default = Flask(__name__).json
+    assert app.json.dumps({'at': when}) == '{"at":"Tue, 02 Jan 2024 03:04:05 GMT"}'
+    assert app.json.loads(app.json.dumps({'at': when})) == default.loads(default.dumps({'at': when}))
+
+def test_dumps_with_arguments_uses_stdlib():
+    """Test dumps() keeps honouring json.dumps arguments"""
+    assert app.json.dumps({'b': 1, 'a': 2}, indent=2, sort_keys=True) == '{\n  "a": 2,\n  "b": 1\n}'
+
+def test_invalid_json_still_rejected():
+    """Test malformed bodies raise ValueError like the stdlib decoder"""
+    with pytest.raises(ValueError):
+        FastJSONProvider(app).loads('{"a": 1,')
@@ -0,0 +1,72 @@
+"""Tests for the structured logging pipeline"""
+import json
+import logging
+import queue
+import pytest
+from src.app import app
+from src.logs import (BoundedQueueHandler, JsonFormatter, RequestContextFilter,
+                      _request_ctx, parse_sample_rates)
+from src.metrics import LOG_RECORDS_DROPPED, LOG_RECORDS_SAMPLED
+
+@pytest.fixture
+def client():
+    app.config['TESTING'] = True
+    with app.test_client() as client:
+        yield client
+
+def make_record(msg='hello %s', args=('world',), level=logging.INFO):
+    return logging.LogRecord('test', level, __file__, 1, msg, args, None)
+
+def test_parse_sample_rates():
+    """Test the LOG_SAMPLE_RATES format"""
+    assert parse_sample_rates('api_calculate=0.1, demo=1') == {'api_calculate': 0.1, 'demo': 1.0}
+    assert parse_sample_rates('') == {}
+
+def test_json_formatter_includes_request_fields():
+    """Test records are rendered as one JSON object with request fields"""
+    record = make_record()
+    record.request_id, record.endpoint, record.latency_ms = 'abc', 'aws', 1.5
+    entry = json.loads(JsonFormatter().format(record))
+    assert entry['message'] == 'hello world'
+    assert entry['request_id'] == 'abc'
+    assert entry['endpoint'] == 'aws'
+    assert entry['latency_ms'] == 1.5
+
+def test_records_enqueued_unformatted():
+    """Test message formatting is left to the writer thread"""
+    handler = BoundedQueueHandler(queue.Queue())
+    handler.handle(make_record())
+    record = handler.queue.get_nowait()
+    assert record.msg == 'hello %s'
+    assert record.args == ('world',)
+
+def test_full_queue_drops_are_counted():
+    """Test a full queue drops records and counts them"""
+    handler = BoundedQueueHandler(queue.Queue(maxsize=1))
+    before = LOG_RECORDS_DROPPED._value.get()
+    for _ in range(3):
+        handler.handle(make_record())
+    assert LOG_RECORDS_DROPPED._value.get() == before + 2
+
+def test_sampling_only_affects_info_on_sampled_endpoints():
+    """Test sampled endpoints drop INFO but keep errors"""
+    sampler = RequestContextFilter({'api_calculate': 0.0})
+    before = LOG_RECORDS_SAMPLED._value.get()
+    token = _request_ctx.set(('id', 'api_calculate', 0))
+    try:
+        assert not sampler.filter(make_record())
+        assert sampler.filter(make_record(level=logging.ERROR))
+    finally:
+        _request_ctx.reset(token)
+    assert LOG_RECORDS_SAMPLED._value.get() == before + 1
+    token = _request_ctx.set(('id', 'aws', 0))
+    try:
+        assert sampler.filter(make_record())
+    finally:
+        _request_ctx.reset(token)
+
+def test_request_id_echoed(client):
+    """Test the request id is propagated or generated"""
+    response = client.get('/health', headers={'X-Request-ID': 'trace-123'})
+    assert response.headers['X-Request-ID'] == 'trace-123'
+    assert len(client.get('/health').headers['X-Request-ID']) == 32
@@ -0,0 +1,39 @@
+"""Tests for per-worker memory accounting"""
+import pytest
+from src.app import create_app
+from src.memory import MemoryStats, read_memory
+from src.metrics import PROCESS_MEMORY
+
+def test_read_memory():
+    """Test the kinds are read from /proc and ordered as they must be"""
+    memory = read_memory()
+    if memory is None:
+        pytest.skip('no /proc')
+    assert 0 < memory['uss'] <= memory['pss'] <= memory['rss']
+    assert memory['uss'] + memory['shared'] == memory['rss']
+
+def test_read_memory_missing_process():
+    """Test a process that has gone away reads as None"""
+    assert read_memory(2 ** 22 + 1) is None
+
+def test_sample_sets_gauges():
+    """Test a sample updates process_memory_bytes for every kind"""
+    stats = MemoryStats(create_app({'FEATURES': []}))
+    memory = stats.sample()
+    if memory is None:
+        pytest.skip('no /proc')
+    for kind, value in memory.items():
+        assert PROCESS_MEMORY.labels(kind=kind)._value.get() == value
+
+def test_start_and_stop():
+    """Test the sampler thread can be stopped and started again"""
+    stats = MemoryStats(create_app({'FEATURES': [], 'MEMORY_SAMPLE_INTERVAL': 0.01}))
+    if stats.sample() is None:
+        pytest.skip('no /proc')
+    stats.start()
+    first = stats._thread
+    assert first.is_alive()
+    stats.start()
+    assert not first.is_alive() and stats._thread.is_alive()
+    stats.stop()
+    assert stats._thread is None
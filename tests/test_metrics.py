@@ -0,0 +1,49 @@
+"""Tests for request instrumentation"""
+import pytest
+from src.app import app
+from src.metrics import REQUEST_COUNT, REQUEST_DURATION, RESPONSE_SIZE, IN_FLIGHT
+
+@pytest.fixture
+def client():
+    app.config['TESTING'] = True
+    with app.test_client() as client:
+        yield client
+
+def sample(metric, name, **labels):
+    for family in metric.collect():
+        for s in family.samples:
+            if s.name == name and all(s.labels.get(k) == v for k, v in labels.items()):
+                return s.value
+    return 0.0
+
+def test_request_counted_per_endpoint(client):
+    """Test requests are counted under their endpoint and status"""
+    before = sample(REQUEST_COUNT, 'http_requests_total',
+                    method='GET', endpoint='aws', status='200')
+    client.get('/aws')
+    after = sample(REQUEST_COUNT, 'http_requests_total',
+                   method='GET', endpoint='aws', status='200')
+    assert after == before + 1
+
+def test_unmatched_route_is_unknown(client):
+    """Test 404s are recorded under the 'unknown' endpoint"""
+    labels = {'method': 'GET', 'endpoint': 'unknown', 'status': '404'}
+    before = sample(REQUEST_COUNT, 'http_requests_total', **labels)
+    client.get('/does-not-exist')
+    assert sample(REQUEST_COUNT, 'http_requests_total', **labels) == before + 1
+
+def test_duration_and_size_observed(client):
+    """Test duration and response size histograms are updated"""
+    labels = {'method': 'GET', 'endpoint': 'health'}
+    count = sample(REQUEST_DURATION, 'http_request_duration_seconds_count', **labels)
+    total = sample(RESPONSE_SIZE, 'http_response_size_bytes_sum', **labels)
+    response = client.get('/health')
+    assert sample(REQUEST_DURATION, 'http_request_duration_seconds_count',
+                  **labels) == count + 1
+    assert sample(RESPONSE_SIZE, 'http_response_size_bytes_sum',
+                  **labels) == total + len(response.data)
+
+def test_in_flight_returns_to_zero(client):
+    """Test the in-flight gauge is released after each request"""
+    client.get('/')
+    assert sample(IN_FLIGHT, 'http_requests_in_flight') == 0
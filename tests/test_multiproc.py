@@ -0,0 +1,79 @@
+"""Tests for multiprocess metrics aggregation"""
+import json
+import os
+import re
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Runs in a fresh interpreter: prometheus_client picks its value class at import
+WORKERS_SCRIPT = '''
+import json, os
+from src.app import app
+from src import multiproc
+path = os.environ['PROMETHEUS_MULTIPROC_DIR']
+pids = []
+for n in range(int(os.environ['WORKERS'])):
+    pid = os.fork()
+    if pid == 0:
+        client = app.test_client()
+        for _ in range(n + 1):
+            client.get('/aws')
+        os._exit(0)
+    pids.append(pid)
+for pid in pids:
+    os.waitpid(pid, 0)
+    multiproc.worker_exited(pid, path)
+print(json.dumps({'files': multiproc.file_count(path),
+                  'metrics': multiproc.generate(path).decode()}))
+'''
+
+def run_workers(tmp_path, workers):
+    tmp_path.mkdir(exist_ok=True)
+    env = dict(os.environ, PROMETHEUS_MULTIPROC_DIR=str(tmp_path), WORKERS=str(workers))
+    out = subprocess.run([sys.executable, '-c', WORKERS_SCRIPT], cwd=ROOT, env=env,
+                         capture_output=True, text=True, check=True).stdout
+    return json.loads(out.strip().splitlines()[-1])
+
+def aws_count(metrics):
+    match = re.search(r'http_requests_total\{endpoint="aws",method="GET",status="200"\} (\S+)',
+                      metrics)
+    return float(match.group(1))
+
+def test_counts_aggregate_across_forked_workers(tmp_path):
+    """Test /metrics sums requests served by every worker"""
+    result = run_workers(tmp_path, 3)
+    assert aws_count(result['metrics']) == 1 + 2 + 3
+
+def test_dead_worker_files_are_compacted(tmp_path):
+    """Test scrape cost does not grow with the number of exited workers"""
+    few = run_workers(tmp_path / 'few', 2)
+    many = run_workers(tmp_path / 'many', 8)
+    assert few['files'] == many['files']
+    assert aws_count(many['metrics']) == sum(range(1, 9))
+
+def test_worker_exit_is_safe_to_reenter(tmp_path, monkeypatch):
+    """Test a SIGCHLD arriving mid-compaction is queued instead of deadlocking"""
+    from src import multiproc
+    compacted = []
+
+    def compact(pid, path):
+        compacted.append(pid)
+        if pid == 1:
+            # gunicorn reaps the next worker from inside the signal handler
+            multiproc.worker_exited(2, path)
+
+    monkeypatch.setattr(multiproc, 'compact_worker', compact)
+    multiproc.worker_exited(1, str(tmp_path))
+    assert compacted == [1, 2]
+
+def test_reset_directory_removes_only_metric_files(tmp_path):
+    """Test a reused PROMETHEUS_MULTIPROC_DIR keeps files that aren't metrics"""
+    from src import multiproc
+    (tmp_path / 'counter_123.db').write_bytes(b'x')
+    (tmp_path / 'notes.txt').write_text('keep')
+    multiproc.reset_directory(str(tmp_path))
+    assert os.listdir(tmp_path) == ['notes.txt']
+    multiproc.reset_directory(str(tmp_path / 'new'))
+    assert os.path.isdir(tmp_path / 'new')
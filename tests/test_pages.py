@@ -0,0 +1,83 @@
+"""Tests for the pre-rendered page cache"""
+import pytest
+from flask import Flask
+from src.app import app, pages
+from src.pages import PageCache
+
+@pytest.fixture
+def client():
+    app.config['TESTING'] = True
+    with app.test_client() as client:
+        yield client
+
+def test_all_guide_pages_cached():
+    """Test every guide route is pre-rendered at startup"""
+    for name in ('home', 'aws', 'digitalocean', 'docker', 'cicd', 'monitoring', 'demo'):
+        assert name in pages
+        assert pages.get(name).body
+
+def test_cached_response_content_length(client):
+    """Test cached pages carry a precomputed Content-Length"""
+    response = client.get('/aws')
+    assert response.status_code == 200
+    assert response.headers['Content-Length'] == str(len(response.data))
+    assert response.data == pages.get('aws').body
+
+def test_uncached_mode_matches(client):
+    """Test rendering per request produces the same page"""
+    app.config['PAGE_CACHE'] = False
+    try:
+        response = client.get('/demo')
+    finally:
+        app.config['PAGE_CACHE'] = True
+    assert response.data == pages.get('demo').body
+
+def test_auto_reload_invalidates_changed_source():
+    """Test a changed template is rebuilt in development"""
+    test_app = Flask(__name__)
+    test_app.config['TEMPLATES_AUTO_RELOAD'] = True
+    cache = PageCache(test_app)
+    source = {'text': '<p>one</p>'}
+    cache.register('page', lambda: source['text'])
+    cache.build_all()
+    assert cache.get('page').body == b'<p>one</p>'
+    source['text'] = '<p>two</p>'
+    assert cache.get('page').body == b'<p>two</p>'
+
+def test_production_serves_cached_bytes():
+    """Test production mode keeps serving the built page"""
+    test_app = Flask(__name__)
+    test_app.config['TEMPLATES_AUTO_RELOAD'] = False
+    cache = PageCache(test_app)
+    source = {'text': '<p>one</p>'}
+    cache.register('page', lambda: source['text'])
+    cache.build_all()
+    source['text'] = '<p>two</p>'
+    assert cache.get('page').body == b'<p>one</p>'
+
+def test_page_etag_and_cache_headers(client):
+    """Test pages carry a strong ETag, Last-Modified and Cache-Control"""
+    response = client.get('/digitalocean')
+    assert response.headers['ETag'] == pages.get('digitalocean').etag
+    assert not response.headers['ETag'].startswith('W/')
+    assert 'Last-Modified' in response.headers
+    assert response.headers['Cache-Control'] == 'public, max-age=300'
+    assert client.get('/').headers['Cache-Control'] == 'public, max-age=60'
+
+def test_if_none_match_returns_304(client):
+    """Test a matching If-None-Match yields 304 with no body"""
+    etag = client.get('/aws').headers['ETag']
+    response = client.get('/aws', headers={'If-None-Match': etag})
+    assert response.status_code == 304
+    assert response.data == b''
+    assert response.headers['ETag'] == etag
+    stale = client.get('/aws', headers={'If-None-Match': '"stale"'})
+    assert stale.status_code == 200
+
+def test_if_modified_since_returns_304(client):
+    """Test If-Modified-Since is honoured when no ETag is sent"""
+    last_modified = client.get('/cicd').headers['Last-Modified']
+    response = client.get('/cicd', headers={'If-Modified-Since': last_modified})
+    assert response.status_code == 304
+    old = client.get('/cicd', headers={'If-Modified-Since': 'Thu, 01 Jan 1970 00:00:00 GMT'})
+    assert old.status_code == 200
@@ -0,0 +1,99 @@
+"""Tests for preloading the app in the gunicorn master"""
+import gc
+import os
+import re
+import subprocess
+import sys
+import time
+import urllib.request
+from bench.server import ROOT, free_port, wait_ready
+from src import logs
+from src.app import create_app
+from src.metrics import CONCURRENCY_LIMIT
+from src.preload import THREADED, after_fork, before_fork, prepare
+
+def test_prepare_builds_and_stops_threads():
+    """Test prepare renders and compresses every page and stops the threads"""
+    app = create_app({'FEATURES': ['guides', 'ops']})
+    prepare(app)
+    pages = app.extensions['page_cache']
+    assert all(pages.get(name)._variants is not None for name in pages)
+    assert 'search_index' in app.extensions
+    assert app.extensions['health']._thread is None
+    assert app.extensions['memory_stats']._thread is None
+
+def test_before_fork_freezes():
+    """Test existing objects are moved out of the collector's generations"""
+    before_fork()
+    try:
+        assert gc.get_freeze_count() > 0
+    finally:
+        gc.unfreeze()
+
+def test_forked_worker():
+    """Test a forked worker restarts its threads, serves and logs"""
+    app = create_app({'FEATURES': ['guides', 'ops']})
+    prepare(app)
+    pid = os.fork()
+    if pid == 0:
+        try:
+            after_fork(app)
+            ok = (app.extensions['health']._thread.is_alive()
+                  and logs._listener._thread.is_alive()
+                  and app.test_client().get('/aws').status_code == 200
+                  and app.test_client().get('/readyz').status_code == 200)
+        except Exception:
+            ok = False
+        os._exit(0 if ok else 1)
+    _, status = os.waitpid(pid, 0)
+    assert os.waitstatus_to_exitcode(status) == 0
+    # The parent's log writer is running again too
+    assert logs._listener._thread.is_alive()
+
+def test_after_fork_reports_the_concurrency_limit():
+    """Test a forked worker sets the limit gauge the master set at import"""
+    app = create_app({'FEATURES': ['ops']})
+    CONCURRENCY_LIMIT.set(0)
+    after_fork(app)
+    try:
+        assert CONCURRENCY_LIMIT._value.get() == app.extensions['admission']._reported
+    finally:
+        for name in THREADED:
+            app.extensions[name].stop()
+
+def test_gunicorn_boots_with_empty_tmpdir(tmp_path):
+    """Test the preloading master creates the metrics directory before importing the app"""
+    port = free_port()
+    env = {key: value for key, value in os.environ.items()
+           if key not in ('PROMETHEUS_MULTIPROC_DIR', 'RATELIMIT_STORAGE',
+                          'DEPLOYHUB_METRICS_OWNER')}
+    env.update(TMPDIR=str(tmp_path), PRELOAD='1', WORKERS='2')
+    # A worker signalled before gunicorn installs its handlers misses SIGTERM
+    # and is killed after the graceful timeout: keep that short
+    proc = subprocess.Popen([sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py',
+                             '--bind', '127.0.0.1:%d' % port, '--graceful-timeout', '2'],
+                            cwd=ROOT, env=env, stdout=subprocess.DEVNULL,
+                            stderr=subprocess.PIPE, text=True)
+    try:
+        wait_ready('http://127.0.0.1:%d/health' % port)
+        # livesum of the workers' limits (20 each), set by each worker after the
+        # fork; the master's own value is not counted
+        deadline = time.monotonic() + 10
+        while True:
+            with urllib.request.urlopen('http://127.0.0.1:%d/metrics' % port) as response:
+                body = response.read().decode()
+            limit = float(re.search(r'^http_concurrency_limit (\S+)', body, re.M).group(1))
+            if limit == 40 or time.monotonic() > deadline:
+                break
+            time.sleep(0.05)
+        assert limit == 40
+        assert 'http_requests_total' in body
+        directory, = tmp_path.glob('deployhub-metrics-*')
+        master = [name for name in os.listdir(directory)
+                  if name.startswith('gauge_live') and name.endswith('_%d.db' % proc.pid)]
+        assert master == []
+    finally:
+        proc.terminate()
+        _, stderr = proc.communicate(timeout=30)
+    assert 'Traceback' not in stderr
+    assert os.listdir(directory)
@@ -0,0 +1,124 @@
+"""Tests for the sampling profiler"""
+import os
+import signal
+import threading
+import time
+import pytest
+from flask import Flask
+from src.app import app
+from src.profiler import Profiler, sample
+
+AUTH = {'Authorization': 'Bearer test-token'}
+
+def busy_loop(stop):
+    while not stop.is_set():
+        sum(range(1000))
+
+@pytest.fixture
+def worker():
+    """A thread burning CPU in busy_loop"""
+    stop = threading.Event()
+    thread = threading.Thread(target=busy_loop, args=(stop,), name='busy')
+    thread.start()
+    yield thread
+    stop.set()
+    thread.join()
+
+@pytest.fixture
+def client():
+    app.config['TESTING'] = True
+    app.config['DEBUG_TOKEN'] = 'test-token'
+    with app.test_client() as client:
+        yield client
+    app.config['DEBUG_TOKEN'] = None
+
+def test_sample_finds_busy_thread(worker):
+    """Test samples attribute time to the busy thread's stack"""
+    profile = sample(0.2, interval=0.005)
+    assert profile.samples > 5
+    assert 0 < profile.overhead < 0.05
+    lines = profile.collapsed().splitlines()
+    busy = [line for line in lines if line.startswith('busy;')]
+    assert busy and 'busy_loop (' in busy[0]
+    assert all(line.rsplit(' ', 1)[1].isdigit() for line in lines)
+
+def test_speedscope_format(worker):
+    """Test speedscope output indexes shared frames per thread profile"""
+    data = sample(0.1, interval=0.005).speedscope()
+    assert data['$schema'].startswith('https://www.speedscope.app/')
+    frames = data['shared']['frames']
+    profile = next(p for p in data['profiles'] if p['name'] == 'busy')
+    assert profile['type'] == 'sampled'
+    assert len(profile['samples']) == len(profile['weights'])
+    assert all(0 <= i < len(frames) for stack in profile['samples'] for i in stack)
+    # Innermost frames may be in busy_loop or in what it calls (Event.is_set)
+    assert all(any(frames[i]['name'].startswith('busy_loop') for i in stack)
+               for stack in profile['samples'])
+
+def test_overhead_guard(worker):
+    """Test the sampler spaces samples out to stay under its overhead budget"""
+    profile = sample(0.2, interval=0.0001, max_overhead=0.01)
+    assert profile.overhead <= 0.02
+
+def wait_for(client, url, **params):
+    deadline = time.time() + 5
+    while True:
+        response = client.get(url, headers=AUTH, query_string=params)
+        if response.status_code != 404 or time.time() > deadline:
+            return response
+        time.sleep(0.02)
+
+def test_profile_endpoint(client, worker, tmp_path, monkeypatch):
+    """Test /debug/profile samples in the background and serves the result"""
+    monkeypatch.setitem(app.config, 'PROFILE_DIR', str(tmp_path))
+    started = time.perf_counter()
+    response = client.get('/debug/profile?seconds=0.2', headers=AUTH)
+    # The request returns straight away; a sync worker's thread is not held
+    assert time.perf_counter() - started < 0.2
+    assert response.status_code == 202
+    url = response.json['url']
+    assert response.headers['Location'] == url
+    assert url == '/debug/profile/' + response.json['profile']
+    result = wait_for(client, url)
+    assert result.status_code == 200
+    assert result.mimetype == 'text/plain'
+    assert int(result.headers['X-Profile-Samples']) > 0
+    assert 'busy_loop' in result.get_data(as_text=True)
+    assert wait_for(client, url, format='speedscope').json['profiles']
+    assert sorted(os.listdir(tmp_path)) == sorted(os.path.basename(path)
+                                                  for path in response.json['files'])
+
+def test_profile_endpoint_guardrails(client):
+    """Test duration, format, name, token and concurrency limits"""
+    assert client.get('/debug/profile?seconds=31', headers=AUTH).status_code == 400
+    assert client.get('/debug/profile?seconds=0', headers=AUTH).status_code == 400
+    assert client.get('/debug/profile?seconds=0.1').status_code == 403
+    assert client.get('/debug/profile/profile-1-1?format=pprof',
+                      headers=AUTH).status_code == 400
+    assert client.get('/debug/profile/..%2Fpasswd', headers=AUTH).status_code == 404
+    assert client.get('/debug/profile/profile-1-1', headers=AUTH).status_code == 404
+    profiler = app.extensions['profiler']
+    with profiler._running:
+        assert client.get('/debug/profile?seconds=0.1', headers=AUTH).status_code == 409
+
+def test_signal_writes_profile(tmp_path, worker):
+    """Test the signal variant profiles in the background and writes both formats"""
+    test_app = Flask(__name__)
+    test_app.config.update(PROFILE_DIR=str(tmp_path), PROFILE_SIGNAL_SECONDS=0.1)
+    profiler = Profiler(test_app)
+    previous = signal.getsignal(signal.SIGUSR2)
+    profiler.install_signal_handler()
+    try:
+        os.kill(os.getpid(), signal.SIGUSR2)
+        # Files are written as *.tmp and renamed: wait for both final names
+        deadline = time.time() + 5
+        while time.time() < deadline:
+            names = sorted(name for name in os.listdir(tmp_path) if not name.endswith('.tmp'))
+            if len(names) == 2:
+                break
+            time.sleep(0.02)
+    finally:
+        signal.signal(signal.SIGUSR2, previous)
+    assert len(names) == 2
+    assert names[0].endswith('.collapsed') and names[1].endswith('.speedscope.json')
+    assert 'busy_loop' in (tmp_path / names[0]).read_text()
@@ -0,0 +1,95 @@
+"""Tests for per-client rate limiting"""
+import pytest
+from flask import Flask
+from src.app import app
+from src.metrics import RATELIMIT_THROTTLED
+from src.ratelimit import BucketTable, RateLimiter
+
+@pytest.fixture
+def limited():
+    test_app = Flask(__name__)
+    test_app.config.update(RATELIMIT_RATE=1.0, RATELIMIT_BURST=2, RATELIMIT_API_KEYS='k1, k2')
+    limiter = RateLimiter(test_app)
+
+    @test_app.route('/limited')
+    @limiter.limit
+    def limited_view():
+        return 'ok'
+
+    return test_app.test_client()
+
+def test_bucket_allows_burst_then_refills():
+    """Test a bucket spends its burst and refills at the configured rate"""
+    table = BucketTable()
+    assert [table.take('a', 1.0, 2, now=100.0)[0] for _ in range(3)] == [True, True, False]
+    assert table.take('a', 1.0, 2, now=100.5)[0] is False
+    assert table.take('a', 1.0, 2, now=101.5)[0] is True
+    assert table.take('b', 1.0, 2, now=101.5)[0] is True
+
+def test_take_charges_cost():
+    """Test a request can spend several tokens at once, only if they are all there"""
+    table = BucketTable()
+    assert table.take('a', 1.0, 5, now=0.0, cost=3) == (True, 2.0)
+    assert table.take('a', 1.0, 5, now=0.0, cost=3) == (False, 2.0)
+    assert table.take('a', 1.0, 5, now=1.0, cost=3) == (True, 0.0)
+
+def test_colliding_key_keeps_the_slot_level():
+    """Test a key taking over a slot gets the tokens left in it, not a full bucket"""
+    table = BucketTable(slots=1)
+    table.take('a', 1.0, 1, now=0.0)
+    assert table.take('b', 1.0, 1, now=0.0) == (False, 0.0)
+    assert table.take('c', 1.0, 1, now=1.0) == (True, 0.0)
+
+def test_file_backed_buckets_shared(tmp_path):
+    """Test two tables on one file (as two workers) see the same buckets"""
+    path = str(tmp_path / 'buckets')
+    first, second = BucketTable(path, slots=64), BucketTable(path, slots=64)
+    assert first.take('client', 1.0, 1, now=0.0)[0] is True
+    assert second.take('client', 1.0, 1, now=0.0)[0] is False
+    first.close()
+    second.close()
+
+def test_storage_symlink_refused(tmp_path):
+    """Test a symlink planted at the storage path is not followed"""
+    target = tmp_path / 'target'
+    target.write_bytes(b'keep')
+    (tmp_path / 'buckets').symlink_to(target)
+    with pytest.raises(OSError):
+        BucketTable(str(tmp_path / 'buckets'), slots=64)
+    assert target.read_bytes() == b'keep'
+
+def test_throttled_response(limited):
+    """Test the request past the burst gets a 429 with Retry-After and is counted"""
+    counter = RATELIMIT_THROTTLED.labels(endpoint='limited_view')
+    before = counter._value.get()
+    ok = [limited.get('/limited') for _ in range(2)]
+    assert [r.status_code for r in ok] == [200, 200]
+    assert ok[0].headers['RateLimit-Limit'] == '2'
+    assert ok[1].headers['RateLimit-Remaining'] == '0'
+    throttled = limited.get('/limited')
+    assert throttled.status_code == 429
+    assert throttled.headers['Retry-After'] == '1'
+    assert throttled.get_json() == {'error': 'Too many requests'}
+    assert counter._value.get() == before + 1
+
+def test_api_key_has_its_own_bucket(limited):
+    """Test clients are keyed by X-API-Key ahead of their address"""
+    for _ in range(2):
+        limited.get('/limited')
+    assert limited.get('/limited').status_code == 429
+    assert limited.get('/limited', headers={'X-API-Key': 'k1'}).status_code == 200
+
+def test_unknown_api_keys_are_ignored(limited):
+    """Test a key outside RATELIMIT_API_KEYS is limited by the client's address"""
+    for _ in range(2):
+        limited.get('/limited')
+    for key in ('random-1', 'random-2'):
+        assert limited.get('/limited', headers={'X-API-Key': key}).status_code == 429
+
+def test_calculate_is_limited():
+    """Test /api/calculate reports its rate limit"""
+    with app.test_client() as client:
+        response = client.post('/api/calculate', json={'a': 1, 'b': 2},
+                               environ_base={'REMOTE_ADDR': '10.0.0.1'})
+    assert response.status_code == 200
+    assert response.headers['RateLimit-Limit'] == str(app.config['RATELIMIT_BURST'])
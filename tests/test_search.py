@@ -0,0 +1,81 @@
+"""Tests for guide search"""
+import pytest
+from src.app import app, search_index
+from src.search import SearchIndex, snippet
+
+PAGE = '''<html><head><title>Test Guide - DeployHub</title></head><body>
+<nav class="navbar"><a href="/">Home</a></nav>
+<h1>Test Guide</h1>
+<h2 id="install">Install Docker</h2>
+<div class="step"><p>Install docker and docker compose.</p>
+<div class="command">apt install -y docker.io</div></div>
+<h2 id="firewall">Configure Firewall</h2>
+<p>Open port 80 with ufw &amp; keep docker running. Compose files live elsewhere.</p>
+</body></html>'''
+
+@pytest.fixture
+def client():
+    app.config['TESTING'] = True
+    with app.test_client() as client:
+        yield client
+
+@pytest.fixture
+def index():
+    index = SearchIndex()
+    index.add_page('/test', PAGE)
+    return index.build()
+
+def test_sections_split_on_headings(index):
+    """Test each h2 becomes a result linking to its anchor"""
+    assert [s.url for s in index.sections] == ['/test', '/test#install', '/test#firewall']
+    assert index.sections[1].page == 'Test Guide'
+    assert 'Home' not in index.sections[0].text
+
+def test_terms_rank_heading_matches_first(index):
+    """Test BM25 ranks the section titled with the term above passing mentions"""
+    results = index.search('docker')
+    assert [r['url'] for r in results] == ['/test#install', '/test#firewall']
+
+def test_all_terms_must_match(index):
+    """Test multi-term queries only return sections containing every term"""
+    assert [r['url'] for r in index.search('docker ufw')] == ['/test#firewall']
+    assert index.search('docker kubernetes') == []
+
+def test_prefix_query(index):
+    """Test term* matches every indexed term with that prefix"""
+    assert [r['url'] for r in index.search('firew*')] == ['/test#firewall']
+    assert len(index.search('doc*')) == 2
+
+def test_phrase_query(index):
+    """Test quoted phrases require adjacent terms"""
+    assert [r['url'] for r in index.search('"docker compose"')] == ['/test#install']
+    assert index.search('"compose docker"') == []
+
+def test_command_blocks_indexed(index):
+    """Test text inside .command blocks is searchable"""
+    assert index.search('apt')[0]['url'] == '/test#install'
+
+def test_snippet_highlights_and_escapes():
+    """Test snippets mark matches and escape the surrounding text"""
+    assert snippet('Use <b> & docker', {'docker'}) == 'Use &lt;b&gt; &amp; <mark>docker</mark>'
+    long = 'word ' * 100 + 'needle ' + 'word ' * 100
+    text = snippet(long, {'needle'}, width=60)
+    assert text.startswith('…') and text.endswith('…')
+    assert '<mark>needle</mark>' in text
+
+def test_guides_are_indexed():
+    """Test the app index covers every guide and the demo page"""
+    urls = {section.url.split('#')[0] for section in search_index.sections}
+    assert {'/aws', '/digitalocean', '/docker', '/cicd', '/monitoring', '/demo'} <= urls
+
+def test_search_api(client):
+    """Test /api/search returns ranked, highlighted results"""
+    response = client.get('/api/search?q="security group"&limit=1')
+    assert response.status_code == 200
+    [hit] = response.get_json()['results']
+    assert hit['url'].startswith('/aws#')
+    assert '<mark>' in hit['snippet']
+
+def test_search_api_requires_query(client):
+    """Test an empty query is rejected"""
+    assert client.get('/api/search?q=').status_code == 400
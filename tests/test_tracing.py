@@ -0,0 +1,137 @@
+"""Tests for sampled request tracing"""
+import json
+import time
+import pytest
+from src.app import app
+from src.tracing import NOOP_SPAN, Span, Trace, span, to_otlp
+
+TOKEN = 'test-token'
+AUTH = {'Authorization': 'Bearer ' + TOKEN}
+
+@pytest.fixture
+def tracer():
+    tracer = app.extensions['tracer']
+    rate = tracer.rate
+    tracer.rate = 1.0
+    tracer.traces.clear()
+    app.config['DEBUG_TOKEN'] = TOKEN
+    yield tracer
+    tracer.rate = rate
+    tracer.traces.clear()
+    app.config['DEBUG_TOKEN'] = None
+
+@pytest.fixture
+def client():
+    app.config['TESTING'] = True
+    with app.test_client() as client:
+        yield client
+
+def test_span_outside_sampled_request():
+    """Test span() is a no-op when no trace is active"""
+    assert span('anything') is NOOP_SPAN
+
+def test_calculate_phases(tracer, client):
+    """Test a sampled calculate request records its phases as spans"""
+    response = client.post('/api/calculate', json={'a': 2, 'b': 3})
+    trace = tracer.traces[-1]
+    names = [item.name for item in trace.spans]
+    assert names[0] == 'POST api.api_calculate'
+    assert {'json.parse', 'log', 'json.encode', 'metrics.record'} <= set(names)
+    assert trace.request_id == response.headers['X-Request-ID']
+    root = trace.root
+    assert root.attributes['http.status_code'] == 200
+    assert all(item.parent_id == root.span_id for item in trace.spans[1:])
+    assert all(root.start <= item.start <= item.end <= root.end for item in trace.spans)
+
+def test_unsampled_requests_not_recorded(tracer, client):
+    """Test requests outside the sample and probe paths leave no trace"""
+    tracer.rate = 0.0
+    client.get('/demo')
+    tracer.rate = 1.0
+    client.get('/livez')
+    assert len(tracer.traces) == 0
+
+def test_traceparent(tracer, client):
+    """Test a traceparent continues the caller's trace and sampling decision"""
+    trace_id, parent = 'ab' * 16, 'cd' * 8
+    tracer.rate = 0.0
+    client.get('/demo', headers={'traceparent': '00-%s-%s-01' % (trace_id, parent)})
+    client.get('/demo', headers={'traceparent': '00-%s-%s-00' % ('ef' * 16, parent)})
+    assert len(tracer.traces) == 1
+    trace = tracer.traces[0]
+    assert trace.trace_id == trace_id
+    assert trace.root.parent_id == parent
+    assert [item.name for item in trace.spans] == ['GET guides.demo', 'log', 'render', 'metrics.record']
+
+def test_ring_buffer_is_bounded(tracer, client):
+    """Test only the most recent traces are kept"""
+    for _ in range(tracer.traces.maxlen + 5):
+        client.get('/demo')
+    assert len(tracer.traces) == tracer.traces.maxlen
+
+def test_span_records_error():
+    """Test an exception inside a span is recorded and re-raised"""
+    trace = Trace('0' * 32)
+    with pytest.raises(ValueError):
+        with Span(trace, 'failing'):
+            raise ValueError('bad')
+    assert trace.spans[0].error == 'ValueError: bad'
+    assert to_otlp([trace])['resourceSpans'][0]['scopeSpans'][0]['spans'][0]['status'] \
+        == {'code': 2, 'message': 'ValueError: bad'}
+
+def test_debug_traces_requires_token(tracer, client):
+    """Test /debug/traces is hidden without a token and rejects a wrong one"""
+    assert client.get('/debug/traces', headers={'Authorization': 'Bearer nope'}) \
+        .status_code == 403
+    app.config['DEBUG_TOKEN'] = None
+    assert client.get('/debug/traces', headers=AUTH).status_code == 404
+
+def test_debug_traces(tracer, client):
+    """Test the viewer lists traces newest first and filters by request id"""
+    first = client.post('/api/calculate', json={'a': 1, 'b': 1}).headers['X-Request-ID']
+    client.get('/demo')
+    data = client.get('/debug/traces', headers=AUTH).json
+    assert [trace['name'] for trace in data['traces']] == ['GET guides.demo', 'POST api.api_calculate']
+    assert len(tracer.traces) == 2
+    data = client.get('/debug/traces?request_id=' + first, headers=AUTH).json
+    assert len(data['traces']) == 1
+    spans = data['traces'][0]['spans']
+    assert spans[0]['offset_ms'] == 0
+    assert all(item['duration_ms'] is not None for item in spans)
+    text = client.get('/debug/traces?format=text', headers=AUTH).get_data(as_text=True)
+    assert '    json.parse' in text
+
+def test_otlp_format(tracer, client):
+    """Test OTLP/JSON output has hex ids, string nanosecond times and attributes"""
+    client.post('/api/calculate', json={'a': 1, 'b': 1})
+    data = client.get('/debug/traces?format=otlp', headers=AUTH).json
+    resource = data['resourceSpans'][0]
+    assert {'key': 'service.name', 'value': {'stringValue': 'deployhub'}} \
+        in resource['resource']['attributes']
+    spans = resource['scopeSpans'][0]['spans']
+    root = spans[0]
+    assert len(root['traceId']) == 32 and len(root['spanId']) == 16
+    assert root['kind'] == 2 and 'parentSpanId' not in root
+    assert int(root['endTimeUnixNano']) >= int(root['startTimeUnixNano']) > 10 ** 18
+    assert {'key': 'http.status_code', 'value': {'intValue': '200'}} in root['attributes']
+    assert all(item['parentSpanId'] == root['spanId'] for item in spans[1:])
+
+def test_export_file(tracer, client, tmp_path):
+    """Test sampled traces are appended to the export file as OTLP JSON lines"""
+    path = tmp_path / 'traces.jsonl'
+    tracer.export_path = str(path)
+    tracer._pid = None
+    try:
+        client.get('/demo')
+        client.get('/demo')
+        deadline = time.time() + 5
+        while time.time() < deadline:
+            lines = path.read_text().splitlines() if path.exists() else []
+            spans = [item for line in lines for item in
+                     json.loads(line)['resourceSpans'][0]['scopeSpans'][0]['spans']]
+            if sum(1 for item in spans if 'parentSpanId' not in item) == 2:
+                break
+            time.sleep(0.01)
+        assert sum(1 for item in spans if item['name'] == 'GET guides.demo') == 2
+    finally:
+        tracer.export_path = None